@@ -1,31 +1,40 @@
 import os
-import json
-import time
 import csv
 import re
 import logging
-import random
-import shutil
-import tempfile
-from urllib.parse import quote_plus
+from collections import namedtuple
+from functools import lru_cache, partial
+from pickle import PicklingError
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # Import utilities and file manager directly, as Model handles core logic
 from .utils import get_mirror_link, create_html_view, find_chrome_path
 from .file_manager import get_output_path
 from .model_config_manager import ModelConfigManager
+from .model_index import get_model_index
+from .search_cache import SearchCache
+from .result_table import ResultTable
+from .search_journal import CheckpointWriter, SearchSession
+from .hf_resolver import DEFAULT_HF_API_BASE, HfResolver
+from .search_engine import BING_BASE_URL, ChromiumSession, HttpSearchBackend, RateLimiter, SearchScheduler, bing_search_url, browser_available
+from .workflow_parser import DEFAULT_EXTRACTORS, ExtractorConfig, load_workflow_references, scan_workflow_file
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
 
-try:
-    from DrissionPage import ChromiumPage, ChromiumOptions
-except ImportError:
-    ChromiumPage = None
+logger = logging.getLogger(__name__)
 
+_CHINESE_PREFIX_RE = re.compile(r"^[\u4e00-\u9fa5]+")
+_LEADING_SEPARATORS_RE = re.compile(r"^[-_|\s]+")
+
+
+class ProcessedName(namedtuple('ProcessedName', ['original', 'mapped', 'final_search_term', 'mapping_confidence', 'alternate_search_term'])):
+    """
+    _process_name_for_search 的结果，不可变，可在缓存中共享。
+    mapping_confidence 为应用的不规则名称映射的置信度，未应用映射时为 0.0。
+    alternate_search_term 为置信度不足、未应用的模糊映射得到的搜索词，主搜索词未找到时再搜索；没有时为空字符串。
+    """
+    __slots__ = ()
 
-logger = logging.getLogger(__name__)
 
 class AnalysisModel:
     """
@@ -33,6 +42,11 @@ class AnalysisModel:
     creating CSVs, searching links, and batch processing.
     处理分析工作流、查找模型、创建CSV、搜索链接和批量处理的核心逻辑。
     """
+    PROCESS_POOL_MIN_FILES = 16 # 文件较少时启动子进程的开销大于收益，改用线程
+    DEFAULT_SEARCH_WORKERS = 4 # 并发搜索的浏览器标签页数量
+    DEFAULT_REPORT_PAGE_SIZE = 5000 # HTML报告每页行数，超过时分页
+    NAME_CACHE_SIZE = 4096 # _process_name_for_search 缓存的名称数量
+    MIN_MAPPING_CONFIDENCE = 0.97 # 低于此置信度的映射(模糊匹配)不应用，只作为备选搜索词
 
     def __init__(self, controller=None):
         """初始化分析模型"""
@@ -46,69 +60,81 @@ class AnalysisModel:
         self.model_node_types = self.config_manager.get_model_node_types()
         self.node_model_indices = self.config_manager.get_node_model_indices()
         self.model_extensions = self.config_manager.get_model_extensions()
+        self.extractors = list(DEFAULT_EXTRACTORS) # 工作流格式提取器，可通过 register_extractor 扩展
+        self.search_cache = None # 首次搜索时创建
+        self._rate_limiter = RateLimiter() # 所有搜索共享的按主机限速
+        self.search_base_url = BING_BASE_URL # HTTP后端的搜索地址，测试时可指向本地服务
+        self.hf_api_base = DEFAULT_HF_API_BASE # 未连接控制器时使用的HF API地址
+        self._api_rate_limiter = RateLimiter(min_interval=0.1, jitter=0) # API请求比搜索页限速宽松
         
         logger.info("AnalysisModel initialized.")
         self._chinese_char_pattern = re.compile(r'[\u4e00-\u9fff]')
         self._max_search_term_length = 180
-        if pd is None:
-            logger.error("Pandas library is not installed, search/batch functionality might be affected.")
-        if ChromiumPage is None:
+        # 同一个名称在分析、生成CSV、搜索时都要处理，按原始名称缓存；不规则名称映射变化后清空
+        self._processed_name_cache = lru_cache(maxsize=self.NAME_CACHE_SIZE)(self._compute_processed_name)
+        self._processed_name_version = None
+        if not browser_available():
             logger.error("DrissionPage library is not installed, search functionality will not work.")
 
     def _get_corrected_name_if_possible(self, original_name):
+        return self._map_irregular_name(original_name)[0]
+
+    def _map_irregular_name(self, original_name):
+        """
+        Returns (mapped name, confidence, alternate name). Mappings below MIN_MAPPING_CONFIDENCE are not applied;
+        their corrected name is returned as the alternate, to be searched only when the primary term finds nothing.
+        返回 (映射后名称, 置信度, 备选名称)；没有映射时返回 (原始名称, 0.0, '')，
+        置信度过低时不应用映射，返回 (原始名称, 0.0, 修正后名称)。
+        """
         if self.controller and hasattr(self.controller, 'irregular_names_model') and self.controller.irregular_names_model:
-            corrected_name = self.controller.irregular_names_model.get_corrected_name(original_name)
-            if corrected_name != original_name:
-                logger.info(f"不规则名称映射应用 (Irregular name mapping applied)：'{original_name}' -> '{corrected_name}'")
-            return corrected_name
-        return original_name
-    
+            corrected_name, confidence = self.controller.irregular_names_model.get_corrected_name(original_name, with_confidence=True)
+            if corrected_name == original_name:
+                return original_name, 0.0, ''
+            if confidence < self.MIN_MAPPING_CONFIDENCE:
+                logger.debug(f"Low-confidence mapping kept as alternate search term: '{original_name}' -> '{corrected_name}' ({confidence:.2f})")
+                return original_name, 0.0, corrected_name
+            logger.info(f"不规则名称映射应用 (Irregular name mapping applied)：'{original_name}' -> '{corrected_name}' ({confidence:.2f})")
+            return corrected_name, confidence, ''
+        return original_name, 0.0, ''
+
+    def _irregular_names_version(self):
+        irregular_names_model = getattr(self.controller, 'irregular_names_model', None) if self.controller else None
+        return getattr(irregular_names_model, 'version', None) if irregular_names_model else None
+
     def _process_name_for_search(self, original_name):
         """
         Applies irregular name mapping and then removes Chinese prefix.
-        返回一个字典包含处理过程中的各个阶段的名称。
-        Returns a dictionary containing names at various stages of processing.
+        返回 ProcessedName，包含处理过程中的各个阶段的名称，结果按原始名称缓存。
+        Returns a ProcessedName with the names at various stages of processing; results are cached per original name.
         'original': 原始输入名
         'mapped': 应用不规则映射后的名称
         'final_search_term': 应用映射并移除中文前缀后的最终搜索词
         """
-        logger.debug(f"_process_name_for_search - 开始处理原始名称: '{original_name}'")
-        
+        version = self._irregular_names_version()
+        if version != self._processed_name_version:
+            self._processed_name_cache.cache_clear()
+            self._processed_name_version = version
+        return self._processed_name_cache(original_name)
+
+    def _compute_processed_name(self, original_name):
         # 应用不规则名称映射
-        mapped_name = self._get_corrected_name_if_possible(original_name)
-        logger.debug(f"_process_name_for_search - 映射后名称: '{mapped_name}'")
-        
-        # 移除中文前缀的逻辑 (直接从 mapped_name 处理)
-        name_after_prefix_removal = mapped_name # 默认为映射后的名称
+        mapped_name, mapping_confidence, alternate_name = self._map_irregular_name(original_name)
+        name_after_prefix_removal = self._strip_search_prefix(mapped_name)
+        alternate_search_term = self._strip_search_prefix(alternate_name) if alternate_name else ''
+
+        logger.debug(f"Name processing for search: Original='{original_name}', Mapped='{mapped_name}', FinalSearchTerm='{name_after_prefix_removal}'")
+        return ProcessedName(original_name, mapped_name, name_after_prefix_removal, mapping_confidence, alternate_search_term)
+
+    def _strip_search_prefix(self, mapped_name):
+        """移除中文前缀的逻辑 (直接从映射后的名称处理)"""
         if '_' in mapped_name:
-            parts = mapped_name.split('_', 1)
-            # (这里的特殊保留逻辑可以根据需要调整或简化)
-            if len(parts) > 1:
-                last_part_of_mapped = parts[-1]
-                if len(last_part_of_mapped) <= 5 and not self._contains_chinese(last_part_of_mapped):
-                    logger.debug(f"_process_name_for_search - 保留完整名称 (特殊后缀): '{mapped_name}'")
-                    pass # 保留 mapped_name
-                else: # 尝试移除前缀
-                    prefix_pattern = re.compile(r"^[\u4e00-\u9fa5]+")
-                    if re.search(r"^[\u4e00-\u9fa5]", mapped_name):
-                        temp_name = re.sub(prefix_pattern, "", mapped_name).strip()
-                        name_after_prefix_removal = re.sub(r"^[-_|\s]+", "", temp_name).strip()
-                        logger.debug(f"_process_name_for_search - 移除中文前缀: '{mapped_name}' -> '{name_after_prefix_removal}'")
-            # 如果没有下划线，但以中文开头
-            elif re.search(r"^[\u4e00-\u9fa5]", mapped_name):
-                 prefix_pattern = re.compile(r"^[\u4e00-\u9fa5]+")
-                 temp_name = re.sub(prefix_pattern, "", mapped_name).strip()
-                 name_after_prefix_removal = re.sub(r"^[-_|\s]+", "", temp_name).strip()
-                 logger.debug(f"_process_name_for_search - 移除中文前缀: '{mapped_name}' -> '{name_after_prefix_removal}'")
-
-        final_search_term = name_after_prefix_removal
-        
-        logger.debug(f"Name processing for search: Original='{original_name}', Mapped='{mapped_name}', FinalSearchTerm='{final_search_term}'")
-        return {
-            'original': original_name,
-            'mapped': mapped_name, # 用于判断搜索策略 (HF/LibLib) 和特殊规则
-            'final_search_term': final_search_term # 用于搜索引擎查询中的关键词
-        }
+            last_part_of_mapped = mapped_name.split('_', 1)[-1]
+            # 下划线后的部分很短且不含中文时保留完整名称 (特殊后缀)
+            if not (len(last_part_of_mapped) <= 5 and not self._contains_chinese(last_part_of_mapped)):
+                if _CHINESE_PREFIX_RE.match(mapped_name):
+                    temp_name = _CHINESE_PREFIX_RE.sub("", mapped_name).strip()
+                    return _LEADING_SEPARATORS_RE.sub("", temp_name).strip()
+        return mapped_name
 
     def remove_chinese_prefix(self, filename):
         """
@@ -135,10 +161,9 @@ class AnalysisModel:
                     return filename_after_correction # 保留修正后的完整名称
 
         # 如果不符合上述特殊保留条件，则尝试移除中文前缀
-        prefix_pattern = re.compile(r"^[\u4e00-\u9fa5]+")
-        if re.search(r"^[\u4e00-\u9fa5]", filename_after_correction): # 对修正后的名称判断和操作
-            filename_no_prefix = re.sub(prefix_pattern, "", filename_after_correction).strip()
-            filename_no_prefix = re.sub(r"^[-_|\s]+", "", filename_no_prefix).strip() # 移除前导分隔符
+        if _CHINESE_PREFIX_RE.match(filename_after_correction): # 对修正后的名称判断和操作
+            filename_no_prefix = _CHINESE_PREFIX_RE.sub("", filename_after_correction).strip()
+            filename_no_prefix = _LEADING_SEPARATORS_RE.sub("", filename_no_prefix).strip() # 移除前导分隔符
             return filename_no_prefix
         
         return filename_after_correction # 如果没有中文前缀，返回修正后的名称
@@ -182,89 +207,68 @@ class AnalysisModel:
             logger.debug(f"Decision name '{name_for_decision}' suggests non-Chinese model, using Hugging Face search with query term '{safe_query_term}'.")
             return f"https://www.bing.com/?setlang=en-US", f'site:huggingface.co "{safe_query_term}"'
 
-    def _is_request_header_too_long_page(self, page):
-        try:
-            page_text = f"{page.title or ''}\n{page.html or ''}".lower()
-            return 'header field too long' in page_text or (
-                'http error 400' in page_text and 'request header' in page_text
-            )
-        except Exception:
-            return False
-
-    def _reset_search_browser_state(self, page):
-        try:
-            page.clear_cache(session_storage=True, local_storage=True, cache=True, cookies=True)
-            logger.info("Cleared browser cache and cookies for search session.")
-        except Exception:
-            logger.warning("Failed to clear search browser cache/cookies.", exc_info=True)
-
-    def find_missing_models(self, workflow_file):
+    def _get_model_index(self):
+        """Returns the shared index of the configured ComfyUI models root, or None if it is not set."""
+        models_root = self.controller.get_loaded_models_root() if self.controller and hasattr(self.controller, 'get_loaded_models_root') else None
+        if not models_root:
+            return None
+        model_index = get_model_index(models_root)
+        if model_index is None:
+            logger.warning(f"Configured models root is not a directory: {models_root}")
+        return model_index
+
+    def find_missing_models(self, workflow_file, model_index=None):
+        """
+        Finds model references in a workflow that do not exist locally.
+        model_index: an already refreshed ModelIndex; when None the configured models root is indexed once for this call.
+        """
         logger.info(f"Analyzing workflow file: {workflow_file}")
-        base_dir = os.path.dirname(os.path.abspath(workflow_file))
-        missing_files_list = []
+        if model_index is None:
+            model_index = self._get_model_index()
+            if model_index: model_index.refresh()
         try:
-            with open(workflow_file, 'r', encoding='utf-8', errors='ignore') as f:
-                workflow_json = json.load(f)
-            if not isinstance(workflow_json, dict) or 'nodes' not in workflow_json:
+            references = load_workflow_references(workflow_file, self._extractor_config(), self.extractors)
+            if references is None:
                 logger.error(f"Invalid workflow format in {workflow_file}")
                 return []
+            return self._find_missing_in_references(references, os.path.dirname(os.path.abspath(workflow_file)), model_index)
+        except Exception as e: logger.error(f"Error in find_missing_models for {workflow_file}", exc_info=True); raise
 
-            # 使用配置管理器获取配置数据，而不是硬编码
-            node_model_indices = self.node_model_indices
-            model_extensions = self.model_extensions
-            model_node_types = self.model_node_types
+    def register_extractor(self, extractor):
+        """Adds a WorkflowExtractor for another workflow format; it runs alongside the built-in UI and API extractors."""
+        self.extractors.append(extractor)
+        logger.info(f"Registered workflow extractor: {extractor.name}")
 
-            file_references = []
-            nodes = workflow_json.get('nodes', [])
-            if len(nodes) > 1000: nodes = nodes[:1000]
+    def _extractor_config(self):
+        return ExtractorConfig(frozenset(self.model_node_types), self.node_model_indices, tuple(self.model_extensions))
 
-            for node in nodes:
-                try:
-                    node_type = node.get('type', '')
-                    widgets_values = node.get('widgets_values', [])
-                    # ... (其他节点属性获取和类型判断逻辑不变) ...
-                    if not (node_type in model_node_types or "Loader" in node_type) or not widgets_values: continue
-                    
-                    indices_to_check = node_model_indices.get(node_type, node_model_indices["default"])
-                    for index in indices_to_check:
-                        if len(widgets_values) > index and isinstance(widgets_values[index], str):
-                            original_value_from_widget = widgets_values[index].strip()
-                            if not original_value_from_widget or original_value_from_widget.lower() in ["default", "none", "empty", "auto", "off", "on"]: continue
-                            
-                            original_filename = os.path.basename(original_value_from_widget.replace('\\', '/')) if '\\' in original_value_from_widget or '/' in original_value_from_widget else original_value_from_widget
-                            
-                            # 使用 _process_name_for_search 获取处理后的名称
-                            processed_names = self._process_name_for_search(original_filename)
-                            
-                            file_references.append({
-                                'node_id': node.get('id'), 'node_type': node_type,
-                                'original_filename': original_filename, # 用于报告
-                                'filename_for_check': processed_names['final_search_term'] # 用于文件存在性检查
-                            })
-                except Exception as node_e: logger.error(f"Error processing node ID {node.get('id', 'N/A')}", exc_info=True)
-            
-            if not file_references: return []
-            file_existence_cache = {}
-            for ref in file_references:
-                try:
-                    filename_to_check_existence = ref['filename_for_check']
-                    original_filename_for_report = ref['original_filename']
-                    name, ext = os.path.splitext(filename_to_check_existence)
-                    if filename_to_check_existence in file_existence_cache:
-                        if not file_existence_cache[filename_to_check_existence]:
-                            missing_files_list.append({'node_id': ref['node_id'], 'node_type': ref['node_type'], 'file_path': original_filename_for_report})
-                        continue
-                    exists = os.path.exists(filename_to_check_existence) or os.path.exists(os.path.join(base_dir, filename_to_check_existence))
-                    if not exists and not ext:
-                         for model_ext in model_extensions:
-                             if os.path.exists(f"{filename_to_check_existence}{model_ext}") or os.path.exists(os.path.join(base_dir, f"{filename_to_check_existence}{model_ext}")):
-                                 exists = True; break
-                    file_existence_cache[filename_to_check_existence] = exists
-                    if not exists:
-                        logger.debug(f"Missing file: Checked='{filename_to_check_existence}', Reported='{original_filename_for_report}'")
+    def _find_missing_in_references(self, references, base_dir, model_index=None):
+        """Checks extracted model references against the model index and the workflow directory."""
+        missing_files_list = []
+        model_extensions = self.model_extensions
+        file_existence_cache = {}
+        for ref in references:
+            try:
+                original_filename_for_report = ref['original_filename']
+                # 使用 _process_name_for_search 获取处理后的名称，用于文件存在性检查
+                filename_to_check_existence = self._process_name_for_search(original_filename_for_report).final_search_term
+                name, ext = os.path.splitext(filename_to_check_existence)
+                if filename_to_check_existence in file_existence_cache:
+                    if not file_existence_cache[filename_to_check_existence]:
                         missing_files_list.append({'node_id': ref['node_id'], 'node_type': ref['node_type'], 'file_path': original_filename_for_report})
-                except Exception as check_e: logger.error(f"Error checking existence (original: '{ref.get('original_filename')}', checked: '{ref.get('filename_for_check')}')", exc_info=True)
-        except Exception as e: logger.error(f"Error in find_missing_models for {workflow_file}", exc_info=True); raise
+                    continue
+                exists = bool(model_index) and (model_index.contains(filename_to_check_existence, model_extensions) or model_index.contains(original_filename_for_report, model_extensions))
+                if not exists:
+                    exists = os.path.exists(filename_to_check_existence) or os.path.exists(os.path.join(base_dir, filename_to_check_existence))
+                if not exists and not ext:
+                     for model_ext in model_extensions:
+                         if os.path.exists(f"{filename_to_check_existence}{model_ext}") or os.path.exists(os.path.join(base_dir, f"{filename_to_check_existence}{model_ext}")):
+                             exists = True; break
+                file_existence_cache[filename_to_check_existence] = exists
+                if not exists:
+                    logger.debug(f"Missing file: Checked='{filename_to_check_existence}', Reported='{original_filename_for_report}'")
+                    missing_files_list.append({'node_id': ref['node_id'], 'node_type': ref['node_type'], 'file_path': original_filename_for_report})
+            except Exception as check_e: logger.error(f"Error checking existence (original: '{ref.get('original_filename')}')", exc_info=True)
         return sorted(missing_files_list, key=lambda x: x['file_path']) if missing_files_list else []
 
     def create_csv_file(self, missing_files, output_basename):
@@ -280,8 +284,8 @@ class AnalysisModel:
                     merged_files_for_csv[original_file_path] = {
                         'node_id': str(item_data['node_id']), 'node_type': item_data['node_type'],
                         'original_file_path': original_file_path,
-                        'name_for_decision': processed_names['mapped'],       # 用于_get_search_url的第一个参数
-                        'name_for_query_embedding': processed_names['final_search_term'] # 用于_get_search_url的第二个参数
+                        'name_for_decision': processed_names.mapped,       # 用于_get_search_url的第一个参数
+                        'name_for_query_embedding': processed_names.final_search_term # 用于_get_search_url的第二个参数
                     }
                 else: # 合并节点ID和类型
                     existing = merged_files_for_csv[original_file_path]
@@ -300,8 +304,7 @@ class AnalysisModel:
                         csv_item['name_for_query_embedding'],
                         csv_item['node_type']
                     )
-                    query_param = quote_plus(site_query)
-                    search_link_url = f"https://www.bing.com/search?q={query_param}"
+                    search_link_url = bing_search_url(site_query)
                     writer.writerow({
                         '序号': i, '节点ID': csv_item['node_id'], '节点类型': csv_item['node_type'],
                         '文件名': csv_item['original_file_path'], # 显示原始文件名
@@ -312,208 +315,393 @@ class AnalysisModel:
         except Exception as e: logger.error(f"Error creating CSV for {output_basename}", exc_info=True); return None
 
 
-    def search_model_links(self, csv_file, progress_callback=None):
-        logger.info(f"Starting model link search for CSV: {csv_file}")
-        if pd is None or ChromiumPage is None:
-             logger.error("Search cannot proceed: Missing pandas or DrissionPage."); return False
+    def search_model_links(self, csv_file, progress_callback=None, resume=False):
+        """
+        Searches download links for the rows of csv_file.
+        resume=True continues the saved search session of the CSV: only rows that are pending, were interrupted,
+        or failed and whose backoff has elapsed are searched again.
+        """
+        logger.info(f"Starting model link search for CSV: {csv_file}{' (resume)' if resume else ''}")
         try:
-            # (CSV 读取和列处理逻辑保持不变，确保'文件名'和'节点类型'列存在且为字符串)
-            string_cols = ['状态', '下载链接', '镜像链接', '搜索链接', '文件名', '节点类型']
-            df = pd.read_csv(csv_file, encoding='utf-8-sig', dtype={col: str for col in string_cols}, keep_default_na=False, na_values=[''])
-            for col in ['文件名', '状态', '下载链接', '镜像链接', '搜索链接', '节点类型']: # 确保这些列存在
-                if col not in df.columns: df[col] = ''
-                df[col] = df[col].fillna('').astype(str)
+            table = ResultTable.read_csv(csv_file) # 缺少的搜索列会补为空字符串
+
+            # 恢复上次中断时只写入检查点日志、尚未写回CSV的结果
+            checkpoint = CheckpointWriter(csv_file, table.write_csv)
+            if self._replay_search_journal(table, csv_file): checkpoint.compact()
+            session = SearchSession.load(csv_file) if resume else None
+            if resume and session is None: logger.info("No saved search session for this CSV, starting a new one.")
+            if session is None: session = SearchSession.start(csv_file)
 
             search_tasks = []
-            for index, row in df.iterrows():
-                original_name_from_csv = row.get('文件名', '')
+            for index, row in enumerate(table):
+                original_name_from_csv = row.filename
                 if not original_name_from_csv: continue
-                status = row.get('状态', '')
-                hf_link = row.get('下载链接', '')
-                search_or_liblib_link = row.get('搜索链接', '')
+                status = row.status
+                hf_link = row.download_link
+                search_or_liblib_link = row.search_link
                 is_processed = (status == '已处理')
                 has_valid_link = hf_link or (search_or_liblib_link.startswith('http') and 'liblib.art' in search_or_liblib_link)
                 if is_processed and has_valid_link: continue
+                if resume and not session.is_runnable(original_name_from_csv): continue
 
                 processed_names = self._process_name_for_search(original_name_from_csv)
                 search_tasks.append({
                     'original_name_csv': original_name_from_csv,
-                    'name_for_decision': processed_names['mapped'],
-                    'search_term_query': processed_names['final_search_term'],
-                    'df_index': index, 'node_type': row.get('节点类型', '')
+                    'name_for_decision': processed_names.mapped,
+                    'search_term_query': processed_names.final_search_term,
+                    'alternate_search_term': processed_names.alternate_search_term,
+                    'row_index': index, 'node_type': row.node_type
                 })
             
+            for task in search_tasks: session.add_pending(task['original_name_csv'])
+            session.save()
+
+            # 先用搜索缓存填充，命中的行不再需要浏览器
+            search_cache = self._get_search_cache()
+            if search_tasks and search_cache:
+                remaining_tasks = []
+                for task in search_tasks:
+                    source = self._get_search_source(task)
+                    cached = search_cache.get(source, task['search_term_query']) if source else None
+                    if cached:
+                        self._apply_cached_result(table, task['row_index'], cached)
+                        session.mark_done(task['original_name_csv'])
+                    else:
+                        remaining_tasks.append(task)
+                if len(remaining_tasks) < len(search_tasks):
+                    logger.info(f"Search cache hits: {len(search_tasks) - len(remaining_tasks)}/{len(search_tasks)}")
+                search_tasks = remaining_tasks
+
             if not search_tasks: logger.info("No keywords require searching."); # 继续生成HTML
             else: logger.info(f"Found {len(search_tasks)} keywords to search.")
 
+            progress = {'done': 0, 'total': len(search_tasks)}
+            def write_result(task, result):
+                # 结果只在当前线程写入结果表、缓存和CSV
+                progress['done'] += 1
+                if progress_callback: progress_callback(progress['done'], progress['total'])
+                row_idx = task['row_index']
+                if isinstance(result, Exception): result = {'状态': '搜索错误(异常)'}
+                result = {column: str(value) for column, value in result.items()}
+                table.update(row_idx, result)
+                self._store_search_result(search_cache, task, table[row_idx])
+                status = result.get('状态', '')
+                if status.startswith('搜索错误'): session.mark_failed(task['original_name_csv'], status)
+                else: session.mark_done(task['original_name_csv'])
+                if checkpoint.record(row_idx, result, task['original_name_csv']): # 追加到日志，批量写回CSV
+                    session.save()
+            mark_in_flight = lambda task: session.mark_in_flight(task['original_name_csv'])
+
+            # 先按精确文件名查询Hugging Face API，命中的行不再需要搜索引擎
+            if search_tasks:
+                search_tasks = self._run_hf_resolver(search_tasks, write_result)
+
+            backend_mode = self._get_search_backend_mode()
+            http_results = {} # HTTP后端失败的结果，浏览器不可用时写入
+            if search_tasks and backend_mode in ('auto', 'http'):
+                search_tasks, http_results = self._run_http_search(search_tasks, write_result, retry_in_browser=(backend_mode == 'auto'), on_task_start=mark_in_flight)
+                if search_tasks: logger.info(f"{len(search_tasks)} keywords need the browser fallback.")
+            if search_tasks and backend_mode == 'http':
+                for task in search_tasks: write_result(task, {'状态': '搜索错误(HTTP后端不可用)'})
+                search_tasks = []
+
             # (浏览器设置逻辑不变)
-            chrome_path_to_use = (self.controller.get_loaded_chrome_path() if self.controller and hasattr(self.controller, 'get_loaded_chrome_path') else None) or find_chrome_path()
+            chrome_path_to_use = None
+            if search_tasks:
+                chrome_path_to_use = (self.controller.get_loaded_chrome_path() if self.controller and hasattr(self.controller, 'get_loaded_chrome_path') else None) or find_chrome_path()
             if not chrome_path_to_use and search_tasks: # 只有在需要搜索时才强制要求浏览器
                 logger.error("Chrome browser not found. Cannot perform search.");
-            
-            page = None
-            browser_tmp_dir = None
-            if chrome_path_to_use and search_tasks: # 仅当需要搜索且浏览器存在时初始化
-                browser_tmp_dir = tempfile.mkdtemp(prefix="model_finder_search_")
-                co = ChromiumOptions(read_file=False).set_browser_path(chrome_path_to_use)
-                co.set_tmp_path(browser_tmp_dir).auto_port()
-                co.set_cache_path(os.path.join(browser_tmp_dir, "cache"))
-                co.set_argument('--disable-infobars').set_argument('--no-sandbox').set_argument('--start-maximized')
-                co.set_argument('--no-first-run').set_argument('--no-default-browser-check')
-                # co.set_argument('--headless')
+            if search_tasks and not browser_available():
+                logger.error("DrissionPage is not installed. Cannot perform search.")
+
+            browser = None
+            if chrome_path_to_use and search_tasks and browser_available(): # 仅当需要搜索且浏览器存在时初始化
                 try:
-                    page = ChromiumPage(co)
-                    self._reset_search_browser_state(page)
-                    logger.info("Browser page initialized with isolated temporary profile: %s", browser_tmp_dir)
+                    browser = ChromiumSession(chrome_path_to_use, min(self._get_search_workers(), len(search_tasks)), self._rate_limiter)
                 except Exception as browser_e:
                     logger.error(f"Failed to initialize browser: {browser_e}")
-                    page = None # 确保page为None，后续不会尝试使用
-
-            if page: # 只有当浏览器成功初始化后才进行搜索循环
-                total_tasks = len(search_tasks)
-                for i, task in enumerate(search_tasks):
-                    if progress_callback: progress_callback(i + 1, total_tasks)
-                    logger.info(f"Searching ({i+1}/{total_tasks}): Query='{task['search_term_query']}' (Original: '{task['original_name_csv']}')")
-                    
-                    bing_url, site_query = self._get_search_url(task['name_for_decision'], task['search_term_query'], task['node_type'])
-                    df_idx = task['df_index']
-                    try:
-                        for attempt in range(2):
-                            if attempt:
-                                logger.info("Retrying Bing search after clearing browser state: %s", site_query)
-                                self._reset_search_browser_state(page)
-
-                            page.get(bing_url, timeout=15)
-                            if self._is_request_header_too_long_page(page):
-                                if attempt == 0:
-                                    continue
-                                df.loc[df_idx, '状态'] = '搜索错误(Bing请求头过长)'
-                                break
-
-                            time.sleep(random.uniform(0.5,1.0)) # 减少等待
-                            search_box = page.ele("#sb_form_q", timeout=5)
-                            if not search_box:
-                                df.loc[df_idx, '状态'] = '搜索错误(无搜索框)'
-                                break
-                            search_box.clear(); search_box.input(site_query)
-                            time.sleep(random.uniform(0.2,0.5))
-
-                            s_button = page.ele('#search_icon',timeout=3) or page.ele('xpath://button[@type="submit"]', timeout=3)
-                            if s_button: s_button.click()
-                            else: page.run_js("document.querySelector('#sb_form').submit();")
-                            page.wait.load_start(timeout=10)
-
-                            if self._is_request_header_too_long_page(page):
-                                if attempt == 0:
-                                    continue
-                                df.loc[df_idx, '状态'] = '搜索错误(Bing请求头过长)'
-                                break
-                            break
-
-                        if df.loc[df_idx, '状态'] in ['搜索错误(Bing请求头过长)', '搜索错误(无搜索框)']:
-                            continue
-
-                        results_container = page.ele('#b_results', timeout=10)
-                        if not results_container: df.loc[df_idx, '状态'] = '未找到(无结果区)'; continue
-                        
-                        first_link = results_container.ele("xpath:.//h2/a")
-                        if first_link:
-                            found_url = first_link.attr("href")
-                            logger.info(f"Found: '{first_link.text}' -> {found_url}")
-                            # (填充df的逻辑不变，基于 task['name_for_decision'] 判断中文/HF)
-                            if self._contains_chinese(task['name_for_decision']): # LibLib
-                                if found_url and 'liblib.art' in found_url:
-                                    # 确保这是一个详情页面URL而不是搜索结果
-                                    if 'bing.com' in found_url or 'search' in found_url.lower():
-                                        # 尝试从链接文本或者页面内容中提取实际的LibLib URL
-                                        liblib_url = None
-                                        try:
-                                            # 先尝试点击链接，看能否找到实际的LibLib URL
-                                            first_link.click()
-                                            page.wait.load_start(timeout=10)
-                                            current_url = page.url
-                                            if 'liblib.art' in current_url:
-                                                liblib_url = current_url
-                                                logger.info(f"Extracted real LibLib URL by following link: {liblib_url}")
-                                            else:
-                                                # 如果点击后不是LibLib网站，尝试在结果中寻找直接的LibLib链接
-                                                page.back()
-                                                liblib_links = results_container.eles("xpath:.//a[contains(@href, 'liblib.art')]")
-                                                if liblib_links:
-                                                    liblib_url = liblib_links[0].attr("href")
-                                                    logger.info(f"Found direct LibLib link in results: {liblib_url}")
-                                        except Exception as link_e:
-                                            logger.error(f"Error extracting LibLib URL: {link_e}")
-                                            page.get(bing_url, timeout=15)  # 返回搜索页
-                                            
-                                        if liblib_url:
-                                            df.loc[df_idx, '搜索链接'] = liblib_url
-                                            df.loc[df_idx, '状态'] = '已处理'
-                                        else:
-                                            df.loc[df_idx, '搜索链接'] = found_url
-                                            df.loc[df_idx, '状态'] = '找到搜索链接但非直接LibLib链接'
-                                    else:
-                                        df.loc[df_idx, '搜索链接'] = found_url
-                                        df.loc[df_idx, '状态'] = '已处理'
-                                    df.loc[df_idx, '下载链接'] = ''
-                                    df.loc[df_idx, '镜像链接'] = ''
-                                else: 
-                                    df.loc[df_idx, '状态'] = '未找到LibLib'
-                            else: # HuggingFace
-                                if found_url and 'huggingface.co' in found_url:
-                                    df.loc[df_idx, '下载链接'] = found_url.replace("/blob/", "/resolve/") if "/blob/" in found_url else found_url
-                                    df.loc[df_idx, '镜像链接'] = get_mirror_link(found_url)
-                                    df.loc[df_idx, '搜索链接'] = ''; df.loc[df_idx, '状态'] = '已处理'
-                                else: df.loc[df_idx, '状态'] = '未找到HF'
-                        else: df.loc[df_idx, '状态'] = '未找到(无链接)'
-                    except Exception as search_e: logger.error(f"Error searching for '{task['search_term_query']}'", exc_info=True); df.loc[df_idx, '状态'] = '搜索错误(异常)'
-                    finally:
-                        df.to_csv(csv_file, index=False, encoding='utf-8-sig') # Save after each
-                        time.sleep(random.uniform(0.8, 1.8)) # Shorter delay
-            if page:
+                    browser = None # 确保browser为None，后续不会尝试使用
+
+            if browser: # 只有当浏览器成功初始化后才进行搜索
                 try:
-                    page.quit()
-                except Exception:
-                    logger.warning("Failed to quit search browser cleanly.", exc_info=True)
-            if browser_tmp_dir:
-                shutil.rmtree(browser_tmp_dir, ignore_errors=True)
-
-            df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-            html_file = create_html_view(csv_file)
+                    # 各标签页并发搜索
+                    for task, result in SearchScheduler(browser.backends, self._search_task, on_task_start=mark_in_flight).run(search_tasks):
+                        write_result(task, result)
+                finally:
+                    browser.close()
+            else:
+                for task in search_tasks:
+                    if id(task) in http_results: write_result(task, http_results[id(task)])
+
+            checkpoint.close()
+            session.save()
+            logger.info(f"Search session state: {session.summary()}")
+            html_file = create_html_view(csv_file, page_size=self.get_report_page_size())
             return html_file if html_file else True
         except Exception as e: logger.error(f"Critical error in search_model_links for {csv_file}", exc_info=True); return False
 
 
-    def batch_process_workflows(self, directory, file_pattern="*.json", progress_callback=None):
-        """Processes all workflow files in a directory. 处理目录中的所有工作流文件。"""
+    def _search_task(self, backend, task):
+        """
+        Runs one search on a backend (called on a search worker thread).
+        Returns the column values to write for the task's row.
+        When the term finds nothing and the task has an alternate term (a low-confidence fuzzy mapping), that is searched too.
+        """
+        result = self._search_term(backend, task)
+        alternate = task.get('alternate_search_term')
+        if alternate and alternate != task['search_term_query'] and result.get('状态') != '已处理' \
+                and not result.get('状态', '').startswith('搜索错误'):
+            logger.info(f"Retrying with alternate search term: '{alternate}' (Original: '{task['original_name_csv']}')")
+            alternate_result = self._search_term(backend, dict(task, name_for_decision=alternate, search_term_query=alternate))
+            if alternate_result.get('状态') == '已处理':
+                return alternate_result
+        return result
+
+    def _search_term(self, backend, task):
+        """Searches task['search_term_query'] once and returns the column values for the row."""
+        logger.info(f"Searching: Query='{task['search_term_query']}' (Original: '{task['original_name_csv']}') [{backend.name}]")
+        bing_url, site_query = self._get_search_url(task['name_for_decision'], task['search_term_query'], task['node_type'])
+        hit = backend.search(bing_url, site_query)
+        if hit['error']: return {'状态': hit['error']}
+        found_url = hit['first_url']
+        if not found_url: return {'状态': '未找到(无链接)'}
+        logger.info(f"Found: '{hit['first_text']}' -> {found_url}")
+
+        if self._contains_chinese(task['name_for_decision']): # LibLib
+            if 'liblib.art' not in found_url: return {'状态': '未找到LibLib'}
+            # 确保这是一个详情页面URL而不是搜索结果
+            if 'bing.com' in found_url or 'search' in found_url.lower():
+                liblib_url = None
+                try:
+                    # 先尝试打开链接，看能否得到实际的LibLib URL
+                    current_url = backend.resolve_url(found_url)
+                    if current_url and 'liblib.art' in current_url:
+                        liblib_url = current_url
+                        logger.info(f"Extracted real LibLib URL by following link: {liblib_url}")
+                    elif hit['liblib_links']:
+                        # 否则使用结果中直接的LibLib链接
+                        liblib_url = hit['liblib_links'][0]
+                        logger.info(f"Found direct LibLib link in results: {liblib_url}")
+                except Exception as link_e:
+                    logger.error(f"Error extracting LibLib URL: {link_e}")
+                if liblib_url:
+                    return {'搜索链接': liblib_url, '状态': '已处理', '下载链接': '', '镜像链接': ''}
+                return {'搜索链接': found_url, '状态': '找到搜索链接但非直接LibLib链接', '下载链接': '', '镜像链接': ''}
+            return {'搜索链接': found_url, '状态': '已处理', '下载链接': '', '镜像链接': ''}
+
+        # HuggingFace
+        if 'huggingface.co' not in found_url: return {'状态': '未找到HF'}
+        return {'下载链接': found_url.replace("/blob/", "/resolve/") if "/blob/" in found_url else found_url,
+                '镜像链接': get_mirror_link(found_url), '搜索链接': '', '状态': '已处理'}
+
+    def _run_hf_resolver(self, search_tasks, write_result):
+        """
+        Resolves Hugging Face rows through the HF model API (exact filename match).
+        Hits are written with the resolve/main link, file size and sha256; returns the tasks still to search.
+        """
+        api_base = self._get_hf_api_base()
+        hf_tasks = [task for task in search_tasks if self._get_search_source(task) == 'hf']
+        if not api_base or not hf_tasks:
+            return search_tasks
+        try:
+            resolver = HfResolver(api_base, rate_limiter=self._api_rate_limiter, workers=self._get_search_workers())
+        except Exception as e:
+            logger.warning(f"HF API resolver unavailable: {e}")
+            return search_tasks
+        try:
+            resolved = resolver.resolve_many([task['search_term_query'] for task in hf_tasks])
+        finally:
+            resolver.close()
+
+        hf_task_ids = {id(task) for task in hf_tasks}
+        remaining_tasks = []
+        for task in search_tasks:
+            hit = resolved.get(task['search_term_query']) if id(task) in hf_task_ids else None
+            if hit and hit.get('error'):
+                task['hf_api_error'] = hit['error'] # 暂时失败，交给搜索引擎，但搜索未找到时不写入否定缓存
+                hit = None
+            if not hit:
+                remaining_tasks.append(task)
+                continue
+            logger.info(f"Resolved via HF API: '{task['search_term_query']}' -> {hit['download_link']}")
+            write_result(task, {'状态': '已处理', '下载链接': hit['download_link'], '镜像链接': get_mirror_link(hit['download_link']),
+                                '搜索链接': '', '文件大小': str(hit['size'] or ''), 'SHA256': hit['sha256']})
+        logger.info(f"HF API resolved {len(search_tasks) - len(remaining_tasks)}/{len(hf_tasks)} Hugging Face rows.")
+        return remaining_tasks
+
+    def _get_hf_api_base(self):
+        """Base URL of the HF model API (huggingface.co, hf-mirror.com, ...); empty disables the resolver."""
+        if self.controller and hasattr(self.controller, 'get_loaded_hf_api_base'):
+            return (self.controller.get_loaded_hf_api_base() or '').strip()
+        return self.hf_api_base
+
+    def _run_http_search(self, search_tasks, write_result, retry_in_browser=True, on_task_start=None):
+        """
+        Searches with the browserless HTTP backend. Returns (tasks that still need the browser, {id(task): HTTP result}):
+        all tasks if the backend is unavailable, otherwise those that were blocked or failed (when retry_in_browser).
+        """
+        workers = min(self._get_search_workers(), len(search_tasks))
+        try:
+            backends = [HttpSearchBackend(self._rate_limiter, base_url=self.search_base_url) for _ in range(workers)]
+        except Exception as e:
+            logger.warning(f"HTTP search backend unavailable: {e}")
+            return search_tasks, {}
+        retry_tasks, failed_results = [], {}
+        try:
+            for task, result in SearchScheduler(backends, self._search_task, on_task_start=on_task_start).run(search_tasks):
+                status = result.get('状态', '') if isinstance(result, dict) else '搜索错误(异常)'
+                if retry_in_browser and (status.startswith('搜索错误') or status == '未找到(无结果区)'):
+                    retry_tasks.append(task)
+                    failed_results[id(task)] = result
+                else:
+                    write_result(task, result)
+        finally:
+            for backend in backends: backend.close()
+        return retry_tasks, failed_results
+
+    def get_report_page_size(self):
+        """Rows per HTML report page from settings; 0 writes a single file."""
+        size = self.controller.get_loaded_report_page_size() if self.controller and hasattr(self.controller, 'get_loaded_report_page_size') else self.DEFAULT_REPORT_PAGE_SIZE
+        try: size = int(size)
+        except (TypeError, ValueError): size = self.DEFAULT_REPORT_PAGE_SIZE
+        return max(0, size)
+
+    def _get_search_backend_mode(self):
+        """'auto' (HTTP first, browser for failures), 'http' or 'chromium', from settings."""
+        mode = self.controller.get_loaded_search_backend() if self.controller and hasattr(self.controller, 'get_loaded_search_backend') else 'auto'
+        return mode if mode in ('auto', 'http', 'chromium') else 'auto'
+
+    def _get_search_workers(self):
+        """Number of concurrent search tabs from settings."""
+        workers = self.controller.get_loaded_search_workers() if self.controller and hasattr(self.controller, 'get_loaded_search_workers') else self.DEFAULT_SEARCH_WORKERS
+        try: workers = int(workers)
+        except (TypeError, ValueError): workers = self.DEFAULT_SEARCH_WORKERS
+        return max(1, workers)
+
+    def _replay_search_journal(self, table, csv_file):
+        """Applies results recorded in the checkpoint journal of csv_file to table. Returns the number of rows restored."""
+        restored = 0
+        for entry in CheckpointWriter.read_journal(csv_file):
+            row_idx = entry.get('row')
+            if not isinstance(row_idx, int) or not 0 <= row_idx < len(table) or table[row_idx].filename != entry.get('name'):
+                continue # 日志与当前CSV不对应
+            table.update(row_idx, entry.get('values') or {})
+            restored += 1
+        if restored: logger.info(f"Restored {restored} search results from checkpoint journal of {os.path.basename(csv_file)}")
+        return restored
+
+    def _get_search_cache(self):
+        """Returns the persistent search cache, created on first use; None if it cannot be opened."""
+        if self.search_cache is None:
+            try:
+                self.search_cache = SearchCache()
+            except Exception as e:
+                logger.warning(f"Search cache unavailable: {e}")
+        return self.search_cache
+
+    def _get_search_source(self, task):
+        """HF/LibLib decision used as part of the cache key; None for special-rule queries, which are not cached."""
+        if task['name_for_decision'] == "ip-adapter.bin" and task['node_type'] == "InstantIDModelLoader":
+            return None
+        return 'liblib' if self._contains_chinese(task['name_for_decision']) else 'hf'
+
+    def _apply_cached_result(self, table, row_index, cached):
+        row = table[row_index]
+        row.status = cached['status']
+        row.download_link = cached['download_link']
+        row.mirror_link = cached['mirror_link']
+        if cached['search_link'] or cached['status'] == '已处理': row.search_link = cached['search_link']
+        # HF API解析的结果带有文件大小和sha256
+        file_info = {column: cached[key] for column, key in (('文件大小', 'file_size'), ('SHA256', 'sha256')) if cached.get(key)}
+        if file_info: table.update(row_index, file_info)
+
+    def _store_search_result(self, search_cache, task, row):
+        source = self._get_search_source(task)
+        if search_cache and source:
+            if row.status != '已处理' and task.get('hf_api_error'):
+                return # HF API 暂时失败，不能确定文件不存在
+            # 未找到时搜索链接列保留的是Bing搜索链接，不需要缓存
+            search_link = row.search_link if row.status == '已处理' or 'liblib.art' in row.search_link else ''
+            search_cache.put(source, task['search_term_query'], row.status, row.download_link, row.mirror_link, search_link,
+                             file_size=row.file_size if row.status == '已处理' else '', sha256=row.sha256 if row.status == '已处理' else '')
+
+    def _get_batch_workers(self):
+        """Worker count for batch processing from settings; 0 / unset means one per CPU."""
+        workers = self.controller.get_loaded_batch_workers() if self.controller and hasattr(self.controller, 'get_loaded_batch_workers') else 0
+        try: workers = int(workers)
+        except (TypeError, ValueError): workers = 0
+        return workers if workers > 0 else (os.cpu_count() or 1)
+
+    def _scan_workflow_files(self, workflow_files, max_workers, use_processes):
+        """
+        Parses workflow files in parallel and yields (workflow_file, references, error) as they complete.
+        Falls back to a thread pool when a process pool cannot be used (e.g. restricted or frozen environments).
+        """
+        scan = partial(scan_workflow_file, config=self._extractor_config(), extractors=tuple(self.extractors))
+        if max_workers <= 1 or len(workflow_files) <= 1:
+            for wf_path in workflow_files: yield scan(wf_path)
+            return
+        if use_processes and len(workflow_files) >= self.PROCESS_POOL_MIN_FILES:
+            done = set()
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    chunksize = max(1, len(workflow_files) // (max_workers * 4))
+                    for result in executor.map(scan, workflow_files, chunksize=chunksize):
+                        done.add(result[0])
+                        yield result
+                return
+            except (OSError, BrokenProcessPool, PicklingError) as e:
+                logger.warning(f"Process pool unavailable ({e}), continuing batch with threads.")
+                workflow_files = [f for f in workflow_files if f not in done]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(scan, wf_path) for wf_path in workflow_files]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def batch_process_workflows(self, directory, file_pattern="*.json", progress_callback=None, max_workers=None, use_processes=True):
+        """
+        Processes all workflow files in a directory. 处理目录中的所有工作流文件。
+        Each file is parsed once in a worker pool (max_workers, default from settings); results are merged here
+        and all CSVs are written after the scan finishes.
+        """
         logger.info(f"Starting batch process for directory: {directory}, pattern: {file_pattern}")
         import glob
         patterns = file_pattern.split(';')
-        all_files = [f for p_item in patterns if p_item.strip() for f in glob.glob(os.path.join(directory, p_item.strip()))]
+        all_files = sorted({f for p_item in patterns if p_item.strip() for f in glob.glob(os.path.join(directory, p_item.strip())) if os.path.isfile(f)})
         if not all_files: logger.warning(f"No files found for patterns in {directory}"); return False
-        
-        workflow_files = []
-        for file_path in all_files:
+
+        # Index the models tree once for the whole batch
+        model_index = self._get_model_index()
+        if model_index: model_index.refresh()
+
+        max_workers = max_workers or self._get_batch_workers()
+        logger.info(f"Batch scanning {len(all_files)} files with {max_workers} worker(s)")
+        missing_by_workflow = {}
+        valid_count = 0
+        for i, (wf_path, references, error) in enumerate(self._scan_workflow_files(all_files, max_workers, use_processes)):
+            if progress_callback: progress_callback(i + 1, len(all_files))
+            if error is not None:
+                logger.debug(f"Skipping non-JSON or invalid JSON: {wf_path} ({error})")
+                continue
+            valid_count += 1
+            if references is None:
+                logger.error(f"Invalid workflow format in {wf_path}")
+                continue
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f: json.load(f)
-                workflow_files.append(file_path)
-            except: logger.debug(f"Skipping non-JSON or invalid JSON: {file_path}")
-        if not workflow_files: logger.info("No valid JSON workflows found."); return True
+                missing_in_wf = self._find_missing_in_references(references, os.path.dirname(os.path.abspath(wf_path)), model_index)
+                if missing_in_wf: missing_by_workflow[wf_path] = missing_in_wf
+            except Exception as e: logger.error(f"Error processing {wf_path} in batch", exc_info=True)
+        if not valid_count: logger.info("No valid JSON workflows found."); return True
 
         results_summary = []
         all_missing_dict = {}
-        for i, wf_path in enumerate(sorted(workflow_files)):
-            if progress_callback: progress_callback(i + 1, len(workflow_files))
-            logger.info(f"Batch processing ({i+1}/{len(workflow_files)}): {os.path.basename(wf_path)}")
-            try:
-                missing_in_wf = self.find_missing_models(wf_path)
-                if missing_in_wf:
-                    csv_path = self.create_csv_file(missing_in_wf, os.path.basename(wf_path))
-                    if csv_path:
-                        results_summary.append({'workflow': wf_path, 'csv': csv_path, 'missing_count': len(missing_in_wf)})
-                        for item in missing_in_wf: # item['file_path'] is original name
-                            if item['file_path'] not in all_missing_dict: all_missing_dict[item['file_path']] = item
-            except Exception as e: logger.error(f"Error processing {wf_path} in batch", exc_info=True)
+        for wf_path in sorted(missing_by_workflow):
+            missing_in_wf = missing_by_workflow[wf_path]
+            csv_path = self.create_csv_file(missing_in_wf, os.path.basename(wf_path))
+            if csv_path:
+                results_summary.append({'workflow': wf_path, 'csv': csv_path, 'missing_count': len(missing_in_wf)})
+                for item in missing_in_wf: # item['file_path'] is original name
+                    if item['file_path'] not in all_missing_dict: all_missing_dict[item['file_path']] = item
 
         summary_all_missing_path, batch_results_path = None, None
         if all_missing_dict:
@@ -20,6 +20,8 @@ from .settings_model import SettingsModel
 from .view import AppView
 from .utils import check_dependencies, find_chrome_path, get_mirror_link, create_html_view
 from .analysis_model import AnalysisModel
+from .search_journal import SearchSession
+from .result_table import ResultTable
 from .file_manager import cleanup_old_results, get_output_path, get_results_folder
 from .plugin_repair import PluginRepairModel  # 导入插件修复模型
 from . import __version__, __author__
@@ -38,6 +40,9 @@ class AppController:
         self.analysis_model = AnalysisModel(controller=self)
         # 初始化plugin_repair_model
         self.plugin_repair_model = PluginRepairModel()
+        # 模型移动器和模型记录在首次使用时才导入和创建 (见 model_mover / model_registry 属性)
+        self._model_mover = None
+        self._model_registry = None
 
         self.html_file_path = None
         self.batch_summary_file_path = None
@@ -47,10 +52,55 @@ class AppController:
         self._loaded_theme = "cosmo"
         self._loaded_chrome_path = ""
         self._loaded_retention_days = 30
+        self._loaded_models_root = ""
+        self._loaded_batch_workers = 0
+        self._loaded_search_workers = 4
+        self._loaded_search_backend = 'auto'
+        self._loaded_hf_api_base = 'https://huggingface.co'
+        self._loaded_report_page_size = 5000
+        self._loaded_registry_backend = 'sqlite'
 
         self.status_var = tk.StringVar(value="初始化...")
         logger.info("AppController initialized.")
 
+    MODEL_REGISTRY_FILENAME = "model_registry.json"
+    MODEL_REGISTRY_DB_FILENAME = "model_registry.db"
+
+    @property
+    def model_mover(self):
+        """模型移动器，首次打开相关标签页时才导入 (类型检测器随之在 set_paths 中加载)"""
+        if self._model_mover is None:
+            from .model_mover import ModelMover
+            self._model_mover = ModelMover()
+            if self._loaded_models_root and os.path.isdir(self._loaded_models_root):
+                self._model_mover.set_paths(self._loaded_models_root)
+        return self._model_mover
+
+    def _set_models_root(self, models_root):
+        """更新模型根目录设置；模型移动器已创建时同时切换到新目录"""
+        self._loaded_models_root = models_root
+        mover = self._model_mover
+        if mover is None or not models_root or not os.path.isdir(models_root):
+            return
+        if mover.comfyui_models_root != os.path.abspath(models_root):
+            mover.set_paths(models_root)
+
+    @property
+    def model_registry(self):
+        """模型记录，首次打开相关标签页时才导入和加载。默认使用SQLite，首次使用时导入原有的JSON记录"""
+        if self._model_registry is None:
+            json_path = os.path.join(os.path.dirname(__file__), self.MODEL_REGISTRY_FILENAME)
+            if self._loaded_registry_backend == 'json':
+                from .model_registry import ModelRegistry
+                self._model_registry = ModelRegistry()
+                self._model_registry.set_registry_file(json_path)
+            else:
+                from .model_registry_db import SQLiteModelRegistry
+                self._model_registry = SQLiteModelRegistry()
+                self._model_registry.set_registry_file(os.path.join(os.path.dirname(__file__), self.MODEL_REGISTRY_DB_FILENAME),
+                                                       legacy_json_path=json_path)
+        return self._model_registry
+
     def initialize(self):
         """Final setup after view and controller are created."""
         logger.debug("Controller initialize sequence started.")
@@ -75,6 +125,13 @@ class AppController:
     def get_loaded_theme_preference(self): return self._loaded_theme
     def get_loaded_chrome_path(self): return self._loaded_chrome_path
     def get_loaded_retention_days(self): return self._loaded_retention_days
+    def get_loaded_models_root(self): return self._loaded_models_root
+    def get_loaded_batch_workers(self): return self._loaded_batch_workers
+    def get_loaded_search_workers(self): return self._loaded_search_workers
+    def get_loaded_search_backend(self): return self._loaded_search_backend
+    def get_loaded_hf_api_base(self): return self._loaded_hf_api_base
+    def get_loaded_report_page_size(self): return self._loaded_report_page_size
+    def get_loaded_registry_backend(self): return self._loaded_registry_backend
     # --- Core Logic Methods ---
 
     def show_welcome_message(self):
@@ -129,6 +186,16 @@ class AppController:
         else:
             logger.debug("Chrome path selection cancelled.")
 
+    def browse_models_root(self):
+        logger.debug("Browse models root button clicked.")
+        dir_path = filedialog.askdirectory(title="选择ComfyUI模型目录 (ComfyUI/models)")
+        if dir_path:
+            logger.info(f"Models root selected: {dir_path}")
+            self.view.set_models_root(dir_path)
+            self._set_models_root(dir_path)
+        else:
+            logger.debug("Models root selection cancelled.")
+
     def analyze_and_search(self):
         logger.info("Analyze and Search button clicked.")
         workflow_file = self.view.get_workflow_path()
@@ -196,8 +263,16 @@ class AppController:
              self.root.after(0, self.view.show_error, "分析错误", f"分析文件时出错:\n{e}")
 
 
-    def search_links(self, csv_file):
-        logger.info(f"Search links initiated for: {csv_file}")
+    def resume_last_search(self):
+        """继续上次未完成的搜索会话"""
+        csv_file = SearchSession.last_session_csv()
+        if not csv_file:
+            self.view.show_info("提示", "没有可以继续的搜索")
+            return
+        self.search_links(csv_file, resume=True)
+
+    def search_links(self, csv_file, resume=False):
+        logger.info(f"Search links initiated for: {csv_file}{' (resume)' if resume else ''}")
         if not os.path.exists(csv_file):
              logger.error(f"Search cancelled: CSV file not found at {csv_file}")
              self.root.after(0, self.view.show_error, "错误", f"搜索失败：CSV文件不存在 {os.path.basename(csv_file)}")
@@ -214,8 +289,8 @@ class AppController:
 
             html_result = None
             try:
-                self.root.after(0, self.view.update_log, f"开始搜索模型链接: {os.path.basename(csv_file)}") # User message
-                html_result = self.analysis_model.search_model_links(csv_file, progress_callback=update_progress_callback)
+                self.root.after(0, self.view.update_log, f"{'继续' if resume else '开始'}搜索模型链接: {os.path.basename(csv_file)}") # User message
+                html_result = self.analysis_model.search_model_links(csv_file, progress_callback=update_progress_callback, resume=resume)
 
                 if isinstance(html_result, str) and os.path.exists(html_result):
                     self.html_file_path = html_result
@@ -358,10 +433,9 @@ class AppController:
 
                     # Update Treeview
                     try:
-                        import pandas as pd # Local import might be slightly cleaner for threads
-                        df_summary = pd.read_csv(processed_summary_csv, encoding='utf-8-sig')
+                        summary_table = ResultTable.read_csv(processed_summary_csv, required_columns=())
                         self.root.after(0, self.view.clear_batch_results)
-                        for _, row in df_summary.iterrows():
+                        for row in summary_table:
                              self.root.after(0, self.view.add_batch_result,
                                              row.get('工作流文件', ''), row.get('缺失数量', '0'), "已分析")
                     except Exception as e:
@@ -426,7 +500,7 @@ class AppController:
                   logger.info(f"CSV file found, attempting to generate HTML view for: {path_to_open}")
                   self.root.after(0, self.view.update_log, f"尝试为 {os.path.basename(path_to_open)} 生成HTML视图...") # User message
                   try:
-                      html_file = create_html_view(path_to_open) # Util function
+                      html_file = create_html_view(path_to_open, page_size=self.analysis_model.get_report_page_size()) # Util function
                       if html_file and os.path.exists(html_file):
                            logger.info(f"HTML view generated: {html_file}, opening...")
                            webbrowser.open(f"file:///{html_file}")
@@ -480,7 +554,14 @@ class AppController:
                 'random_theme': self.random_theme.get(),
                 
                 'theme': self.view.get_selected_theme(), # Saves the theme currently selected in the view's combobox.
-                'retention_days': retention_days_from_view
+                'retention_days': retention_days_from_view,
+                'models_root': self.view.get_models_root(),
+                'batch_workers': self._loaded_batch_workers,
+                'search_workers': self._loaded_search_workers,
+                'search_backend': self._loaded_search_backend,
+                'hf_api_base': self._loaded_hf_api_base,
+                'report_page_size': self._loaded_report_page_size,
+                'registry_backend': self._loaded_registry_backend
             }
             logger.debug(f"Data to be saved: {settings_to_save}")
 
@@ -488,6 +569,7 @@ class AppController:
             success = self.settings_model.save(settings_to_save)
 
             if success:
+                self._set_models_root(settings_to_save['models_root'])
                 self.root.after(0, self.view.show_info, "成功", "设置已保存")
                 self.root.after(0, self.view.update_log, "设置已保存。") # User message
             else:
@@ -513,6 +595,13 @@ class AppController:
         self._loaded_theme = loaded_settings.get('theme', 'cosmo')
         self._loaded_chrome_path = loaded_settings.get('chrome_path', '')
         self._loaded_retention_days = loaded_settings.get('retention_days', 30)
+        self._set_models_root(loaded_settings.get('models_root', ''))
+        self._loaded_batch_workers = loaded_settings.get('batch_workers', 0)
+        self._loaded_search_workers = loaded_settings.get('search_workers', 4)
+        self._loaded_search_backend = loaded_settings.get('search_backend', 'auto')
+        self._loaded_hf_api_base = loaded_settings.get('hf_api_base', 'https://huggingface.co')
+        self._loaded_report_page_size = loaded_settings.get('report_page_size', 5000)
+        self._loaded_registry_backend = loaded_settings.get('registry_backend', 'sqlite')
         logger.debug(f"Loaded settings values: AutoOpen={self.auto_open_html.get()}, RandomTheme={self.random_theme.get()}, Theme={self._loaded_theme}, Chrome='{self._loaded_chrome_path}', Days={self._loaded_retention_days}")
 
         if not self._loaded_chrome_path:
@@ -0,0 +1,184 @@
+"""
+Hugging Face 文件解析
+通过Hugging Face (或hf-mirror等兼容镜像) 的模型API按精确文件名查找模型文件，
+直接得到 resolve/main 下载链接以及文件大小和sha256，命中时不再需要搜索引擎。
+"""
+
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from .utils import import_optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HF_API_BASE = "https://huggingface.co"
+
+
+class HfApiError(Exception):
+    """API请求暂时失败 (网络错误、429限流、5xx等)，不能当作"未找到"。"""
+
+
+class HfResolver:
+    """
+    按文件名在Hugging Face上定位模型文件。
+    先用 /api/models?search= 找候选仓库，再用 /api/models/{repo}?blobs=true 列出仓库文件，
+    找到文件名完全一致(忽略大小写)的文件。仓库文件列表在实例内缓存，同一仓库只请求一次。
+    每个文件的请求数有上限；仓库名必须与文件名有共同的词，通用文件名 (model.safetensors 等) 不查找，
+    避免在下载量最大的无关仓库中"找到"同名文件。
+    """
+    SEARCH_LIMIT = 5        # 每个搜索词检查的候选仓库数
+    MAX_QUERIES = 3         # 每个文件最多尝试的搜索词数
+    MAX_REQUESTS = 6        # 每个文件最多发出的请求数 (搜索 + 未缓存的仓库文件列表)
+    # 出现在大量仓库中的通用文件名，按文件名无法确定是哪个模型
+    GENERIC_FILENAMES = frozenset({
+        'model.safetensors', 'model.bin', 'model.ckpt', 'model.pt', 'model.pth', 'model.onnx',
+        'pytorch_model.bin', 'diffusion_pytorch_model.safetensors', 'diffusion_pytorch_model.bin',
+        'adapter_model.safetensors', 'adapter_model.bin', 'pytorch_lora_weights.safetensors', 'pytorch_lora_weights.bin',
+        'ae.safetensors', 'vae.safetensors', 'unet.safetensors', 'text_encoder.safetensors', 'last.ckpt', 'final.ckpt',
+    })
+
+    def __init__(self, base_url: str = DEFAULT_HF_API_BASE, rate_limiter=None, workers: int = 4, timeout: float = 15):
+        """
+        初始化解析器
+
+        Args:
+            base_url: API地址，如 https://huggingface.co 或 https://hf-mirror.com，测试时可指向本地服务
+            rate_limiter: 可选的 search_engine.RateLimiter，与其他搜索共享按主机限速
+            workers: 批量解析时的并发数
+            timeout: 请求超时(秒)
+        """
+        requests = import_optional('requests') # 首次解析时才导入
+        if requests is None:
+            raise RuntimeError("requests is not installed")
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept': 'application/json', 'User-Agent': 'ModelFinder'})
+        self._repo_files = {}
+        self._lock = threading.Lock()
+
+    def _get_json(self, path: str, params: Dict = None):
+        url = f"{self.base_url}{path}"
+        if self.rate_limiter:
+            self.rate_limiter.wait(url)
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        except Exception as e:
+            raise HfApiError(f"请求失败: {e}") from e
+        if response.status_code in (401, 403, 404):
+            # 不存在或受限的仓库，按未找到处理
+            logger.debug(f"HF API {url} returned HTTP {response.status_code}")
+            return None
+        if response.status_code != 200:
+            raise HfApiError(f"HTTP {response.status_code}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise HfApiError(f"无效的响应: {e}") from e
+
+    @staticmethod
+    def _search_terms(filename: str) -> List[str]:
+        """由文件名生成仓库搜索词：主干名、去掉精度/版本后缀的名称等。"""
+        stem = os.path.splitext(filename)[0]
+        terms = [stem]
+        trimmed = re.sub(r'[-_.](fp16|fp32|bf16|fp8\w*|pruned|emaonly|ema|v\d+(\.\d+)*)$', '', stem, flags=re.I)
+        terms.append(trimmed)
+        terms.append(re.sub(r'[_\s]+', '-', trimmed))
+        seen, unique = set(), []
+        for term in terms:
+            key = term.lower()
+            if term and key not in seen:
+                seen.add(key)
+                unique.append(term)
+        return unique
+
+    @staticmethod
+    def _tokens(text: str) -> set:
+        """用于比较仓库名和文件名的词：按非字母数字拆分、小写，忽略纯数字和单个字符。"""
+        return {t for t in re.split(r'[^0-9a-z]+', text.lower()) if len(t) > 1 and not t.isdigit()}
+
+    def _cached_repo_files(self, repo_id: str) -> Optional[List[Dict]]:
+        with self._lock:
+            return self._repo_files.get(repo_id)
+
+    def _list_repo_files(self, repo_id: str) -> List[Dict]:
+        cached = self._cached_repo_files(repo_id)
+        if cached is not None:
+            return cached
+        info = self._get_json(f"/api/models/{quote(repo_id, safe='/')}", params={'blobs': 'true'})
+        files = (info or {}).get('siblings') or []
+        with self._lock:
+            self._repo_files[repo_id] = files
+        return files
+
+    def resolve(self, filename: str) -> Optional[Dict]:
+        """
+        查找单个文件
+
+        Args:
+            filename: 模型文件名 (如 sd_xl_base_1.0.safetensors)
+
+        Returns:
+            包含 repo, path, download_link, size, sha256 的字典，未找到返回None；
+            请求暂时失败 (网络、限流、5xx) 时返回 {"error": 错误信息}，调用方不应把它当作未找到缓存
+        """
+        filename = os.path.basename(filename.replace('\\', '/')).strip()
+        if not filename or not os.path.splitext(filename)[1]:
+            return None  # 没有扩展名时无法精确匹配文件
+        target = filename.lower()
+        if target in self.GENERIC_FILENAMES:
+            return None  # 通用文件名无法确定仓库
+        stem_tokens = self._tokens(os.path.splitext(filename)[0])
+        checked = set()
+        requests_left = self.MAX_REQUESTS
+        try:
+            for term in self._search_terms(filename)[:self.MAX_QUERIES]:
+                if requests_left <= 0:
+                    break
+                requests_left -= 1
+                repos = self._get_json("/api/models", params={'search': term, 'limit': self.SEARCH_LIMIT, 'sort': 'downloads'}) or []
+                if not repos and not checked:
+                    break  # 最完整的搜索词都没有结果，去掉后缀的搜索词也不会指向正确的仓库
+                for repo in repos:
+                    repo_id = repo.get('id') or repo.get('modelId')
+                    if not repo_id or repo_id in checked or not (stem_tokens & self._tokens(repo_id)):
+                        continue
+                    checked.add(repo_id)
+                    if self._cached_repo_files(repo_id) is None:
+                        if requests_left <= 0:
+                            break
+                        requests_left -= 1
+                    for sibling in self._list_repo_files(repo_id):
+                        path = sibling.get('rfilename', '')
+                        if os.path.basename(path).lower() == target:
+                            lfs = sibling.get('lfs') or {}
+                            return {
+                                'repo': repo_id,
+                                'path': path,
+                                'download_link': f"{self.base_url}/{repo_id}/resolve/main/{quote(path)}",
+                                'size': sibling.get('size') or lfs.get('size'),
+                                'sha256': lfs.get('sha256') or lfs.get('oid') or '',
+                            }
+        except HfApiError as e:
+            logger.warning(f"HF API lookup failed for '{filename}': {e}")
+            return {'error': str(e)}
+        return None
+
+    def resolve_many(self, filenames: List[str]) -> Dict[str, Optional[Dict]]:
+        """并发查找多个文件，返回 文件名 -> 结果 (None 或 {"error": ...}，见 resolve)。"""
+        unique = list(dict.fromkeys(filenames))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(zip(unique, executor.map(self.resolve, unique)))
+
+    def close(self):
+        self.session.close()
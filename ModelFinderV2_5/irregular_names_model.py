@@ -4,19 +4,40 @@ import json
 import logging
 import uuid # 用于生成唯一的ID，方便编辑和删除
 import re
+import fnmatch
+import heapq
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r'\s+')
+_TOKEN_SPLIT_RE = re.compile(r'[^0-9a-z\u4e00-\u9fff]+')
+_DIGITS_RE = re.compile(r'\d+')
+
 class IrregularNamesModel:
     """
     处理不规则模型名称与规范名称之间的映射。
     数据将存储在同目录下的 irregular_names_map.json 文件中。
     """
     MAPPINGS_FILENAME = "irregular_names_map.json"
+    # 原始名称以这些前缀开头时作为匹配规则: "glob:flux1-dev*.safetensors"、"re:(.+)_fp8\.safetensors"
+    GLOB_PREFIX = "glob:"
+    REGEX_PREFIX = "re:"
+    # 各种匹配方式的置信度
+    CONFIDENCE_EXACT = 1.0
+    CONFIDENCE_NORMALIZED = 0.99
+    CONFIDENCE_CASEFOLD = 0.98
+    CONFIDENCE_PATTERN = 0.95
+    # 模糊匹配要求名称中的数字完全相同：三元组相似度分不清版本号
+    FUZZY_MIN_SCORE = 0.9 # 低于此相似度的模糊匹配不返回
+    FUZZY_CANDIDATES = 20 # 按共同三元组数取前N个候选再计算相似度
+    FUZZY_COMMON_TRIGRAM_RATIO = 0.2 # 出现在超过此比例映射中的三元组不用于筛选候选
 
     def __init__(self):
         self._mappings_path = self._get_mappings_path()
         self.mappings = self._load_mappings() # 将映射加载到内存中
+        self.version = 0 # 每次映射变化后递增，供缓存了映射结果的调用方判断是否失效
+        self._rebuild_index()
         logger.info(f"不规则名称映射文件路径: {self._mappings_path}")
         logger.info(f"加载了 {len(self.mappings)} 条名称映射")
         # 日志记录所有加载的映射以便验证
@@ -66,6 +87,84 @@ class IrregularNamesModel:
             logger.error(f"写入映射文件 {self._mappings_path} 时出错。", exc_info=True)
             return False
 
+    def _rebuild_index(self):
+        """
+        根据 self.mappings 重建查找索引，在映射增删改后调用:
+        - 精确、标准化、不区分大小写三个字典
+        - glob:/re: 规则列表，按列表顺序匹配
+        - 模糊匹配用的三元组倒排索引
+        同一键有多条映射时保留列表中靠前的一条，与逐条比较时的匹配顺序一致。
+        """
+        exact, normalized, casefolded = {}, {}, {}
+        rules, fuzzy_entries, trigram_index = [], [], {}
+        for mapping in self.mappings:
+            original = mapping.get('original_name', '')
+            if not isinstance(original, str):
+                continue
+            corrected = mapping.get('corrected_name')
+            try:
+                rule = self._compile_rule(original)
+            except re.error as e:
+                logger.warning(f"忽略无效的名称匹配规则 '{original}': {e}")
+                continue
+            if rule is not None:
+                rules.append((rule, corrected))
+                continue
+            exact.setdefault(original, corrected)
+            normalized.setdefault(self._normalize_string(original), corrected)
+            casefolded.setdefault(original.casefold(), corrected)
+            trigrams = self._trigrams(self._fuzzy_key(original))
+            if trigrams:
+                entry_index = len(fuzzy_entries)
+                fuzzy_entries.append((trigrams, corrected, self._version_digits(original)))
+                for trigram in trigrams:
+                    trigram_index.setdefault(trigram, []).append(entry_index)
+        self._exact_index = exact
+        self._normalized_index = normalized
+        self._casefold_index = casefolded
+        self._rules = rules
+        self._fuzzy_entries = fuzzy_entries
+        self._trigram_index = trigram_index
+        self.version += 1
+
+    def _compile_rule(self, original_name):
+        """把 glob:/re: 开头的原始名称编译为正则表达式，普通名称返回None。无效的正则抛出 re.error。"""
+        if original_name.startswith(self.GLOB_PREFIX):
+            return re.compile(fnmatch.translate(original_name[len(self.GLOB_PREFIX):].strip()), re.IGNORECASE)
+        if original_name.startswith(self.REGEX_PREFIX):
+            return re.compile(original_name[len(self.REGEX_PREFIX):].strip())
+        return None
+
+    def _is_valid_rule(self, original_name):
+        try:
+            self._compile_rule(original_name)
+            return True
+        except re.error as e:
+            logger.warning(f"名称匹配规则无效 '{original_name}': {e}")
+            return False
+
+    @staticmethod
+    def _fuzzy_key(name):
+        """
+        模糊匹配用的键: 去掉扩展名、转小写，按分隔符拆成词后去重排序，
+        使词序和分隔符 (空格、_、-、.) 的差异不影响相似度。
+        """
+        stem = os.path.splitext(os.path.basename(name.replace('\\', '/')))[0].casefold()
+        return ' '.join(sorted({token for token in _TOKEN_SPLIT_RE.split(stem) if token}))
+
+    @staticmethod
+    def _version_digits(name):
+        """名称(不含扩展名)中的数字序列，例如 'flux1-dev-fp8-v3' -> ('1', '8', '3')。模糊匹配要求完全相同。"""
+        stem = os.path.splitext(os.path.basename(name.replace('\\', '/')))[0]
+        return tuple(digits.lstrip('0') or '0' for digits in _DIGITS_RE.findall(stem))
+
+    @staticmethod
+    def _trigrams(key):
+        if not key:
+            return frozenset()
+        padded = f"  {key} "
+        return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
     def get_all_mappings(self):
         """
         返回内存中所有映射的列表副本。
@@ -83,6 +182,8 @@ class IrregularNamesModel:
         if not original_name or not corrected_name:
             logger.warning("添加映射失败：原始名称和修正后名称不能为空。")
             return False
+        if not self._is_valid_rule(original_name):
+            return False
 
         # 检查原始名称是否已存在，避免重复（您可以根据需要调整此逻辑）
         for mapping in self.mappings:
@@ -97,6 +198,7 @@ class IrregularNamesModel:
             "notes": notes
         }
         self.mappings.append(new_mapping)
+        self._rebuild_index()
         logger.info(f"已添加新映射: ID={new_mapping['id']}, 原名='{original_name}', 修正名='{corrected_name}'")
         return self._save_mappings()
 
@@ -112,6 +214,8 @@ class IrregularNamesModel:
         if not new_original_name or not new_corrected_name:
             logger.warning("更新映射失败：原始名称和修正后名称不能为空。")
             return False
+        if not self._is_valid_rule(new_original_name):
+            return False
 
         for i, mapping in enumerate(self.mappings):
             if mapping.get('id') == mapping_id:
@@ -124,6 +228,7 @@ class IrregularNamesModel:
                 self.mappings[i]['original_name'] = new_original_name
                 self.mappings[i]['corrected_name'] = new_corrected_name
                 self.mappings[i]['notes'] = new_notes
+                self._rebuild_index()
                 logger.info(f"已更新映射: ID='{mapping_id}', 新原名='{new_original_name}', 新修正名='{new_corrected_name}'")
                 return self._save_mappings()
         logger.warning(f"更新映射失败：未找到ID为 '{mapping_id}' 的映射。")
@@ -138,6 +243,7 @@ class IrregularNamesModel:
         original_length = len(self.mappings)
         self.mappings = [m for m in self.mappings if m.get('id') != mapping_id]
         if len(self.mappings) < original_length:
+            self._rebuild_index()
             logger.info(f"已删除映射: ID='{mapping_id}'")
             return self._save_mappings()
         else:
@@ -153,58 +259,82 @@ class IrregularNamesModel:
         # 移除前后空格
         normalized = text.strip()
         # 将多个空格替换为单个空格
-        normalized = re.sub(r'\s+', ' ', normalized)
+        normalized = _WHITESPACE_RE.sub(' ', normalized)
         # 可选：转换为小写进行不区分大小写的比较
         # normalized = normalized.lower()
         return normalized
 
-    def get_corrected_name(self, name_to_check):
+    def get_corrected_name(self, name_to_check, with_confidence=False):
         """
         根据提供的原始名称查找对应的修正后名称。
-        如果找到匹配的 'original_name'，则返回其 'corrected_name'。
-        否则，返回原始的 'name_to_check'。
+        依次按精确、标准化(空格差异)、不区分大小写查找预先建立的索引，再按顺序尝试 glob:/re: 规则。
+        re: 规则的修正后名称可以用 \\1 引用分组。
+        with_confidence=True 时还会在以上都未命中时做模糊匹配 (见 suggest_corrected_names，数字必须相同)，
+        返回 (修正后名称, 置信度)，模糊匹配的置信度为相似度本身，由调用方决定是否应用；未找到映射时置信度为 0.0。
+        否则只返回修正后名称，不做模糊匹配；未找到映射时返回原始的 'name_to_check'。
         """
+        corrected, confidence = self._match(name_to_check)
+        if with_confidence and not confidence:
+            suggestions = self.suggest_corrected_names(name_to_check, limit=1)
+            if suggestions:
+                corrected, confidence = suggestions[0]
+        return (corrected, confidence) if with_confidence else corrected
+
+    def _match(self, name_to_check):
         if not name_to_check:
-            return name_to_check # 或者返回 None，取决于您的偏好
-        
-        # 记录查询
-        logger.debug(f"查询名称映射 (RAW): '{name_to_check}'")
-        
-        # 标准化输入字符串
-        normalized_input = self._normalize_string(name_to_check)
-        logger.debug(f"规范化后的查询名称: '{normalized_input}'")
-        
-        # 精确匹配优先
-        for mapping in self.mappings:
-            original = mapping.get('original_name', '')
-            if original == name_to_check:
-                corrected = mapping.get('corrected_name')
-                logger.info(f"精确匹配 '{name_to_check}' -> '{corrected}'")
-                return corrected
-        
-        # 标准化匹配（可能处理空格差异等）
-        for mapping in self.mappings:
-            original = mapping.get('original_name', '')
-            normalized_original = self._normalize_string(original)
-            
-            # 调试每一次比较
-            logger.debug(f"比较: 输入='{normalized_input}' vs 映射='{normalized_original}' (原始='{original}')")
-            
-            if normalized_original == normalized_input:
-                corrected = mapping.get('corrected_name')
-                logger.info(f"标准化匹配 '{normalized_input}' -> '{corrected}' (原始输入='{name_to_check}', 原始映射='{original}')")
-                return corrected
-            
-        # 不区分大小写匹配
-        for mapping in self.mappings:
-            original = mapping.get('original_name', '')
-            if original.lower() == name_to_check.lower():
-                corrected = mapping.get('corrected_name')
-                logger.info(f"不区分大小写匹配 '{name_to_check}' -> '{corrected}'")
-                return corrected
+            return name_to_check, 0.0
+
+        corrected = self._exact_index.get(name_to_check)
+        if corrected is not None:
+            return corrected, self.CONFIDENCE_EXACT
+
+        corrected = self._normalized_index.get(self._normalize_string(name_to_check))
+        if corrected is not None:
+            return corrected, self.CONFIDENCE_NORMALIZED
+
+        corrected = self._casefold_index.get(name_to_check.casefold())
+        if corrected is not None:
+            return corrected, self.CONFIDENCE_CASEFOLD
+
+        for pattern, corrected in self._rules:
+            match = pattern.fullmatch(name_to_check)
+            if match and corrected:
+                try:
+                    corrected = match.expand(corrected)
+                except (re.error, IndexError):
+                    pass # 修正后名称中的反斜杠不是分组引用，按原样使用
+                return corrected, self.CONFIDENCE_PATTERN
 
-        logger.debug(f"未找到 '{name_to_check}' 的映射，将使用原始名称。")
-        return name_to_check
+        return name_to_check, 0.0
+
+    def suggest_corrected_names(self, name_to_check, limit=3):
+        """
+        为没有映射的名称查找相似的已有映射。
+        通过三元组倒排索引找出共同三元组最多的候选，再计算 Dice 相似度；
+        名称中的数字 (版本号、精度等) 必须与候选完全相同，否则不同版本会被当成同一个模型。
+        出现在大量映射中的常见三元组不参与候选筛选，查找时间只与命中的倒排列表长度有关。
+        返回 [(修正后名称, 相似度), ...]，按相似度从高到低，只包含达到 FUZZY_MIN_SCORE 的候选。
+        """
+        trigrams = self._trigrams(self._fuzzy_key(name_to_check)) if name_to_check else frozenset()
+        if not trigrams or not self._fuzzy_entries:
+            return []
+        digits = self._version_digits(name_to_check)
+        common_limit = max(self.FUZZY_CANDIDATES, len(self._fuzzy_entries) * self.FUZZY_COMMON_TRIGRAM_RATIO)
+        shared = Counter()
+        for trigram in trigrams:
+            postings = self._trigram_index.get(trigram)
+            if postings and len(postings) <= common_limit:
+                shared.update(postings)
+        suggestions = {}
+        for entry_index in heapq.nlargest(self.FUZZY_CANDIDATES, shared, key=shared.__getitem__):
+            entry_trigrams, corrected, entry_digits = self._fuzzy_entries[entry_index]
+            if entry_digits != digits or not corrected:
+                continue
+            score = 2 * len(trigrams & entry_trigrams) / (len(trigrams) + len(entry_trigrams))
+            if score >= self.FUZZY_MIN_SCORE and score > suggestions.get(corrected, 0.0):
+                suggestions[corrected] = score
+        ranked = sorted(suggestions.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(corrected, round(score, 3)) for corrected, score in ranked]
 
     def find_mapping_by_id(self, mapping_id):
         """
@@ -0,0 +1,285 @@
+"""
+重复模型文件检测
+先按文件大小分组，再比较文件首尾各几MB的部分哈希，只有仍然相同的候选才完整计算sha256。
+哈希在线程池中以大块读取计算，并按 (路径, 大小, 修改时间) 缓存在模型索引中，未变化的文件不会重复读取。
+检测结果可以用硬链接或符号链接合并，释放重复占用的空间。
+"""
+
+import os
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_HASH_BYTES = 4 * 1024 * 1024  # 部分哈希读取文件开头和结尾各这么多字节
+READ_BUFFER_BYTES = 8 * 1024 * 1024
+DEFAULT_MIN_SIZE = 1024 * 1024  # 小于此大小的文件不检测
+DEFAULT_HASH_WORKERS = 4
+
+
+def partial_hash(path: str, size: int) -> Tuple[str, str]:
+    """
+    计算文件首尾各 PARTIAL_HASH_BYTES 字节的sha256 (包含文件大小)。
+    文件不超过两段长度时读取的就是全部内容，同时返回完整sha256，否则完整哈希为空字符串。
+
+    Returns:
+        (部分哈希, 完整sha256或空字符串)
+    """
+    with open(path, 'rb') as f:
+        if size <= 2 * PARTIAL_HASH_BYTES:
+            data = f.read()
+            return hashlib.sha256(size.to_bytes(8, 'little') + data).hexdigest(), hashlib.sha256(data).hexdigest()
+        digest = hashlib.sha256(size.to_bytes(8, 'little'))
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        return digest.hexdigest(), ''
+
+
+def full_hash(path: str) -> str:
+    """以大块读取流式计算文件的sha256。"""
+    digest = hashlib.sha256()
+    buffer = bytearray(READ_BUFFER_BYTES)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class ModelDeduper:
+    """
+    在模型索引覆盖的目录中查找内容相同的模型文件。
+    已经是同一文件的硬链接或符号链接 (相同的设备号和inode) 只计算一次，也不计入可释放空间。
+    """
+
+    def __init__(self, model_index, extensions: List[str] = None, min_size: int = DEFAULT_MIN_SIZE,
+                 max_workers: int = DEFAULT_HASH_WORKERS):
+        """
+        Args:
+            model_index: 已加载的 ModelIndex
+            extensions: 只检测这些扩展名的文件，为None则检测所有文件
+            min_size: 小于此大小的文件不检测
+            max_workers: 计算哈希的线程数
+        """
+        self.model_index = model_index
+        self.models_root = model_index.models_root
+        self.extensions = {ext.lower() for ext in extensions} if extensions else None
+        self.min_size = min_size
+        self.max_workers = max(1, max_workers)
+
+    def _abs(self, rel_path: str) -> str:
+        return os.path.join(self.models_root, rel_path)
+
+    def find_duplicates(self, progress_callback: Callable[[str], None] = None) -> Dict[str, Any]:
+        """
+        查找重复文件
+
+        Args:
+            progress_callback: 接收进度文字的回调
+
+        Returns:
+            报告字典：groups 为重复组列表 (按可释放空间从大到小)，每组包含 size、sha256、files (相对路径)、
+            mtimes、reclaimable；另有 duplicate_files、reclaimable_bytes、reclaimable_gb、hashed_bytes、cache_hits
+        """
+        start = time.time()
+        report = lambda message: progress_callback(message) if progress_callback else None
+        self.model_index.ensure_loaded()
+
+        # 1. 按大小分组
+        by_size = {}
+        for rel_path, size, mtime in self.model_index.iter_files():
+            if size is None or size < self.min_size:
+                continue
+            if self.extensions is not None and os.path.splitext(rel_path)[1].lower() not in self.extensions:
+                continue
+            by_size.setdefault(size, []).append((rel_path, mtime))
+
+        # 索引可能没有刷新：按实际的大小和修改时间重新分组，与索引不一致的文件更新索引，使缓存的哈希失效
+        inode_of, representatives, candidates, stale = {}, {}, {}, 0
+        for size, files in by_size.items():
+            if len(files) < 2:
+                continue
+            for rel_path, mtime in files:
+                try:
+                    st = os.stat(self._abs(rel_path))
+                except OSError as e:
+                    logger.warning(f"无法读取文件信息，跳过: {rel_path}, 错误: {e}")
+                    continue
+                if st.st_size != size or st.st_mtime != mtime:
+                    self.model_index.add_file(rel_path)
+                    stale += 1
+                if st.st_size < self.min_size:
+                    continue
+                inode_of[rel_path] = (st.st_dev, st.st_ino) if st.st_ino else rel_path
+                candidates.setdefault(st.st_size, []).append((rel_path, st.st_mtime))
+        if stale:
+            logger.info(f"模型索引中有 {stale} 个文件已变化，已按实际文件信息更新")
+            self.model_index.save()
+        candidates = {size: files for size, files in candidates.items() if len(files) > 1}
+        inode_of = {rel_path: inode_of[rel_path] for files in candidates.values() for rel_path, _ in files}
+        for rel_path in sorted(inode_of):  # 固定选择路径最小的一个，使缓存的哈希在每次检测中都能命中
+            representatives.setdefault(inode_of[rel_path], rel_path)
+        mtimes = {rel_path: mtime for files in candidates.values() for rel_path, mtime in files}
+        size_of = {rel_path: size for size, files in candidates.items() for rel_path, _ in files}
+        to_hash = [rel_path for size, files in candidates.items()
+                   if len({inode_of[p] for p, _ in files if p in inode_of}) > 1
+                   for rel_path, _ in files if rel_path in inode_of and representatives[inode_of[rel_path]] == rel_path]
+        report(f"大小相同的候选文件: {len(to_hash)} 个")
+
+        cached = self.model_index.get_cached_hashes(to_hash)
+        hashes = {p: dict(cached[p]) for p in to_hash if p in cached}
+        cache_hits = len(hashes)
+        hashed_bytes = 0
+        new_entries = {}
+
+        # 2. 部分哈希
+        need_partial = [p for p in to_hash if not hashes.get(p, {}).get('partial')]
+        if need_partial:
+            report(f"计算部分哈希: {len(need_partial)} 个文件")
+            for rel_path, result in self._hash_all(need_partial, lambda p: partial_hash(self._abs(p), size_of[p])):
+                partial, sha256 = result
+                hashes[rel_path] = {'partial': partial, 'sha256': sha256}
+                new_entries[rel_path] = hashes[rel_path]
+                hashed_bytes += min(size_of[rel_path], 2 * PARTIAL_HASH_BYTES)
+
+        by_partial = {}
+        for rel_path in to_hash:
+            if rel_path in hashes:
+                by_partial.setdefault((size_of[rel_path], hashes[rel_path]['partial']), []).append(rel_path)
+        full_candidates = [p for files in by_partial.values() if len(files) > 1 for p in files]
+
+        # 3. 完整sha256
+        need_full = [p for p in full_candidates if not hashes[p].get('sha256')]
+        if need_full:
+            report(f"计算完整哈希: {len(need_full)} 个文件, {sum(size_of[p] for p in need_full) / 1024 ** 3:.2f} GB")
+            for rel_path, sha256 in self._hash_all(need_full, lambda p: full_hash(self._abs(p))):
+                hashes[rel_path]['sha256'] = sha256
+                new_entries[rel_path] = hashes[rel_path]
+                hashed_bytes += size_of[rel_path]
+
+        self.model_index.store_hashes([(p, size_of[p], mtimes[p], h['partial'], h['sha256']) for p, h in new_entries.items()])
+
+        # 4. 按sha256分组，把同一inode的其他路径加回组内
+        linked = {}
+        for rel_path, key in inode_of.items():
+            if representatives[key] != rel_path:
+                linked.setdefault(representatives[key], []).append(rel_path)
+        by_sha = {}
+        for rel_path in full_candidates:
+            sha256 = hashes[rel_path].get('sha256')
+            if sha256:
+                by_sha.setdefault((size_of[rel_path], sha256), []).append(rel_path)
+        groups = []
+        for (size, sha256), files in by_sha.items():
+            if len(files) < 2:
+                continue
+            all_files = sorted(files + [p for f in files for p in linked.get(f, [])])
+            groups.append({
+                'size': size,
+                'sha256': sha256,
+                'files': all_files,
+                'mtimes': {p: mtimes[p] for p in all_files},
+                'reclaimable': size * (len(files) - 1),
+            })
+        groups.sort(key=lambda g: g['reclaimable'], reverse=True)
+
+        reclaimable = sum(g['reclaimable'] for g in groups)
+        logger.info(f"重复文件检测完成: {len(groups)} 组, 可释放 {reclaimable / 1024 ** 3:.2f} GB, "
+                    f"读取 {hashed_bytes / 1024 ** 3:.2f} GB, 缓存命中 {cache_hits}, 耗时 {time.time() - start:.1f}s")
+        return {
+            'groups': groups,
+            'duplicate_files': sum(len(g['files']) - 1 for g in groups),
+            'reclaimable_bytes': reclaimable,
+            'reclaimable_gb': round(reclaimable / 1024 ** 3, 2),
+            'hashed_bytes': hashed_bytes,
+            'cache_hits': cache_hits,
+        }
+
+    def _hash_all(self, rel_paths: List[str], hash_fn: Callable[[str], Any]):
+        """在线程池中计算哈希，逐个产出 (相对路径, 结果)，读取失败的文件跳过。"""
+        def run(rel_path):
+            try:
+                return rel_path, hash_fn(rel_path)
+            except OSError as e:
+                logger.warning(f"读取文件失败，跳过: {rel_path}, 错误: {e}")
+                return rel_path, None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for rel_path, result in executor.map(run, rel_paths):
+                if result is not None:
+                    yield rel_path, result
+
+    def _verify_content(self, rel_path: str, group: Dict[str, Any]) -> bool:
+        """重新读取文件，确认内容与重复组的sha256相同。"""
+        return full_hash(self._abs(rel_path)) == group['sha256']
+
+    def consolidate(self, group: Dict[str, Any], keep: str = None, mode: str = 'hardlink') -> List[Dict[str, Any]]:
+        """
+        用链接替换一组重复文件中除保留文件外的其他文件。
+        保留文件和每个被替换的文件在替换前都会核对大小、修改时间并重新计算sha256，
+        与检测结果不一致时不替换 (保留文件不一致时整组都不处理)。
+
+        Args:
+            group: find_duplicates 报告中的一个重复组
+            keep: 保留的相对路径，默认为组内第一个文件
+            mode: 'hardlink' (需在同一文件系统) 或 'symlink'
+
+        Returns:
+            每个被替换文件的结果 {"path", "success", "message"}
+        """
+        if mode not in ('hardlink', 'symlink'):
+            raise ValueError(f"不支持的合并方式: {mode}")
+        keep = keep or group['files'][0]
+        if keep not in group['files']:
+            raise ValueError(f"保留文件不在重复组中: {keep}")
+        keep_abs = self._abs(keep)
+        results = []
+        try:
+            keep_st = os.stat(keep_abs)
+            if keep_st.st_size != group['size'] or keep_st.st_mtime != group['mtimes'][keep]:
+                return [{'path': keep, 'success': False, 'message': "保留文件在检测后被修改，整组未处理"}]
+            if not self._verify_content(keep, group):
+                return [{'path': keep, 'success': False, 'message': "保留文件内容与检测结果不一致，整组未处理"}]
+        except OSError as e:
+            return [{'path': keep, 'success': False, 'message': f"保留文件不可访问: {e}"}]
+
+        for rel_path in group['files']:
+            if rel_path == keep:
+                continue
+            path = self._abs(rel_path)
+            try:
+                st = os.stat(path)
+                if (st.st_dev, st.st_ino) == (keep_st.st_dev, keep_st.st_ino):
+                    results.append({'path': rel_path, 'success': True, 'message': "已经指向保留文件"})
+                    continue
+                # 检测之后文件被修改过则不替换
+                if st.st_size != group['size'] or st.st_mtime != group['mtimes'][rel_path]:
+                    results.append({'path': rel_path, 'success': False, 'message': "文件在检测后被修改，未替换"})
+                    continue
+                if not self._verify_content(rel_path, group):
+                    results.append({'path': rel_path, 'success': False, 'message': "文件内容与保留文件不同，未替换"})
+                    continue
+                tmp_path = f"{path}.dedupe-{os.getpid()}.tmp"
+                if mode == 'hardlink':
+                    os.link(keep_abs, tmp_path)
+                else:
+                    os.symlink(os.path.relpath(keep_abs, os.path.dirname(path)), tmp_path)
+                try:
+                    os.replace(tmp_path, path)
+                except OSError:
+                    os.remove(tmp_path)
+                    raise
+                self.model_index.add_file(path)
+                results.append({'path': rel_path, 'success': True, 'message': f"已替换为{'硬链接' if mode == 'hardlink' else '符号链接'}"})
+                logger.info(f"合并重复文件: {rel_path} -> {keep} ({mode})")
+            except OSError as e:
+                logger.error(f"合并重复文件失败: {rel_path}, 错误: {e}")
+                results.append({'path': rel_path, 'success': False, 'message': str(e)})
+        self.model_index.save()
+        return results
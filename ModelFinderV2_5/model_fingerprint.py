@@ -0,0 +1,205 @@
+"""
+模型记录的文件指纹
+每条模型记录可保存 (大小, 修改时间, 快速哈希) 指纹，快速哈希与重复文件检测的部分哈希相同 (文件首尾各几MB)。
+指纹在需要时才计算：大小和修改时间未变的文件不会重新读取，已在模型索引哈希缓存中的文件也不会重新读取。
+reconcile_registry 对模型目录只做一次扫描，按指纹把已移动或重命名的文件重新关联到原有记录。
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+from .model_dedupe import partial_hash
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FIELD = 'fingerprint'
+
+
+def compute_fingerprint(path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取文件并计算指纹
+
+    Returns:
+        {"size", "mtime", "quick_hash"}，文件不可读时返回None
+    """
+    try:
+        st = os.stat(path)
+        quick_hash, _ = partial_hash(path, st.st_size)
+    except OSError as e:
+        logger.warning(f"计算文件指纹失败: {path}, 错误: {e}")
+        return None
+    return {'size': st.st_size, 'mtime': st.st_mtime, 'quick_hash': quick_hash}
+
+
+def fingerprint_is_current(fingerprint: Optional[Dict[str, Any]], size: int, mtime: float) -> bool:
+    """已保存的指纹是否仍然对应大小和修改时间为 (size, mtime) 的文件。"""
+    return bool(fingerprint and fingerprint.get('quick_hash')
+                and fingerprint.get('size') == size and fingerprint.get('mtime') == mtime)
+
+
+def get_fingerprint(registry, model_id: str) -> Optional[Dict[str, Any]]:
+    """
+    获取一条记录的指纹，没有或已过期 (大小或修改时间变化) 时重新计算并保存
+
+    Args:
+        registry: ModelRegistry 或 SQLiteModelRegistry
+        model_id: 模型ID
+
+    Returns:
+        指纹字典，记录不存在或文件不可读时返回None
+    """
+    model_data = registry.get_model(model_id)
+    if not model_data or not model_data.get('path'):
+        return None
+    fingerprint = model_data.get(FINGERPRINT_FIELD)
+    try:
+        st = os.stat(model_data['path'])
+    except OSError:
+        return None
+    if fingerprint_is_current(fingerprint, st.st_size, st.st_mtime):
+        return fingerprint
+    fingerprint = compute_fingerprint(model_data['path'])
+    if fingerprint:
+        registry.set_fingerprints({str(model_id): fingerprint})
+    return fingerprint
+
+
+def _quick_hashes(index, rel_paths: List[str], sizes: Dict[str, int], mtimes: Dict[str, float]) -> Dict[str, str]:
+    """读取模型索引中缓存的快速哈希，缺少的才读取文件计算，并写回缓存。"""
+    cached = index.get_cached_hashes(rel_paths)
+    hashes = {p: cached[p]['partial'] for p in rel_paths if p in cached and cached[p]['partial']}
+    new_entries = []
+    for rel_path in rel_paths:
+        if rel_path in hashes:
+            continue
+        try:
+            partial, sha256 = partial_hash(os.path.join(index.models_root, rel_path), sizes[rel_path])
+        except OSError as e:
+            logger.warning(f"计算文件指纹失败: {rel_path}, 错误: {e}")
+            continue
+        hashes[rel_path] = partial
+        new_entries.append((rel_path, sizes[rel_path], mtimes[rel_path], partial, sha256))
+    index.store_hashes(new_entries)
+    return hashes
+
+
+def reconcile_registry(registry, models_root: str) -> Dict[str, Any]:
+    """
+    用一次模型目录扫描 (增量刷新的模型索引) 检查所有记录的文件：
+    仍存在的记录补全或更新指纹；文件已不存在但有指纹的记录，在未被任何记录引用的文件中
+    按 (大小, 快速哈希) 查找，唯一匹配时把记录的路径改为新位置 (名称等于原文件名时同时更新名称)。
+    不在模型目录中的记录仍逐个检查文件是否存在。
+
+    Args:
+        registry: ModelRegistry 或 SQLiteModelRegistry
+        models_root: ComfyUI模型根目录
+
+    Returns:
+        {"checked", "fingerprinted", "relinked": [{"id", "name", "old_path", "new_path"}],
+         "missing": [{"id", "name", "path"}], "ambiguous": [{"id", "name", "path", "candidates"}]}
+    """
+    from .model_index import get_model_index
+
+    index = get_model_index(models_root)
+    if index is None:
+        return {"error": f"模型目录不存在: {models_root}"}
+    index.refresh()
+    root = index.models_root
+    norm_root = os.path.normcase(root) + os.sep
+
+    sizes, mtimes, by_norm = {}, {}, {}
+    for rel_path, size, mtime in index.iter_files():
+        sizes[rel_path], mtimes[rel_path] = size, mtime
+        by_norm[os.path.normcase(os.path.join(root, rel_path))] = rel_path
+
+    models = registry.get_all_models()
+    present, missing, referenced = [], [], set()
+    for model in models:
+        path = model.get('path')
+        if not path:
+            continue
+        norm = os.path.normcase(os.path.abspath(path))
+        if norm.startswith(norm_root):
+            rel_path = by_norm.get(norm)
+        else:
+            rel_path = None
+            if os.path.exists(path):
+                present.append((model, None))
+                continue
+        if rel_path is not None:
+            referenced.add(rel_path)
+            present.append((model, rel_path))
+        else:
+            missing.append(model)
+
+    # 仍存在的记录：只为没有指纹或大小、修改时间变化的文件计算
+    stale = [(model, rel_path) for model, rel_path in present
+             if rel_path is None or not fingerprint_is_current(model.get(FINGERPRINT_FIELD), sizes[rel_path], mtimes[rel_path])]
+    stale_rel = [rel_path for _, rel_path in stale if rel_path is not None]
+    hashes = _quick_hashes(index, stale_rel, sizes, mtimes) if stale_rel else {}
+    fingerprints = {}
+    for model, rel_path in stale:
+        if rel_path is None:
+            # 模型目录之外的文件需要stat才能判断是否变化
+            fingerprint = model.get(FINGERPRINT_FIELD)
+            try:
+                st = os.stat(model['path'])
+            except OSError:
+                continue
+            if not fingerprint_is_current(fingerprint, st.st_size, st.st_mtime):
+                fingerprint = compute_fingerprint(model['path'])
+                if fingerprint:
+                    fingerprints[model['id']] = fingerprint
+        elif rel_path in hashes:
+            fingerprints[model['id']] = {'size': sizes[rel_path], 'mtime': mtimes[rel_path], 'quick_hash': hashes[rel_path]}
+
+    # 丢失的记录：在未被引用、大小相同的文件中按快速哈希查找
+    wanted_sizes = {m[FINGERPRINT_FIELD]['size'] for m in missing if (m.get(FINGERPRINT_FIELD) or {}).get('quick_hash')}
+    candidates = [p for p, size in sizes.items() if size in wanted_sizes and p not in referenced]
+    candidate_hashes = _quick_hashes(index, candidates, sizes, mtimes) if candidates else {}
+    by_key = {}
+    for rel_path, quick_hash in candidate_hashes.items():
+        by_key.setdefault((sizes[rel_path], quick_hash), []).append(rel_path)
+
+    relinked, still_missing, ambiguous, updates, claimed = [], [], [], {}, set()
+    for model in missing:
+        fingerprint = model.get(FINGERPRINT_FIELD) or {}
+        matches = [p for p in by_key.get((fingerprint.get('size'), fingerprint.get('quick_hash')), []) if p not in claimed]
+        if len(matches) > 1:
+            # 同一内容有多个副本时优先选文件名相同的
+            same_name = [p for p in matches if os.path.basename(p) == os.path.basename(model['path'])]
+            matches = same_name if same_name else matches
+        if not matches:
+            still_missing.append({'id': model['id'], 'name': model.get('name'), 'path': model['path']})
+            continue
+        if len(matches) > 1:
+            ambiguous.append({'id': model['id'], 'name': model.get('name'), 'path': model['path'],
+                              'candidates': [os.path.join(root, p) for p in matches]})
+            continue
+        rel_path = matches[0]
+        claimed.add(rel_path)
+        new_path = os.path.join(root, rel_path)
+        model_data = {k: v for k, v in model.items() if k != 'id'}
+        if model_data.get('name') == os.path.basename(model['path']):
+            model_data['name'] = os.path.basename(new_path)
+        model_data['path'] = new_path
+        model_data[FINGERPRINT_FIELD] = {'size': sizes[rel_path], 'mtime': mtimes[rel_path], 'quick_hash': candidate_hashes[rel_path]}
+        updates[model['id']] = model_data
+        relinked.append({'id': model['id'], 'name': model_data.get('name'), 'old_path': model['path'], 'new_path': new_path})
+
+    with registry.batch():
+        if fingerprints:
+            registry.set_fingerprints(fingerprints)
+        if updates:
+            registry.bulk_update(updates)
+
+    logger.info(f"模型记录核对完成: 检查 {len(models)} 条, 计算指纹 {len(fingerprints)} 条, 重新关联 {len(relinked)} 条, "
+                f"丢失 {len(still_missing)} 条, 无法确定 {len(ambiguous)} 条")
+    return {
+        'checked': len(models),
+        'fingerprinted': len(fingerprints),
+        'relinked': relinked,
+        'missing': still_missing,
+        'ambiguous': ambiguous,
+    }
@@ -0,0 +1,520 @@
+"""
+模型文件索引
+对ComfyUI模型目录建立按文件名查找的索引，保存在SQLite文件中并按目录修改时间增量刷新，
+供缺失模型检测、模型移动器和模型类型检测器共享使用。
+同一数据库中还缓存文件的内容哈希，按 (路径, 大小, 修改时间) 判断是否有效。
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ModelIndex:
+    """
+    ComfyUI模型目录的文件名索引。
+    以文件名、小写文件名和小写主干名(不含扩展名)为键，查找为O(1)。
+    索引保存在SQLite文件中，并记录每个目录的修改时间：刷新时只重新列出
+    修改时间发生变化的目录，未变化的目录只需一次stat调用。
+    """
+    INDEX_FILENAME = "model_index-{root_hash}.db"  # 每个模型根目录一个索引文件
+
+    def __init__(self, models_root: str, index_path: str = None):
+        """
+        初始化模型索引
+
+        Args:
+            models_root: ComfyUI模型根目录，通常是ComfyUI/models
+            index_path: 索引文件路径，为None则按模型根目录命名，保存在model_config.json同目录下
+        """
+        self.models_root = os.path.abspath(models_root)
+        self._index_path = index_path or self._get_index_path()
+        self._lock = threading.RLock()
+        self.files = {}  # 相对路径 -> [大小, 修改时间]
+        self.dirs = {}   # 相对目录("" 为根目录) -> {"mtime": ..., "subdirs": [...], "files": [...]}
+        self._by_name = {}
+        self._by_lower = {}
+        self._by_stem = {}
+        self._dirty_dirs = set()    # 需要写回数据库的目录
+        self._removed_dirs = set()  # 需要从数据库删除的目录子树
+        self._needs_reset = False
+        self.built_time = None
+        self._loaded = False
+
+    def _get_index_path(self) -> str:
+        """
+        确定索引文件的绝对路径。文件名包含规范化模型根目录的哈希，
+        不同根目录的索引互不覆盖，同时使用多个根目录时不会反复全量重建。
+        """
+        root_hash = hashlib.sha1(os.path.normcase(self.models_root).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), self.INDEX_FILENAME.format(root_hash=root_hash))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._index_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT NOT NULL, size INTEGER, mtime REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir)")
+        conn.execute("CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, partial TEXT, sha256 TEXT)")
+        return conn
+
+    # ---------- 构建与持久化 ----------
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        刷新索引。默认增量刷新：只重新列出修改时间变化的目录，
+        未变化的目录沿用已保存的内容并继续检查其子目录。
+        注意：原地覆盖写入文件不会改变目录的修改时间，需要时可使用 full=True。
+
+        Args:
+            full: 是否丢弃已有索引并完整遍历
+
+        Returns:
+            索引中的文件数量
+        """
+        if not os.path.isdir(self.models_root):
+            logger.error(f"模型目录不存在，无法建立索引: {self.models_root}")
+            return 0
+
+        start = time.time()
+        with self._lock:
+            if full:
+                self._reset()
+            elif not self._loaded:
+                self.load()
+
+            visited = set()
+            scanned, rescanned = 0, 0
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                abs_dir = os.path.join(self.models_root, rel_dir) if rel_dir else self.models_root
+                try:
+                    st = os.stat(abs_dir)
+                except OSError as e:
+                    logger.warning(f"目录不可访问，已从索引移除: {abs_dir}, 错误: {e}")
+                    self.remove_directory(rel_dir)
+                    continue
+                dir_key = (st.st_dev, st.st_ino) if st.st_ino else os.path.realpath(abs_dir)
+                if dir_key in visited:
+                    continue  # 防止符号链接造成循环
+                visited.add(dir_key)
+                scanned += 1
+
+                known = self.dirs.get(rel_dir)
+                if known is not None and known.get("mtime") == st.st_mtime:
+                    subdirs = known["subdirs"]
+                else:
+                    subdirs = self._rescan_directory(rel_dir, abs_dir, st.st_mtime)
+                    rescanned += 1
+                for name in subdirs:
+                    stack.append(os.path.join(rel_dir, name) if rel_dir else name)
+
+            self.built_time = time.time()
+            self._loaded = True
+
+        logger.info(f"已刷新模型索引 {self.models_root}: {len(self.files)} 个文件, 检查 {scanned} 个目录, "
+                    f"重新扫描 {rescanned} 个, 耗时 {time.time() - start:.2f}s")
+        self.save()
+        return len(self.files)
+
+    def _rescan_directory(self, rel_dir: str, abs_dir: str, mtime: float) -> List[str]:
+        """重新列出一个目录，更新其中的文件和子目录，返回子目录名列表。"""
+        subdirs, names = [], {}
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            names[entry.name] = [st.st_size, st.st_mtime]
+                    except OSError as e:
+                        logger.warning(f"读取目录项失败: {entry.path}, 错误: {e}")
+        except OSError as e:
+            logger.warning(f"扫描目录失败: {abs_dir}, 错误: {e}")
+            return []
+
+        old = self.dirs.get(rel_dir, {"subdirs": [], "files": []})
+        for name in set(old["subdirs"]) - set(subdirs):
+            self.remove_directory(os.path.join(rel_dir, name) if rel_dir else name)
+        for name in set(old["files"]) - set(names):
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+            if self.files.pop(rel_path, None) is not None:
+                self._remove_lookup(rel_path)
+        for name, stat_info in names.items():
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+            if rel_path not in self.files:
+                self._add_lookup(rel_path)
+            self.files[rel_path] = stat_info
+
+        self.dirs[rel_dir] = {"mtime": mtime, "subdirs": sorted(subdirs), "files": sorted(names)}
+        self._dirty_dirs.add(rel_dir)
+        return subdirs
+
+    def _reset(self):
+        """清空内存中的索引，并在下次保存时清空数据库。"""
+        self.files, self.dirs = {}, {}
+        self._by_name, self._by_lower, self._by_stem = {}, {}, {}
+        self._dirty_dirs, self._removed_dirs = set(), set()
+        self._needs_reset = True
+
+    def load(self) -> bool:
+        """
+        从索引文件加载数据
+
+        Returns:
+            加载是否成功（索引文件不存在或对应其他模型目录时返回False）
+        """
+        if not os.path.exists(self._index_path):
+            return False
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'models_root'").fetchone()
+                if not row or os.path.normcase(row[0]) != os.path.normcase(self.models_root):
+                    logger.info(f"索引文件对应其他模型目录，需要重建: {row[0] if row else None}")
+                    with self._lock:
+                        self._reset()
+                    return False
+                built = conn.execute("SELECT value FROM meta WHERE key = 'built_time'").fetchone()
+                dir_rows = conn.execute("SELECT path, mtime FROM dirs").fetchall()
+                file_rows = conn.execute("SELECT path, dir, size, mtime FROM files").fetchall()
+            finally:
+                conn.close()
+
+            dirs = {path: {"mtime": mtime, "subdirs": [], "files": []} for path, mtime in dir_rows}
+            for path in dirs:
+                if path:
+                    parent, name = os.path.split(path)
+                    if parent in dirs:
+                        dirs[parent]["subdirs"].append(name)
+            files = {}
+            for path, rel_dir, size, mtime in file_rows:
+                files[path] = [size, mtime]
+                if rel_dir in dirs:
+                    dirs[rel_dir]["files"].append(os.path.basename(path))
+
+            with self._lock:
+                self.files = files
+                self.dirs = dirs
+                self.built_time = float(built[0]) if built else None
+                self._rebuild_lookup()
+                self._dirty_dirs, self._removed_dirs = set(), set()
+                self._needs_reset = False
+                self._loaded = True
+            logger.info(f"已从 {self._index_path} 加载模型索引: {len(self.files)} 个文件, {len(self.dirs)} 个目录")
+            return True
+        except Exception as e:
+            logger.error(f"加载模型索引失败: {e}")
+            return False
+
+    def save(self) -> bool:
+        """
+        将自上次保存以来变化的目录写回索引文件
+
+        Returns:
+            保存是否成功
+        """
+        try:
+            with self._lock:
+                reset = self._needs_reset
+                removed = sorted(self._removed_dirs)
+                dirty = [(d, self.dirs[d].get("mtime"), list(self.dirs[d]["files"]))
+                         for d in self._dirty_dirs if d in self.dirs]
+                file_stats = {d: [self.files.get(os.path.join(d, n) if d else n) for n in names] for d, _, names in dirty}
+                self._dirty_dirs, self._removed_dirs = set(), set()
+                self._needs_reset = False
+
+            conn = self._connect()
+            try:
+                with conn:
+                    if reset:
+                        conn.execute("DELETE FROM dirs")
+                        conn.execute("DELETE FROM files")
+                        previous_root = conn.execute("SELECT value FROM meta WHERE key = 'models_root'").fetchone()
+                        if not previous_root or os.path.normcase(previous_root[0]) != os.path.normcase(self.models_root):
+                            conn.execute("DELETE FROM hashes")  # 哈希缓存属于之前的模型目录
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('models_root', ?)", (self.models_root,))
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built_time', ?)", (str(self.built_time or time.time()),))
+                    for rel_dir in removed:
+                        prefix = rel_dir + os.sep
+                        conn.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?", (rel_dir, len(prefix), prefix))
+                        conn.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (rel_dir, len(prefix), prefix))
+                    for rel_dir, mtime, names in dirty:
+                        conn.execute("INSERT OR REPLACE INTO dirs (path, mtime) VALUES (?, ?)", (rel_dir, mtime))
+                        conn.execute("DELETE FROM files WHERE dir = ?", (rel_dir,))
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO files (path, dir, size, mtime) VALUES (?, ?, ?, ?)",
+                            [(os.path.join(rel_dir, n) if rel_dir else n, rel_dir, st[0], st[1])
+                             for n, st in zip(names, file_stats[rel_dir]) if st is not None]
+                        )
+            finally:
+                conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"保存模型索引失败: {e}")
+            return False
+
+    def ensure_loaded(self) -> bool:
+        """确保索引可用：优先加载已保存的索引，否则完整遍历一次。"""
+        if self._loaded:
+            return True
+        if self.load():
+            return True
+        self.refresh()
+        return self._loaded
+
+    def _rebuild_lookup(self):
+        """根据文件列表重建三个查找字典。"""
+        self._by_name, self._by_lower, self._by_stem = {}, {}, {}
+        for rel_path in self.files:
+            self._add_lookup(rel_path)
+
+    def _add_lookup(self, rel_path: str):
+        name = os.path.basename(rel_path)
+        lower = name.lower()
+        stem = os.path.splitext(lower)[0]
+        self._by_name.setdefault(name, []).append(rel_path)
+        self._by_lower.setdefault(lower, []).append(rel_path)
+        self._by_stem.setdefault(stem, []).append(rel_path)
+
+    def _remove_lookup(self, rel_path: str):
+        name = os.path.basename(rel_path)
+        lower = name.lower()
+        stem = os.path.splitext(lower)[0]
+        for table, key in ((self._by_name, name), (self._by_lower, lower), (self._by_stem, stem)):
+            paths = table.get(key)
+            if paths and rel_path in paths:
+                paths.remove(rel_path)
+                if not paths:
+                    del table[key]
+
+    # ---------- 查询 ----------
+
+    def lookup(self, name: str, extensions: List[str] = None) -> List[str]:
+        """
+        按文件名查找模型文件
+
+        Args:
+            name: 文件名，可以带有子目录前缀（只使用文件名部分）
+            extensions: 可选的扩展名列表，用于过滤按主干名匹配到的文件
+
+        Returns:
+            匹配文件的相对路径列表，依次尝试：精确文件名、小写文件名、主干名
+        """
+        if not name:
+            return []
+        name = os.path.basename(name.replace('\\', '/'))
+        with self._lock:
+            paths = self._by_name.get(name) or self._by_lower.get(name.lower())
+            if paths:
+                return list(paths)
+            # 引用不带扩展名时（如 "sd_xl_base_1.0"），按主干名匹配
+            paths = self._by_stem.get(name.lower(), [])
+            if extensions:
+                allowed = {ext.lower() for ext in extensions}
+                paths = [p for p in paths if os.path.splitext(p)[1].lower() in allowed]
+            return list(paths)
+
+    def contains(self, name: str, extensions: List[str] = None) -> bool:
+        """判断模型目录中是否存在指定文件名的文件。"""
+        return bool(self.lookup(name, extensions))
+
+    def iter_files(self, subdir: str = None) -> Iterator[Tuple[str, int, float]]:
+        """
+        遍历索引中的文件
+
+        Args:
+            subdir: 子目录(相对路径)，不提供则遍历整个模型目录
+
+        Returns:
+            (相对路径, 大小, 修改时间) 的迭代器
+        """
+        prefix = os.path.normpath(subdir) + os.sep if subdir else ""
+        with self._lock:
+            items = list(self.files.items())
+        for rel_path, (size, mtime) in items:
+            if not prefix or rel_path.startswith(prefix):
+                yield rel_path, size, mtime
+
+    def iter_directories(self) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        按 os.walk 的形式遍历索引中的目录
+
+        Returns:
+            (相对目录, 子目录名列表, 文件名列表) 的迭代器，根目录的相对路径为 "."
+        """
+        with self._lock:
+            items = sorted(self.dirs.items())
+        for rel_dir, info in items:
+            yield rel_dir or ".", list(info["subdirs"]), list(info["files"])
+
+    # ---------- 增量更新 ----------
+
+    def _rel(self, path: str) -> str:
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.models_root)
+        path = os.path.normpath(path) if path else ""
+        return "" if path == "." else path
+
+    def add_file(self, path: str) -> bool:
+        """
+        将一个文件加入索引（移动、复制文件后调用）
+
+        Args:
+            path: 文件路径 (相对于models_root或绝对路径)
+        """
+        rel_path = self._rel(path)
+        abs_path = os.path.join(self.models_root, rel_path)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return False
+        rel_dir, name = os.path.split(rel_path)
+        with self._lock:
+            self.add_directory(rel_dir)
+            if rel_path not in self.files:
+                self._add_lookup(rel_path)
+                self.dirs[rel_dir]["files"].append(name)
+            self.files[rel_path] = [st.st_size, st.st_mtime]
+            self._dirty_dirs.add(rel_dir)
+        return True
+
+    def remove_file(self, path: str) -> bool:
+        """从索引中移除一个文件。"""
+        rel_path = self._rel(path)
+        rel_dir, name = os.path.split(rel_path)
+        with self._lock:
+            if rel_path not in self.files:
+                return False
+            del self.files[rel_path]
+            self._remove_lookup(rel_path)
+            info = self.dirs.get(rel_dir)
+            if info and name in info["files"]:
+                info["files"].remove(name)
+            self._dirty_dirs.add(rel_dir)
+        return True
+
+    def add_directory(self, path: str):
+        """将目录（及其缺失的上级目录）加入索引。"""
+        rel_dir = self._rel(path)
+        with self._lock:
+            if rel_dir in self.dirs:
+                return
+            # 修改时间留空，下次刷新时会重新列出该目录
+            self.dirs[rel_dir] = {"mtime": None, "subdirs": [], "files": []}
+            self._dirty_dirs.add(rel_dir)
+            if rel_dir:
+                parent, name = os.path.split(rel_dir)
+                self.add_directory(parent)
+                if name not in self.dirs[parent]["subdirs"]:
+                    self.dirs[parent]["subdirs"].append(name)
+
+    def remove_directory(self, path: str):
+        """从索引中移除一个目录及其下所有内容。"""
+        rel_dir = self._rel(path)
+        if not rel_dir:
+            return
+        prefix = rel_dir + os.sep
+        with self._lock:
+            for rel_path in [p for p in self.files if p.startswith(prefix)]:
+                del self.files[rel_path]
+                self._remove_lookup(rel_path)
+            for d in [d for d in self.dirs if d == rel_dir or d.startswith(prefix)]:
+                del self.dirs[d]
+                self._dirty_dirs.discard(d)
+            self._removed_dirs.add(rel_dir)
+            parent, name = os.path.split(rel_dir)
+            if parent in self.dirs and name in self.dirs[parent]["subdirs"]:
+                self.dirs[parent]["subdirs"].remove(name)
+
+
+    # ---------- 文件哈希缓存 ----------
+
+    def get_cached_hashes(self, rel_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        读取文件哈希缓存，只返回大小和修改时间与索引中一致的条目
+
+        Args:
+            rel_paths: 相对路径列表
+
+        Returns:
+            {相对路径: {"partial": 部分哈希, "sha256": 完整哈希 (未计算时为空字符串)}}
+        """
+        if not rel_paths or not os.path.exists(self._index_path):
+            return {}
+        with self._lock:
+            current = {p: self.files.get(p) for p in rel_paths}
+        cached = {}
+        try:
+            conn = self._connect()
+            try:
+                paths = list(rel_paths)
+                for start in range(0, len(paths), 500):
+                    chunk = paths[start:start + 500]
+                    rows = conn.execute(f"SELECT path, size, mtime, partial, sha256 FROM hashes WHERE path IN ({','.join('?' * len(chunk))})",
+                                        chunk).fetchall()
+                    for path, size, mtime, partial, sha256 in rows:
+                        stat_info = current.get(path)
+                        if stat_info and stat_info[0] == size and stat_info[1] == mtime:
+                            cached[path] = {"partial": partial or "", "sha256": sha256 or ""}
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"读取文件哈希缓存失败: {e}")
+        return cached
+
+    def store_hashes(self, entries: List[Tuple[str, int, float, str, str]]) -> bool:
+        """
+        写入文件哈希缓存
+
+        Args:
+            entries: (相对路径, 大小, 修改时间, 部分哈希, sha256) 列表，sha256未计算时为空字符串
+
+        Returns:
+            保存是否成功
+        """
+        if not entries:
+            return True
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO hashes (path, size, mtime, partial, sha256) VALUES (?, ?, ?, ?, ?)", entries)
+            finally:
+                conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"保存文件哈希缓存失败: {e}")
+            return False
+
+
+_shared_indexes = {}
+_shared_lock = threading.Lock()
+
+def get_model_index(models_root: str) -> Optional[ModelIndex]:
+    """
+    获取指定模型目录的共享索引实例，同一目录在进程内只保留一个索引
+
+    Args:
+        models_root: ComfyUI模型根目录
+
+    Returns:
+        ModelIndex实例，目录无效时返回None
+    """
+    if not models_root or not os.path.isdir(models_root):
+        return None
+    key = os.path.normcase(os.path.abspath(models_root))
+    with _shared_lock:
+        index = _shared_indexes.get(key)
+        if index is None:
+            index = ModelIndex(models_root)
+            _shared_indexes[key] = index
+    return index
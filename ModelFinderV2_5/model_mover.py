@@ -3,6 +3,7 @@ import shutil
 import logging
 import json
 from typing import List, Dict, Any, Union, Tuple
+from .model_index import get_model_index
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,7 @@ class ModelMover:
         self.backup_dir = None
         self.model_extensions = [".safetensors", ".ckpt", ".pt", ".pth", ".bin"]
         self.model_type_detector = None
+        self.model_index = None
         logger.info("ModelMover已初始化")
     
     def set_paths(self, comfyui_models_root: str, backup_dir: str = None) -> bool:
@@ -52,12 +54,16 @@ class ModelMover:
                 logger.error(f"创建备份目录失败: {e}")
                 return False
         
+        # 遍历一次模型目录，索引由扫描和类型检测器共享
+        self.model_index = get_model_index(self.comfyui_models_root)
+        self.model_index.refresh()
+        
         # 初始化模型类型检测器
         try:
             from .model_type_detector import ModelTypeDetector
             self.model_type_detector = ModelTypeDetector()
             # 学习当前的ComfyUI目录结构
-            self.model_type_detector.learn_from_comfyui_structure(self.comfyui_models_root)
+            self.model_type_detector.learn_from_comfyui_structure(self.comfyui_models_root, model_index=self.model_index)
             logger.info("已初始化模型类型检测器")
         except ImportError:
             logger.warning("模型类型检测器不可用，智能移动功能将不可用")
@@ -67,6 +73,16 @@ class ModelMover:
         logger.info(f"设置备份目录: {self.backup_dir}")
         return True
     
+    def _update_index(self, removed: str = None, added: str = None):
+        """在移动/复制文件后同步更新模型索引，仅处理模型目录内的路径"""
+        if not self.model_index:
+            return
+        root_prefix = os.path.normcase(self.comfyui_models_root + os.sep)
+        for path, action in ((removed, self.model_index.remove_file), (added, self.model_index.add_file)):
+            if path and os.path.normcase(os.path.abspath(path)).startswith(root_prefix):
+                action(os.path.abspath(path))
+        self.model_index.save()
+    
     def get_model_subdirectories(self) -> List[str]:
         """
         获取模型目录下的所有子目录
@@ -78,12 +94,8 @@ class ModelMover:
             logger.error("未设置有效的ComfyUI模型目录")
             return []
         
-        subdirs = []
-        for root, dirs, _ in os.walk(self.comfyui_models_root):
-            rel_path = os.path.relpath(root, self.comfyui_models_root)
-            if rel_path != ".":
-                subdirs.append(rel_path)
-        
+        self.model_index.refresh()
+        subdirs = [rel_dir for rel_dir, _, _ in self.model_index.iter_directories() if rel_dir != "."]
         return sorted(subdirs)
     
     def scan_model_files(self, subdir: str = None) -> List[Dict[str, Any]]:
@@ -107,31 +119,30 @@ class ModelMover:
                 logger.error(f"子目录不存在: {scan_dir}")
                 return []
         
+        self.model_index.refresh()
         model_files = []
-        for root, _, files in os.walk(scan_dir):
-            rel_dir = os.path.relpath(root, self.comfyui_models_root)
-            for file in files:
-                _, ext = os.path.splitext(file)
-                if ext.lower() in self.model_extensions:
-                    file_path = os.path.join(root, file)
-                    file_size = os.path.getsize(file_path)
-                    model_info = {
-                        "name": file,
-                        "path": file_path,
-                        "rel_path": os.path.join(rel_dir, file) if rel_dir != "." else file,
-                        "size": file_size,
-                        "size_mb": round(file_size / (1024 * 1024), 2),
-                        "directory": rel_dir if rel_dir != "." else "",
-                        "extension": ext.lower()
-                    }
-                    
-                    # 如果模型类型检测器可用，尝试检测模型类型
-                    if self.model_type_detector:
-                        model_type, confidence = self.model_type_detector.detect_model_type(file_path)
-                        model_info["detected_type"] = model_type
-                        model_info["type_confidence"] = confidence
-                    
-                    model_files.append(model_info)
+        for rel_path, file_size, _ in self.model_index.iter_files(subdir):
+            rel_dir, file = os.path.split(rel_path)
+            _, ext = os.path.splitext(file)
+            if ext.lower() in self.model_extensions:
+                file_path = os.path.join(self.comfyui_models_root, rel_path)
+                model_info = {
+                    "name": file,
+                    "path": file_path,
+                    "rel_path": rel_path,
+                    "size": file_size,
+                    "size_mb": round(file_size / (1024 * 1024), 2),
+                    "directory": rel_dir,
+                    "extension": ext.lower()
+                }
+                
+                # 如果模型类型检测器可用，尝试检测模型类型
+                if self.model_type_detector:
+                    model_type, confidence = self.model_type_detector.detect_model_type(file_path)
+                    model_info["detected_type"] = model_type
+                    model_info["type_confidence"] = confidence
+                
+                model_files.append(model_info)
         
         return sorted(model_files, key=lambda x: x["rel_path"])
     
@@ -191,6 +202,7 @@ class ModelMover:
         try:
             shutil.move(source_path, target_path)
             logger.info(f"已移动文件: {source_path} -> {target_path}")
+            self._update_index(removed=source_path, added=target_path)
             rel_target = os.path.relpath(target_path, self.comfyui_models_root)
             return True, f"已成功移动文件到: {rel_target}"
         except Exception as e:
@@ -242,6 +254,7 @@ class ModelMover:
         try:
             shutil.copy2(source_path, target_path)
             logger.info(f"已复制文件: {source_path} -> {target_path}")
+            self._update_index(added=target_path)
             rel_target = os.path.relpath(target_path, self.comfyui_models_root)
             return True, f"已成功复制文件到: {rel_target}"
         except Exception as e:
@@ -269,6 +282,8 @@ class ModelMover:
         try:
             os.makedirs(full_path)
             logger.info(f"已创建目录: {full_path}")
+            if self.model_index:
+                self.model_index.add_directory(full_path)
             return True, f"已成功创建目录: {dir_path}"
         except Exception as e:
             logger.error(f"创建目录失败: {e}")
@@ -285,22 +300,29 @@ class ModelMover:
             return 0, []
         
         deleted_dirs = []
+        self.model_index.refresh()
+        
+        # 按深度从深到浅处理索引中的目录，先删除深层目录
+        directories = [(rel_dir, subdirs, files) for rel_dir, subdirs, files in self.model_index.iter_directories()
+                       if rel_dir != "."]  # 不删除根目录
+        directories.sort(key=lambda item: item[0].count(os.sep), reverse=True)
+        deleted = set()
+        for rel_path, subdirs, files in directories:
+            # 检查目录是否为空 (没有文件且子目录都已删除)
+            if files or any(os.path.join(rel_path, d) not in deleted for d in subdirs):
+                continue
+            root = os.path.join(self.comfyui_models_root, rel_path)
+            try:
+                os.rmdir(root)
+                logger.info(f"已删除空目录: {root}")
+                deleted_dirs.append(rel_path)
+                deleted.add(rel_path)
+                self.model_index.remove_directory(rel_path)
+            except Exception as e:
+                logger.error(f"删除空目录失败: {root}, 错误: {e}")
         
-        # 从下往上遍历目录树，先删除深层目录
-        for root, dirs, files in os.walk(self.comfyui_models_root, topdown=False):
-            if root == self.comfyui_models_root:
-                continue  # 不删除根目录
-            
-            # 检查目录是否为空 (没有文件且没有子目录)
-            if not files and not dirs:
-                rel_path = os.path.relpath(root, self.comfyui_models_root)
-                try:
-                    os.rmdir(root)
-                    logger.info(f"已删除空目录: {root}")
-                    deleted_dirs.append(rel_path)
-                except Exception as e:
-                    logger.error(f"删除空目录失败: {root}, 错误: {e}")
-        
+        if deleted_dirs:
+            self.model_index.save()
         return len(deleted_dirs), deleted_dirs
     
     def get_model_stats(self) -> Dict[str, Any]:
@@ -313,7 +335,14 @@ class ModelMover:
         if not self.comfyui_models_root:
             return {"error": "未设置ComfyUI模型目录"}
         
-        all_files = self.scan_model_files()
+        # 统计只需要大小和路径，直接读取索引，不做模型类型检测
+        self.model_index.refresh()
+        all_files = []
+        for rel_path, file_size, _ in self.model_index.iter_files():
+            rel_dir, file = os.path.split(rel_path)
+            ext = os.path.splitext(file)[1].lower()
+            if ext in self.model_extensions:
+                all_files.append({"directory": rel_dir, "extension": ext, "size": file_size})
         total_size = sum(f["size"] for f in all_files)
         
         # 按目录统计
@@ -344,6 +373,41 @@ class ModelMover:
             "ext_stats": ext_stats
         }
     
+    def find_duplicate_models(self, progress_callback=None) -> Dict[str, Any]:
+        """
+        查找模型目录中内容相同的模型文件
+        
+        Args:
+            progress_callback: 接收进度文字的回调
+            
+        Returns:
+            重复文件报告，格式见 ModelDeduper.find_duplicates
+        """
+        if not self.comfyui_models_root:
+            return {"error": "未设置ComfyUI模型目录"}
+        
+        from .model_dedupe import ModelDeduper
+        self.model_index.refresh()
+        return ModelDeduper(self.model_index, self.model_extensions).find_duplicates(progress_callback)
+    
+    def consolidate_duplicates(self, group: Dict[str, Any], keep: str = None, mode: str = "hardlink") -> List[Dict[str, Any]]:
+        """
+        用硬链接或符号链接合并一组重复文件，只保留一份实际数据
+        
+        Args:
+            group: find_duplicate_models 报告中的一个重复组
+            keep: 保留的相对路径，默认为组内第一个文件
+            mode: "hardlink" 或 "symlink"
+            
+        Returns:
+            每个被替换文件的结果列表
+        """
+        if not self.comfyui_models_root:
+            return [{"path": keep, "success": False, "message": "未设置ComfyUI模型目录"}]
+        
+        from .model_dedupe import ModelDeduper
+        return ModelDeduper(self.model_index, self.model_extensions).consolidate(group, keep, mode)
+    
     # ---- 智能移动功能 ----
     
     def detect_model_type(self, file_path: str) -> Tuple[str, float]:
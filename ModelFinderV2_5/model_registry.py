@@ -2,7 +2,11 @@ import os
 import json
 import logging
 import time
-from typing import List, Dict, Any, Optional, Union
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Union, Iterable
+
+from .search_journal import atomic_write
 
 logger = logging.getLogger(__name__)
 
@@ -10,12 +14,24 @@ class ModelRegistry:
     """
     模型记录管理器。
     提供模型信息的记录、查询、更新和删除功能。
+    记录文件是一个快照，每次修改只把操作 (add/update/delete/tag) 以JSON行追加到 <记录文件>.oplog，
+    加载时在快照之上重放；日志超过 COMPACT_LOG_BYTES 后在后台线程中写入新快照并清空日志。
+    在 batch() 中的修改在退出时一次写入，批量操作 (bulk_add/bulk_update/bulk_tag) 也只写一次。
+    记录可保存文件指纹，reconcile() 据此把已移动的文件重新关联到原有记录。
     """
+    OPLOG_SUFFIX = ".oplog"
+    COMPACTING_SUFFIX = ".oplog.compacting"  # 正在压缩的旧日志，压缩完成后删除
+    COMPACT_LOG_BYTES = 1024 * 1024
     
     def __init__(self):
         self.registry_file = None
         self.models = {}  # 模型记录字典，键为模型ID
         self.next_id = 1  # 下一个可用ID
+        self._batch_depth = 0
+        self._batch_dirty = False  # batch() 中调用了 save()，退出时写完整快照
+        self._pending_ops = []  # 尚未写入日志的操作 (已序列化的JSON行)
+        self._lock = threading.RLock()
+        self._compaction_thread = None
         logger.info("ModelRegistry已初始化")
     
     def set_registry_file(self, file_path: str) -> bool:
@@ -48,9 +64,17 @@ class ModelRegistry:
             logger.error(f"设置记录文件失败: {e}")
             return False
     
+    @property
+    def _oplog_path(self) -> str:
+        return self.registry_file + self.OPLOG_SUFFIX
+
+    @property
+    def _compacting_path(self) -> str:
+        return self.registry_file + self.COMPACTING_SUFFIX
+
     def load(self) -> bool:
         """
-        从文件加载模型记录
+        从文件加载模型记录，并依次重放未压缩的旧日志和当前日志
         
         Returns:
             加载是否成功
@@ -70,8 +94,10 @@ class ModelRegistry:
             for k, v in self.models.items():
                 models_copy[str(k)] = v
             self.models = models_copy
+            self._pending_ops = []
+            replayed = sum(self._replay_oplog(path) for path in (self._compacting_path, self._oplog_path))
             
-            logger.info(f"已从 {self.registry_file} 加载 {len(self.models)} 条模型记录")
+            logger.info(f"已从 {self.registry_file} 加载 {len(self.models)} 条模型记录" + (f"，重放 {replayed} 条操作" if replayed else ""))
             return True
         except Exception as e:
             logger.error(f"加载记录失败: {e}")
@@ -79,7 +105,8 @@ class ModelRegistry:
     
     def save(self) -> bool:
         """
-        保存模型记录到文件
+        把完整记录写入快照文件并清空操作日志。先写临时文件再原子替换，中断时不会留下不完整的记录文件。
+        日常修改只追加日志，不需要调用此方法；在 batch() 中只标记需要保存，退出 batch() 时统一写入。
         
         Returns:
             保存是否成功
@@ -87,26 +114,157 @@ class ModelRegistry:
         if not self.registry_file:
             logger.error("未设置记录文件路径")
             return False
+        if self._batch_depth:
+            self._batch_dirty = True
+            return True
         
+        self._wait_for_compaction()  # 避免后台压缩随后用旧快照覆盖
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.registry_file), exist_ok=True)
-            
-            # 保存数据
-            data = {
-                'models': self.models,
-                'next_id': self.next_id,
-                'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            with open(self.registry_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                self._write_snapshot(self._snapshot_data())
+                self._pending_ops = []
+                for path in (self._compacting_path, self._oplog_path):
+                    if os.path.exists(path):
+                        os.remove(path)
             
             logger.info(f"已保存 {len(self.models)} 条模型记录到 {self.registry_file}")
             return True
         except Exception as e:
             logger.error(f"保存记录失败: {e}")
             return False
+
+    def _snapshot_data(self) -> Dict[str, Any]:
+        """当前记录的副本。标签列表会被原地修改，单独复制。"""
+        models = {}
+        for model_id, model_data in self.models.items():
+            model_copy = dict(model_data)
+            if isinstance(model_copy.get('tags'), list):
+                model_copy['tags'] = list(model_copy['tags'])
+            models[model_id] = model_copy
+        return {
+            'models': models,
+            'next_id': self.next_id,
+            'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def _write_snapshot(self, data: Dict[str, Any]):
+        # 确保目录存在
+        os.makedirs(os.path.dirname(self.registry_file), exist_ok=True)
+
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+        atomic_write(self.registry_file, write)
+
+    # ---------- 操作日志 ----------
+
+    def _record(self, op: Dict[str, Any]):
+        """记录一个已在内存中生效的修改，由 _commit() 写入日志。"""
+        self._pending_ops.append(json.dumps(op, ensure_ascii=False) + '\n')
+
+    def _commit(self) -> bool:
+        """把待写入的操作追加到日志 (batch() 中推迟到退出时)，日志超过阈值时启动后台压缩。"""
+        if self._batch_depth:
+            return True
+        if not self.registry_file:
+            logger.error("未设置记录文件路径")
+            return False
+        with self._lock:
+            ops, self._pending_ops = self._pending_ops, []
+            if not ops:
+                return True
+            try:
+                with open(self._oplog_path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(ops))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    log_size = f.tell()
+            except Exception as e:
+                logger.error(f"写入记录操作日志失败: {e}")
+                return False
+            if log_size >= self.COMPACT_LOG_BYTES:
+                self._start_compaction()
+        return True
+
+    def _replay_oplog(self, path: str) -> int:
+        """在内存中的记录上重放日志，返回重放的操作数。操作都是幂等的，重复重放结果不变。"""
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+            if content and not content.endswith('\n'):
+                # 中断时写了一半的最后一行：截掉，避免之后追加的操作接在它后面
+                complete = content[:content.rfind('\n') + 1]
+                with open(path, 'r+b') as f:
+                    f.truncate(len(complete.encode('utf-8')))
+                logger.warning(f"忽略中断时未写完的记录操作: {path}")
+                content = complete
+            for line in content.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._apply_op(json.loads(line))
+                    count += 1
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"忽略损坏的记录操作: {path}")
+        except Exception as e:
+            logger.error(f"读取记录操作日志失败: {path}, 错误: {e}")
+        return count
+
+    def _apply_op(self, op: Dict[str, Any]):
+        kind, model_id = op['op'], str(op['id'])
+        if kind in ('add', 'update'):
+            self.models[model_id] = op['data']
+            if kind == 'add':
+                self.next_id = max(self.next_id, int(op.get('next_id', 0)))
+        elif kind == 'delete':
+            self.models.pop(model_id, None)
+        elif kind == 'tag' and model_id in self.models:
+            model_data = self.models[model_id]
+            if not isinstance(model_data.get('tags'), list):
+                model_data['tags'] = []
+            if op['present'] and op['tag'] not in model_data['tags']:
+                model_data['tags'].append(op['tag'])
+            elif not op['present'] and op['tag'] in model_data['tags']:
+                model_data['tags'].remove(op['tag'])
+            model_data['updated_time'] = op.get('time', model_data.get('updated_time'))
+
+    def _start_compaction(self):
+        """轮转日志并在后台线程中写入新快照，之后的修改写入新日志。调用方持有 self._lock。"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        try:
+            if os.path.exists(self._compacting_path):
+                # 上次压缩没有完成，把当前日志接到旧日志后面一起压缩
+                with open(self._oplog_path, 'r', encoding='utf-8') as src, open(self._compacting_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self._oplog_path)
+            else:
+                os.replace(self._oplog_path, self._compacting_path)
+        except OSError as e:
+            logger.error(f"轮转记录操作日志失败: {e}")
+            return
+        data = self._snapshot_data()
+        self._compaction_thread = threading.Thread(target=self._compact, args=(data,), name="registry-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def _compact(self, data: Dict[str, Any]):
+        try:
+            self._write_snapshot(data)
+            os.remove(self._compacting_path)
+            logger.info(f"已压缩记录操作日志: {len(data['models'])} 条模型记录写入 {self.registry_file}")
+        except Exception as e:
+            logger.error(f"压缩记录操作日志失败，将在下次加载时重放: {e}")
+
+    def _wait_for_compaction(self):
+        thread = self._compaction_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
     
     def add_model(self, model_data: Dict[str, Any]) -> Optional[str]:
         """
@@ -118,6 +276,16 @@ class ModelRegistry:
         Returns:
             成功添加返回模型ID，失败返回None
         """
+        model_id = self._insert_model(model_data)
+        if model_id is None:
+            return None
+        self._commit()
+        
+        logger.info(f"已添加模型记录: ID={model_id}, 名称={model_data['name']}")
+        return model_id
+
+    def _insert_model(self, model_data: Dict[str, Any]) -> Optional[str]:
+        """在内存中添加一条记录，不保存。"""
         if not model_data.get('name') or not model_data.get('path'):
             logger.error("添加模型记录失败: 缺少必要字段(name或path)")
             return None
@@ -130,11 +298,8 @@ class ModelRegistry:
         model_data['added_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
         model_data['updated_time'] = model_data['added_time']
         
-        # 保存记录
         self.models[model_id] = model_data
-        self.save()
-        
-        logger.info(f"已添加模型记录: ID={model_id}, 名称={model_data['name']}")
+        self._record({'op': 'add', 'id': model_id, 'data': model_data, 'next_id': self.next_id})
         return model_id
     
     def get_model(self, model_id: str) -> Optional[Dict[str, Any]]:
@@ -166,6 +331,15 @@ class ModelRegistry:
             更新是否成功
         """
         model_id = str(model_id)  # 确保ID为字符串
+        if not self._replace_model(model_id, model_data):
+            return False
+        self._commit()
+        
+        logger.info(f"已更新模型记录: ID={model_id}, 名称={model_data.get('name', '未知')}")
+        return True
+    
+    def _replace_model(self, model_id: str, model_data: Dict[str, Any]) -> bool:
+        """在内存中替换一条记录，保留原始添加时间，不保存。"""
         if model_id not in self.models:
             logger.warning(f"更新模型记录失败: ID={model_id} 不存在")
             return False
@@ -177,13 +351,10 @@ class ModelRegistry:
         # 更新时间戳
         model_data['updated_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
         
-        # 更新记录
         self.models[model_id] = model_data
-        self.save()
-        
-        logger.info(f"已更新模型记录: ID={model_id}, 名称={model_data.get('name', '未知')}")
+        self._record({'op': 'update', 'id': model_id, 'data': model_data})
         return True
-    
+
     def delete_model(self, model_id: str) -> bool:
         """
         删除模型记录
@@ -204,7 +375,8 @@ class ModelRegistry:
         
         # 删除记录
         del self.models[model_id]
-        self.save()
+        self._record({'op': 'delete', 'id': model_id})
+        self._commit()
         
         logger.info(f"已删除模型记录: ID={model_id}, 名称={model_name}")
         return True
@@ -305,19 +477,9 @@ class ModelRegistry:
             logger.warning(f"为模型添加标签失败: ID={model_id} 不存在")
             return False
         
-        # 获取当前标签列表
-        model_data = self.models[model_id]
-        if 'tags' not in model_data or not isinstance(model_data['tags'], list):
-            model_data['tags'] = []
-        
-        # 检查标签是否已存在
-        if tag in model_data['tags']:
+        if not self._set_tag(model_id, tag, True):
             return True  # 已存在，视为成功
-        
-        # 添加标签
-        model_data['tags'].append(tag)
-        model_data['updated_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
-        self.save()
+        self._commit()
         
         logger.info(f"为模型添加标签: ID={model_id}, 标签={tag}")
         return True
@@ -338,19 +500,154 @@ class ModelRegistry:
             logger.warning(f"从模型移除标签失败: ID={model_id} 不存在")
             return False
         
-        # 获取当前标签列表
-        model_data = self.models[model_id]
-        if 'tags' not in model_data or not isinstance(model_data['tags'], list) or tag not in model_data['tags']:
+        if not self._set_tag(model_id, tag, False):
             return True  # 标签不存在，视为成功
-        
-        # 移除标签
-        model_data['tags'].remove(tag)
-        model_data['updated_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
-        self.save()
+        self._commit()
         
         logger.info(f"从模型移除标签: ID={model_id}, 标签={tag}")
         return True
     
+    def _set_tag(self, model_id: str, tag: str, present: bool) -> bool:
+        """在内存中添加或移除一个标签，不保存。返回记录是否有变化。"""
+        model_data = self.models[model_id]
+        if 'tags' not in model_data or not isinstance(model_data['tags'], list):
+            if not present:
+                return False
+            model_data['tags'] = []
+        if (tag in model_data['tags']) == present:
+            return False
+        if present:
+            model_data['tags'].append(tag)
+        else:
+            model_data['tags'].remove(tag)
+        model_data['updated_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._record({'op': 'tag', 'id': model_id, 'tag': tag, 'present': present, 'time': model_data['updated_time']})
+        return True
+
+    # ---------- 批量操作 ----------
+
+    @contextmanager
+    def batch(self):
+        """
+        批量修改: with registry.batch(): ...
+        其中的所有修改在退出时一次追加到操作日志 (其中调用过 save() 时写完整快照)；
+        发生异常时丢弃这些修改并从文件重新加载。可以嵌套，只在最外层退出时写入。
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._batch_dirty = False
+                self._pending_ops = []
+                if self.registry_file and os.path.exists(self.registry_file):
+                    self.load()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            if self._batch_dirty:
+                self._batch_dirty = False
+                self.save()
+            else:
+                self._commit()
+
+    def bulk_add(self, models: Iterable[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        批量添加模型记录，只追加一次操作日志
+
+        Args:
+            models: 模型信息字典列表，每个必须包含 'name' 和 'path' 字段
+
+        Returns:
+            与输入顺序对应的模型ID列表，添加失败的位置为None
+        """
+        with self.batch():
+            model_ids = [self._insert_model(model_data) for model_data in models]
+        logger.info(f"已批量添加 {sum(1 for i in model_ids if i)} 条模型记录")
+        return model_ids
+
+    def bulk_update(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        批量更新模型记录，只追加一次操作日志
+
+        Args:
+            updates: {模型ID: 更新的模型信息}
+
+        Returns:
+            成功更新的记录数
+        """
+        with self.batch():
+            updated = sum(1 for model_id, model_data in updates.items() if self._replace_model(str(model_id), model_data))
+        logger.info(f"已批量更新 {updated} 条模型记录")
+        return updated
+
+    def bulk_tag(self, model_ids: Iterable[str], tags: Iterable[str], remove: bool = False) -> int:
+        """
+        为多个模型批量添加(或移除)标签，只追加一次操作日志
+
+        Args:
+            model_ids: 模型ID列表，不存在的ID会被忽略
+            tags: 标签列表
+            remove: True 为移除标签
+
+        Returns:
+            标签有变化的记录数
+        """
+        tags = list(tags)
+        changed = 0
+        with self.batch():
+            for model_id in model_ids:
+                model_id = str(model_id)
+                if model_id not in self.models:
+                    logger.warning(f"批量{'移除' if remove else '添加'}标签时跳过不存在的记录: ID={model_id}")
+                    continue
+                if sum(self._set_tag(model_id, tag, not remove) for tag in tags):
+                    changed += 1
+        logger.info(f"已批量{'移除' if remove else '添加'}标签 {tags}: {changed} 条记录有变化")
+        return changed
+
+    # ---------- 文件指纹 ----------
+
+    def set_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]) -> int:
+        """
+        保存记录的文件指纹 (见 model_fingerprint)，以 update 操作追加到日志，不改变更新时间
+
+        Args:
+            fingerprints: {模型ID: {"size", "mtime", "quick_hash"}}
+
+        Returns:
+            保存的记录数
+        """
+        saved = 0
+        for model_id, fingerprint in fingerprints.items():
+            model_id = str(model_id)
+            if model_id not in self.models:
+                continue
+            self.models[model_id]['fingerprint'] = fingerprint
+            self._record({'op': 'update', 'id': model_id, 'data': self.models[model_id]})
+            saved += 1
+        self._commit()
+        return saved
+
+    def get_fingerprint(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """获取记录的文件指纹，没有或文件已变化时重新计算并保存。"""
+        from .model_fingerprint import get_fingerprint
+        return get_fingerprint(self, model_id)
+
+    def reconcile(self, models_root: str) -> Dict[str, Any]:
+        """
+        扫描一次模型目录，按文件指纹把已移动或重命名的文件重新关联到原有记录
+
+        Args:
+            models_root: ComfyUI模型根目录
+
+        Returns:
+            核对报告，格式见 model_fingerprint.reconcile_registry
+        """
+        from .model_fingerprint import reconcile_registry
+        return reconcile_registry(self, models_root)
+
     def export_registry(self, file_path: str) -> bool:
         """
         导出模型记录到文件
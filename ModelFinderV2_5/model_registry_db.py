@@ -0,0 +1,669 @@
+"""
+SQLite模型记录
+与 ModelRegistry 接口相同，记录保存在SQLite数据库中：名称和类型建有索引，标签保存在关联表中，
+名称和描述建有FTS5全文索引用于关键词搜索，数据库使用WAL模式。
+首次使用时自动导入原有的JSON记录文件。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 这些字段单独建列用于索引和搜索，完整记录(不含标签)以JSON保存在 data 列
+_INDEXED_FIELDS = ('name', 'path', 'type', 'description')
+
+
+class SQLiteModelRegistry:
+    """
+    基于SQLite的模型记录管理器。
+    提供模型信息的记录、查询、更新和删除功能，每个修改操作在一个事务中完成，不再重写整个文件。
+    记录可保存文件指纹，reconcile() 据此把已移动的文件重新关联到原有记录。
+    batch() 和批量操作 (bulk_add/bulk_update/bulk_tag) 把多个修改合并到一个事务中提交。
+    """
+
+    def __init__(self):
+        self.registry_file = None
+        self._conn = None
+        self._lock = threading.RLock()
+        self._fts = False  # 当前SQLite是否支持FTS5三元组分词
+        logger.info("SQLiteModelRegistry已初始化")
+
+    def set_registry_file(self, file_path: str, legacy_json_path: str = None) -> bool:
+        """
+        设置数据库文件路径并打开数据库
+
+        Args:
+            file_path: 数据库文件路径
+            legacy_json_path: 原有的JSON记录文件，数据库为新建时从中导入记录
+
+        Returns:
+            设置是否成功
+        """
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                self.registry_file = file_path
+                self._conn = self._connect(file_path)
+                if legacy_json_path and self._get_meta('legacy_json_imported') is None:
+                    self._import_legacy_json(legacy_json_path)
+            logger.info(f"设置记录数据库: {file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"设置记录数据库失败: {e}")
+            return False
+
+    def _connect(self, file_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(file_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY, name TEXT NOT NULL, path TEXT NOT NULL, "
+                     "type TEXT NOT NULL DEFAULT '', description TEXT NOT NULL DEFAULT '', data TEXT NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_models_name ON models(name)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_models_type ON models(type)")
+        conn.execute("CREATE TABLE IF NOT EXISTS model_tags (model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE, "
+                     "tag TEXT NOT NULL, PRIMARY KEY (model_id, tag))")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_model_tags_tag ON model_tags(tag, model_id)")
+        try:
+            # 外部内容表，由触发器与 models 保持同步；三元组分词支持任意子串匹配，与原来的子串搜索一致
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5(name, description, "
+                         "content='models', content_rowid='id', tokenize='trigram')")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS models_fts_insert AFTER INSERT ON models BEGIN "
+                         "INSERT INTO models_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS models_fts_delete AFTER DELETE ON models BEGIN "
+                         "INSERT INTO models_fts(models_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS models_fts_update AFTER UPDATE OF name, description ON models BEGIN "
+                         "INSERT INTO models_fts(models_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+                         "INSERT INTO models_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END")
+            self._fts = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite不支持FTS5三元组分词，关键词搜索将使用LIKE: {e}")
+            self._fts = False
+        return conn
+
+    def close(self):
+        """关闭数据库连接。"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------- 内部工具 ----------
+
+    @contextmanager
+    def _transaction(self):
+        """
+        在事务中执行一个修改操作。已处于事务(batch)中时使用保存点，
+        出错只回滚这一个操作，外层事务的其他修改不受影响。
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                self._conn.execute("SAVEPOINT registry_op")
+                try:
+                    yield
+                except BaseException:
+                    self._conn.execute("ROLLBACK TO registry_op")
+                    self._conn.execute("RELEASE registry_op")
+                    raise
+                self._conn.execute("RELEASE registry_op")
+                return
+            self._conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _allocate_id(self) -> int:
+        """分配下一个模型ID，已删除的ID不会重复使用 (与JSON记录的 next_id 相同)。"""
+        next_id = int(self._get_meta('next_id') or 0)
+        max_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM models").fetchone()[0]
+        model_id = max(next_id, max_id + 1)
+        self._set_meta('next_id', model_id + 1)
+        return model_id
+
+    @staticmethod
+    def _columns(model_data: Dict[str, Any]) -> Tuple:
+        record = {k: v for k, v in model_data.items() if k not in ('tags', 'id')}
+        values = tuple('' if model_data.get(field) is None else str(model_data.get(field)) for field in _INDEXED_FIELDS)
+        return values + (json.dumps(record, ensure_ascii=False),)
+
+    @staticmethod
+    def _clean_tags(tags) -> List[str]:
+        if not isinstance(tags, list):
+            return []
+        return list(dict.fromkeys(str(tag) for tag in tags if tag))
+
+    def _write_model(self, model_id: int, model_data: Dict[str, Any], replace: bool):
+        """写入一条记录及其标签，调用方负责事务。"""
+        if replace:
+            # 不用 INSERT OR REPLACE：REPLACE 删除旧行时不会触发全文索引的删除触发器
+            self._conn.execute("DELETE FROM models WHERE id = ?", (model_id,))
+        self._conn.execute("INSERT INTO models (id, name, path, type, description, data) VALUES (?, ?, ?, ?, ?, ?)",
+                           (model_id,) + self._columns(model_data))
+        self._conn.executemany("INSERT OR IGNORE INTO model_tags (model_id, tag) VALUES (?, ?)",
+                               [(model_id, tag) for tag in self._clean_tags(model_data.get('tags'))])
+
+    def _query_models(self, where: str = "", params: Tuple = ()) -> List[Dict[str, Any]]:
+        """按条件查询记录并一次取出这些记录的标签，结果按名称排序，每条记录包含 'id'。"""
+        where_sql = f" WHERE {where}" if where else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, data FROM models m{where_sql} ORDER BY m.name, m.id", params).fetchall()
+            tag_rows = self._conn.execute(
+                f"SELECT model_id, tag FROM model_tags WHERE model_id IN (SELECT m.id FROM models m{where_sql}) ORDER BY rowid",
+                params).fetchall()
+        tags = {}
+        for model_id, tag in tag_rows:
+            tags.setdefault(model_id, []).append(tag)
+        results = []
+        for model_id, data in rows:
+            model = json.loads(data)
+            model['tags'] = tags.get(model_id, [])
+            model['id'] = str(model_id)
+            results.append(model)
+        return results
+
+    @staticmethod
+    def _parse_id(model_id) -> Optional[int]:
+        try:
+            return int(model_id)
+        except (TypeError, ValueError):
+            return None
+
+    def _import_legacy_json(self, json_path: str):
+        """数据库中还没有记录时，导入原有JSON记录文件中的记录 (含其操作日志中的修改)，保留原ID。"""
+        if not os.path.exists(json_path):
+            self._set_meta('legacy_json_imported', '')
+            return
+        if self._conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]:
+            self._set_meta('legacy_json_imported', '')
+            return
+        from .model_registry import ModelRegistry
+        legacy = ModelRegistry()
+        legacy.registry_file = json_path
+        if not legacy.load():
+            logger.error(f"读取原有JSON记录失败，未导入: {json_path}")
+            return
+        models = legacy.models
+        with self._transaction():
+            for model_id, model_data in models.items():
+                parsed = self._parse_id(model_id)
+                if parsed is None or not isinstance(model_data, dict):
+                    continue
+                self._write_model(parsed, model_data, replace=True)
+            self._set_meta('next_id', max(int(legacy.next_id or 1), 1))
+            self._set_meta('legacy_json_imported', json_path)
+        logger.info(f"已从 {json_path} 导入 {len(models)} 条模型记录到数据库")
+
+    # ---------- 与 ModelRegistry 相同的接口 ----------
+
+    def load(self) -> bool:
+        """数据库按需查询，无需整体加载；这里只检查数据库是否已打开。"""
+        if self._conn is None:
+            logger.error("记录数据库未打开")
+            return False
+        return True
+
+    def save(self) -> bool:
+        """每个修改操作都已在各自的事务中提交，这里只做一次WAL检查点。"""
+        if self._conn is None:
+            logger.error("未设置记录数据库路径")
+            return False
+        try:
+            with self._lock:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            return True
+        except Exception as e:
+            logger.error(f"保存记录失败: {e}")
+            return False
+
+    def add_model(self, model_data: Dict[str, Any]) -> Optional[str]:
+        """
+        添加模型记录
+
+        Args:
+            model_data: 模型信息字典，必须包含 'name' 和 'path' 字段
+
+        Returns:
+            成功添加返回模型ID，失败返回None
+        """
+        model_id = self._insert_model(model_data)
+        if model_id is not None:
+            logger.info(f"已添加模型记录: ID={model_id}, 名称={model_data['name']}")
+        return model_id
+
+    def _insert_model(self, model_data: Dict[str, Any]) -> Optional[str]:
+        if not model_data.get('name') or not model_data.get('path'):
+            logger.error("添加模型记录失败: 缺少必要字段(name或path)")
+            return None
+
+        model_data['added_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        model_data['updated_time'] = model_data['added_time']
+        try:
+            with self._transaction():
+                model_id = self._allocate_id()
+                self._write_model(model_id, model_data, replace=False)
+        except Exception as e:
+            logger.error(f"添加模型记录失败: {e}")
+            return None
+        return str(model_id)
+
+    def get_model(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取指定ID的模型记录
+
+        Args:
+            model_id: 模型ID
+
+        Returns:
+            模型记录字典，不存在返回None
+        """
+        parsed = self._parse_id(model_id)
+        models = self._query_models("m.id = ?", (parsed,)) if parsed is not None else []
+        if not models:
+            logger.warning(f"获取模型记录失败: ID={model_id} 不存在")
+            return None
+        model = models[0]
+        del model['id']
+        return model
+
+    def update_model(self, model_id: str, model_data: Dict[str, Any]) -> bool:
+        """
+        更新模型记录
+
+        Args:
+            model_id: 模型ID
+            model_data: 更新的模型信息
+
+        Returns:
+            更新是否成功
+        """
+        with self._transaction():
+            if not self._update_row(model_id, model_data):
+                return False
+
+        logger.info(f"已更新模型记录: ID={model_id}, 名称={model_data.get('name', '未知')}")
+        return True
+
+    def _update_row(self, model_id: str, model_data: Dict[str, Any]) -> bool:
+        """替换一条记录及其标签，保留原始添加时间，调用方负责事务。"""
+        parsed = self._parse_id(model_id)
+        row = self._conn.execute("SELECT data FROM models WHERE id = ?", (parsed,)).fetchone() if parsed is not None else None
+        if row is None:
+            logger.warning(f"更新模型记录失败: ID={model_id} 不存在")
+            return False
+
+        # 保留原始添加时间
+        added_time = json.loads(row[0]).get('added_time')
+        if added_time:
+            model_data['added_time'] = added_time
+        model_data['updated_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._conn.execute("UPDATE models SET name = ?, path = ?, type = ?, description = ?, data = ? WHERE id = ?",
+                           self._columns(model_data) + (parsed,))
+        self._conn.execute("DELETE FROM model_tags WHERE model_id = ?", (parsed,))
+        self._conn.executemany("INSERT OR IGNORE INTO model_tags (model_id, tag) VALUES (?, ?)",
+                               [(parsed, tag) for tag in self._clean_tags(model_data.get('tags'))])
+        return True
+
+    def delete_model(self, model_id: str) -> bool:
+        """
+        删除模型记录
+
+        Args:
+            model_id: 模型ID
+
+        Returns:
+            删除是否成功
+        """
+        parsed = self._parse_id(model_id)
+        with self._lock:
+            row = self._conn.execute("SELECT name FROM models WHERE id = ?", (parsed,)).fetchone() if parsed is not None else None
+            if row is None:
+                logger.warning(f"删除模型记录失败: ID={model_id} 不存在")
+                return False
+            with self._transaction():
+                self._conn.execute("DELETE FROM models WHERE id = ?", (parsed,))  # 标签随外键级联删除
+
+        logger.info(f"已删除模型记录: ID={model_id}, 名称={row[0] or '未知'}")
+        return True
+
+    def get_all_models(self) -> List[Dict[str, Any]]:
+        """
+        获取所有模型记录
+
+        Returns:
+            模型记录列表，每个元素包含模型信息和ID
+        """
+        return self._query_models()
+
+    def search_models(self, query: str = None, tags: List[str] = None, model_type: str = None) -> List[Dict[str, Any]]:
+        """
+        搜索模型记录
+
+        Args:
+            query: 搜索关键词，匹配名称和描述 (不区分大小写的子串匹配)
+            tags: 标签列表，模型必须包含所有指定标签
+            model_type: 模型类型
+
+        Returns:
+            匹配的模型记录列表
+        """
+        conditions, params = [], []
+        if query:
+            if self._fts and len(query) >= 3:
+                # 三元组分词下，带引号的短语即任意子串匹配
+                conditions.append("m.id IN (SELECT rowid FROM models_fts WHERE models_fts MATCH ?)")
+                params.append('"' + query.replace('"', '""') + '"')
+            else:
+                pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                conditions.append("(m.name LIKE ? ESCAPE '\\' OR m.description LIKE ? ESCAPE '\\')")
+                params.extend([pattern, pattern])
+        if tags:
+            unique_tags = list(dict.fromkeys(tags))
+            placeholders = ','.join('?' * len(unique_tags))
+            conditions.append(f"m.id IN (SELECT model_id FROM model_tags WHERE tag IN ({placeholders}) "
+                              f"GROUP BY model_id HAVING COUNT(*) = ?)")
+            params.extend(unique_tags)
+            params.append(len(unique_tags))
+        if model_type:
+            conditions.append("m.type = ?")
+            params.append(model_type)
+        return self._query_models(' AND '.join(conditions), tuple(params))
+
+    def get_all_tags(self) -> List[str]:
+        """
+        获取所有已使用的标签
+
+        Returns:
+            标签列表
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT tag FROM model_tags ORDER BY tag")]
+
+    def get_all_types(self) -> List[str]:
+        """
+        获取所有已使用的模型类型
+
+        Returns:
+            模型类型列表
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT type FROM models WHERE type != '' ORDER BY type")]
+
+    def _touch(self, model_id: int):
+        """更新记录的 updated_time，调用方负责事务。"""
+        row = self._conn.execute("SELECT data FROM models WHERE id = ?", (model_id,)).fetchone()
+        record = json.loads(row[0])
+        record['updated_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._conn.execute("UPDATE models SET data = ? WHERE id = ?", (json.dumps(record, ensure_ascii=False), model_id))
+
+    def _set_tags(self, model_id: int, tags: List[str], present: bool) -> bool:
+        """添加或移除一条记录的若干标签，有变化时更新 updated_time。调用方负责事务，返回是否有变化。"""
+        if present:
+            sql = "INSERT OR IGNORE INTO model_tags (model_id, tag) VALUES (?, ?)"
+        else:
+            sql = "DELETE FROM model_tags WHERE model_id = ? AND tag = ?"
+        before = self._conn.total_changes
+        self._conn.executemany(sql, [(model_id, tag) for tag in tags])
+        if self._conn.total_changes == before:
+            return False
+        self._touch(model_id)
+        return True
+
+    def add_tag_to_model(self, model_id: str, tag: str) -> bool:
+        """
+        为模型添加标签
+
+        Args:
+            model_id: 模型ID
+            tag: 标签
+
+        Returns:
+            操作是否成功
+        """
+        parsed = self._parse_id(model_id)
+        with self._lock:
+            if parsed is None or self._conn.execute("SELECT 1 FROM models WHERE id = ?", (parsed,)).fetchone() is None:
+                logger.warning(f"为模型添加标签失败: ID={model_id} 不存在")
+                return False
+            with self._transaction():
+                if not self._set_tags(parsed, [tag], True):
+                    return True  # 已存在，视为成功
+
+        logger.info(f"为模型添加标签: ID={model_id}, 标签={tag}")
+        return True
+
+    def remove_tag_from_model(self, model_id: str, tag: str) -> bool:
+        """
+        从模型移除标签
+
+        Args:
+            model_id: 模型ID
+            tag: 标签
+
+        Returns:
+            操作是否成功
+        """
+        parsed = self._parse_id(model_id)
+        with self._lock:
+            if parsed is None or self._conn.execute("SELECT 1 FROM models WHERE id = ?", (parsed,)).fetchone() is None:
+                logger.warning(f"从模型移除标签失败: ID={model_id} 不存在")
+                return False
+            with self._transaction():
+                if not self._set_tags(parsed, [tag], False):
+                    return True  # 标签不存在，视为成功
+
+        logger.info(f"从模型移除标签: ID={model_id}, 标签={tag}")
+        return True
+
+    # ---------- 批量操作 ----------
+
+    @contextmanager
+    def batch(self):
+        """
+        批量修改: with registry.batch(): ...
+        其中的所有修改在同一个事务中，退出时提交一次；发生异常时全部回滚。
+        可以嵌套，只在最外层退出时提交。批量修改期间其他线程的操作会等待。
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self
+                return
+            self._conn.execute("BEGIN")
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def bulk_add(self, models: Iterable[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        批量添加模型记录，在一个事务中提交
+
+        Args:
+            models: 模型信息字典列表，每个必须包含 'name' 和 'path' 字段
+
+        Returns:
+            与输入顺序对应的模型ID列表，添加失败的位置为None
+        """
+        with self.batch():
+            model_ids = [self._insert_model(model_data) for model_data in models]
+        logger.info(f"已批量添加 {sum(1 for i in model_ids if i)} 条模型记录")
+        return model_ids
+
+    def bulk_update(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        批量更新模型记录，在一个事务中提交
+
+        Args:
+            updates: {模型ID: 更新的模型信息}
+
+        Returns:
+            成功更新的记录数
+        """
+        with self.batch():
+            updated = sum(1 for model_id, model_data in updates.items() if self._update_row(model_id, model_data))
+        logger.info(f"已批量更新 {updated} 条模型记录")
+        return updated
+
+    def bulk_tag(self, model_ids: Iterable[str], tags: Iterable[str], remove: bool = False) -> int:
+        """
+        为多个模型批量添加(或移除)标签，在一个事务中提交
+
+        Args:
+            model_ids: 模型ID列表，不存在的ID会被忽略
+            tags: 标签列表
+            remove: True 为移除标签
+
+        Returns:
+            标签有变化的记录数
+        """
+        tags = list(dict.fromkeys(tags))
+        changed = 0
+        with self.batch():
+            for model_id in model_ids:
+                parsed = self._parse_id(model_id)
+                if parsed is None or self._conn.execute("SELECT 1 FROM models WHERE id = ?", (parsed,)).fetchone() is None:
+                    logger.warning(f"批量{'移除' if remove else '添加'}标签时跳过不存在的记录: ID={model_id}")
+                    continue
+                if self._set_tags(parsed, tags, not remove):
+                    changed += 1
+        logger.info(f"已批量{'移除' if remove else '添加'}标签 {tags}: {changed} 条记录有变化")
+        return changed
+
+    # ---------- 文件指纹 ----------
+
+    def set_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]) -> int:
+        """
+        保存记录的文件指纹 (见 model_fingerprint)，在一个事务中写入，不改变更新时间
+
+        Args:
+            fingerprints: {模型ID: {"size", "mtime", "quick_hash"}}
+
+        Returns:
+            保存的记录数
+        """
+        saved = 0
+        with self._transaction():
+            for model_id, fingerprint in fingerprints.items():
+                parsed = self._parse_id(model_id)
+                row = self._conn.execute("SELECT data FROM models WHERE id = ?", (parsed,)).fetchone() if parsed is not None else None
+                if row is None:
+                    continue
+                record = json.loads(row[0])
+                record['fingerprint'] = fingerprint
+                self._conn.execute("UPDATE models SET data = ? WHERE id = ?", (json.dumps(record, ensure_ascii=False), parsed))
+                saved += 1
+        return saved
+
+    def get_fingerprint(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """获取记录的文件指纹，没有或文件已变化时重新计算并保存。"""
+        from .model_fingerprint import get_fingerprint
+        return get_fingerprint(self, model_id)
+
+    def reconcile(self, models_root: str) -> Dict[str, Any]:
+        """
+        扫描一次模型目录，按文件指纹把已移动或重命名的文件重新关联到原有记录
+
+        Args:
+            models_root: ComfyUI模型根目录
+
+        Returns:
+            核对报告，格式见 model_fingerprint.reconcile_registry
+        """
+        from .model_fingerprint import reconcile_registry
+        return reconcile_registry(self, models_root)
+
+    def export_registry(self, file_path: str) -> bool:
+        """
+        导出模型记录到文件 (与JSON记录的导出格式相同)
+
+        Args:
+            file_path: 导出文件路径
+
+        Returns:
+            导出是否成功
+        """
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            models = {}
+            for model in self.get_all_models():
+                model_id = model.pop('id')
+                models[model_id] = model
+            export_data = {
+                'models': models,
+                'exported_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'count': len(models)
+            }
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(export_data, f, ensure_ascii=False, indent=2)
+
+            logger.info(f"已导出 {len(models)} 条模型记录到 {file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"导出记录失败: {e}")
+            return False
+
+    def import_registry(self, file_path: str, merge: bool = True) -> bool:
+        """
+        从文件导入模型记录
+
+        Args:
+            file_path: 导入文件路径
+            merge: 是否合并记录，True为合并(分配新ID)，False为替换
+
+        Returns:
+            导入是否成功
+        """
+        if not os.path.exists(file_path):
+            logger.error(f"导入记录失败: 文件不存在 {file_path}")
+            return False
+
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                import_data = json.load(f)
+
+            imported_models = import_data.get('models', {})
+            if not imported_models:
+                logger.warning(f"导入记录失败: 文件中没有模型记录 {file_path}")
+                return False
+
+            imported_time = time.strftime('%Y-%m-%d %H:%M:%S')
+            with self._transaction():
+                if merge:
+                    for model_data in imported_models.values():
+                        model_data['imported_time'] = imported_time
+                        if 'updated_time' not in model_data:
+                            model_data['updated_time'] = imported_time
+                        self._write_model(self._allocate_id(), model_data, replace=False)
+                else:
+                    self._conn.execute("DELETE FROM models")
+                    for model_id, model_data in imported_models.items():
+                        parsed = self._parse_id(model_id)
+                        self._write_model(parsed if parsed is not None else self._allocate_id(), model_data, replace=True)
+                    self._set_meta('next_id', import_data.get('next_id', len(imported_models) + 1))
+
+            logger.info(f"已导入 {len(imported_models)} 条模型记录，模式: {'合并' if merge else '替换'}")
+            return True
+        except Exception as e:
+            logger.error(f"导入记录失败: {e}")
+            return False
@@ -150,12 +150,13 @@ class ModelTypeDetector:
             logger.error(f"加载模型检测配置失败: {e}")
             return False
     
-    def learn_from_comfyui_structure(self, comfyui_models_path: str) -> bool:
+    def learn_from_comfyui_structure(self, comfyui_models_path: str, model_index=None) -> bool:
         """
         学习ComfyUI的目录结构，用于更准确地推荐目标目录
         
         Args:
             comfyui_models_path: ComfyUI模型目录路径
+            model_index: 可选的已建立的ModelIndex，提供时直接使用索引而不再遍历目录
             
         Returns:
             学习是否成功
@@ -165,9 +166,14 @@ class ModelTypeDetector:
             return False
             
         try:
-            # 扫描目录结构
-            for root, dirs, files in os.walk(comfyui_models_path):
-                rel_path = os.path.relpath(root, comfyui_models_path)
+            # 扫描目录结构（有索引时直接复用索引中的目录信息）
+            if model_index is not None:
+                model_index.ensure_loaded()
+                walk_items = model_index.iter_directories()
+            else:
+                walk_items = ((os.path.relpath(root, comfyui_models_path), dirs, files)
+                              for root, dirs, files in os.walk(comfyui_models_path))
+            for rel_path, dirs, files in walk_items:
                 if rel_path == '.':
                     continue  # 跳过根目录
                     
@@ -0,0 +1,117 @@
+"""
+搜索结果表
+用标准库csv读写缺失模型CSV，每行保存为带 __slots__ 的 SearchRow，
+搜索过程中按行号直接读写字段，不需要pandas。
+"""
+
+import csv
+import logging
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# CSV列名 -> SearchRow字段名
+COLUMN_FIELDS = {
+    '序号': 'seq',
+    '节点ID': 'node_id',
+    '节点类型': 'node_type',
+    '文件名': 'filename',
+    '状态': 'status',
+    '下载链接': 'download_link',
+    '镜像链接': 'mirror_link',
+    '搜索链接': 'search_link',
+    '文件大小': 'file_size',
+    'SHA256': 'sha256',
+}
+
+# 搜索需要的列，读取时不存在则补上
+SEARCH_COLUMNS = ('文件名', '状态', '下载链接', '镜像链接', '搜索链接', '节点类型')
+
+
+class SearchRow:
+    """
+    结果表的一行。已知列保存在固定字段中，其他列保存在 extra 字典里。
+    所有值都是字符串，缺失的值为空字符串。
+    """
+    __slots__ = tuple(COLUMN_FIELDS.values()) + ('extra',)
+
+    def __init__(self, values: Dict[str, str] = None):
+        for field in COLUMN_FIELDS.values():
+            setattr(self, field, '')
+        self.extra = {}
+        if values:
+            self.update(values)
+
+    def get(self, column: str, default: str = '') -> str:
+        field = COLUMN_FIELDS.get(column)
+        if field is not None:
+            return getattr(self, field)
+        return self.extra.get(column, default)
+
+    def __getitem__(self, column: str) -> str:
+        return self.get(column)
+
+    def __setitem__(self, column: str, value):
+        value = '' if value is None else str(value)
+        field = COLUMN_FIELDS.get(column)
+        if field is not None:
+            setattr(self, field, value)
+        else:
+            self.extra[column] = value
+
+    def update(self, values: Dict[str, str]):
+        for column, value in values.items():
+            self[column] = value
+
+
+class ResultTable:
+    """
+    按列名顺序保存的一组 SearchRow，行号从0开始 (与检查点日志中的 row 对应)。
+    """
+
+    def __init__(self, columns: List[str] = None, rows: List[SearchRow] = None):
+        self.columns = list(columns or [])
+        self.rows = rows if rows is not None else []
+
+    @classmethod
+    def read_csv(cls, csv_file: str, required_columns=SEARCH_COLUMNS) -> 'ResultTable':
+        """读取CSV (utf-8-sig)，并补上缺少的 required_columns。"""
+        with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            columns = next(reader, [])
+            rows = []
+            for record in reader:
+                if not any(record):
+                    continue
+                rows.append(SearchRow(dict(zip(columns, record))))
+        table = cls(columns, rows)
+        for column in required_columns:
+            table.ensure_column(column)
+        return table
+
+    def write_csv(self, path: str):
+        """按当前列顺序写出CSV (utf-8-sig)。"""
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for row in self.rows:
+                writer.writerow([row.get(column) for column in self.columns])
+
+    def ensure_column(self, column: str):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def update(self, index: int, values: Dict[str, str]):
+        """写入一行的若干列，新列追加到表尾。"""
+        for column in values:
+            self.ensure_column(column)
+        self.rows[index].update(values)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> SearchRow:
+        return self.rows[index]
+
+    def __iter__(self) -> Iterator[SearchRow]:
+        return iter(self.rows)
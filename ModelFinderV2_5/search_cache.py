@@ -0,0 +1,183 @@
+"""
+搜索结果缓存
+把模型名称的搜索结果保存在结果目录下的SQLite文件中，
+同一名称在有效期内再次出现时直接使用缓存，不再启动浏览器搜索。
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional
+
+from .file_manager import get_results_folder
+
+logger = logging.getLogger(__name__)
+
+# 这些状态表示明确没有找到，缓存时间较短，过期后重新搜索
+NEGATIVE_STATUSES = ('未找到HF', '未找到LibLib', '未找到(无结果区)', '未找到(无链接)', '找到搜索链接但非直接LibLib链接')
+
+
+class SearchCache:
+    """
+    以 (搜索来源, 规范化搜索词) 为键的搜索结果缓存。
+    搜索来源是HF/LibLib的判断结果，搜索词是 _process_name_for_search 得到的 final_search_term。
+    """
+    CACHE_FILENAME = "search_cache.db"
+    DEFAULT_TTL_SECONDS = 30 * 24 * 3600          # 找到链接的结果保留30天
+    DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600      # 未找到的结果保留1天
+
+    def __init__(self, db_path: str = None, ttl_seconds: float = None, negative_ttl_seconds: float = None):
+        """
+        初始化搜索缓存
+
+        Args:
+            db_path: 缓存文件路径，为None则保存在结果目录下
+            ttl_seconds: 找到链接的结果的有效期(秒)
+            negative_ttl_seconds: 未找到结果的有效期(秒)
+        """
+        self.db_path = db_path or os.path.join(get_results_folder(), self.CACHE_FILENAME)
+        self.ttl_seconds = self.DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.negative_ttl_seconds = self.DEFAULT_NEGATIVE_TTL_SECONDS if negative_ttl_seconds is None else negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("""CREATE TABLE IF NOT EXISTS search_results (
+                        source TEXT NOT NULL,
+                        term TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        download_link TEXT NOT NULL DEFAULT '',
+                        mirror_link TEXT NOT NULL DEFAULT '',
+                        search_link TEXT NOT NULL DEFAULT '',
+                        negative INTEGER NOT NULL DEFAULT 0,
+                        updated REAL NOT NULL,
+                        file_size TEXT NOT NULL DEFAULT '',
+                        sha256 TEXT NOT NULL DEFAULT '',
+                        PRIMARY KEY (source, term))""")
+                    # 旧版本的缓存文件没有文件大小和sha256列
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(search_results)")}
+                    for column in ('file_size', 'sha256'):
+                        if column not in columns:
+                            conn.execute(f"ALTER TABLE search_results ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"初始化搜索缓存失败: {self.db_path}, 错误: {e}")
+
+    @staticmethod
+    def normalize_term(term: str) -> str:
+        """规范化搜索词：合并空白并忽略大小写。"""
+        return " ".join(str(term or "").split()).casefold()
+
+    @staticmethod
+    def is_cacheable(status: str) -> bool:
+        """只缓存搜索完成的结果，搜索错误不缓存。"""
+        return status == '已处理' or status in NEGATIVE_STATUSES
+
+    def get(self, source: str, term: str) -> Optional[Dict[str, str]]:
+        """
+        查询缓存
+
+        Args:
+            source: 搜索来源 ("hf" 或 "liblib")
+            term: 搜索词
+
+        Returns:
+            包含 status, download_link, mirror_link, search_link, file_size, sha256, updated 的字典；未命中或已过期返回None
+        """
+        key = self.normalize_term(term)
+        if not key:
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT status, download_link, mirror_link, search_link, negative, updated, file_size, sha256 "
+                        "FROM search_results WHERE source = ? AND term = ?", (source, key)).fetchone()
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f"读取搜索缓存失败: {e}")
+            return None
+        if not row:
+            return None
+        status, download_link, mirror_link, search_link, negative, updated, file_size, sha256 = row
+        ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+        if time.time() - updated > ttl:
+            return None
+        return {'status': status, 'download_link': download_link, 'mirror_link': mirror_link,
+                'search_link': search_link, 'file_size': file_size, 'sha256': sha256, 'updated': updated}
+
+    def put(self, source: str, term: str, status: str, download_link: str = '', mirror_link: str = '', search_link: str = '',
+            file_size: str = '', sha256: str = '') -> bool:
+        """
+        保存一条搜索结果；搜索错误等不可缓存的状态会被忽略
+        file_size 和 sha256 为HF API解析得到的文件信息，搜索引擎的结果没有这两项
+
+        Returns:
+            是否写入了缓存
+        """
+        key = self.normalize_term(term)
+        if not key or not self.is_cacheable(status):
+            return False
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO search_results "
+                            "(source, term, status, download_link, mirror_link, search_link, negative, updated, file_size, sha256) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (source, key, status, download_link or '', mirror_link or '', search_link or '',
+                             int(status != '已处理'), time.time(), str(file_size or ''), sha256 or ''))
+                finally:
+                    conn.close()
+            return True
+        except Exception as e:
+            logger.warning(f"写入搜索缓存失败: {e}")
+            return False
+
+    def purge_expired(self) -> int:
+        """删除已过期的缓存记录，返回删除的数量。"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        cursor = conn.execute(
+                            "DELETE FROM search_results WHERE (negative = 0 AND updated < ?) OR (negative = 1 AND updated < ?)",
+                            (now - self.ttl_seconds, now - self.negative_ttl_seconds))
+                        return cursor.rowcount
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f"清理搜索缓存失败: {e}")
+            return 0
+
+    def clear(self) -> bool:
+        """清空缓存。"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM search_results")
+                finally:
+                    conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"清空搜索缓存失败: {e}")
+            return False
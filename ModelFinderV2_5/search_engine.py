@@ -0,0 +1,392 @@
+"""
+Search engine for model links.
+模型链接搜索引擎：多个浏览器标签页或HTTP会话并发搜索，按主机限速，结果交给调用线程统一写入。
+"""
+
+import os
+import time
+import queue
+import random
+import shutil
+import logging
+import re
+import tempfile
+import threading
+from html import unescape
+from html.parser import HTMLParser
+from urllib.parse import urlparse, quote_plus
+
+from .utils import import_optional, module_available
+
+logger = logging.getLogger(__name__)
+
+BING_BASE_URL = "https://www.bing.com"
+
+
+def browser_available():
+    """Whether DrissionPage is installed; it is only imported when a browser session starts."""
+    return module_available('DrissionPage')
+
+
+def bing_search_url(site_query, base_url=BING_BASE_URL):
+    """Bing results page URL for a query (same URL as the 搜索链接 column)."""
+    return f"{base_url}/search?q={quote_plus(site_query)}"
+
+
+class RateLimiter:
+    """
+    Per-host request pacing shared by all search workers. 按主机限速。
+    Each request to a host reserves the next free slot (min_interval plus random jitter after
+    the previous one), so N workers together never hit a host faster than one request per slot.
+    """
+
+    def __init__(self, min_interval=1.0, jitter=0.6):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url_or_host):
+        """Blocks until the host may be requested again."""
+        host = urlparse(url_or_host).netloc if '://' in url_or_host else url_or_host
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval + random.uniform(0, self.jitter)
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SearchBackend:
+    """
+    Interface of a search backend. 搜索后端接口。
+    search() returns a dict: error (status text when the search failed, else None), first_url and first_text
+    (first result link), liblib_links (all liblib.art links on the results page).
+    """
+    name = "base"
+
+    def search(self, bing_url, site_query):
+        raise NotImplementedError
+
+    def resolve_url(self, url):
+        """Follows a (redirect) link and returns the final URL, or None."""
+        return None
+
+    def close(self):
+        pass
+
+
+class ChromiumSearchBackend(SearchBackend):
+    """Searches Bing in one browser tab (ChromiumPage or ChromiumTab)."""
+    name = "chromium"
+
+    def __init__(self, tab, rate_limiter):
+        self.tab = tab
+        self.rate_limiter = rate_limiter
+
+    def reset_state(self):
+        try:
+            self.tab.clear_cache(session_storage=True, local_storage=True, cache=True, cookies=True)
+            logger.info("Cleared browser cache and cookies for search session.")
+        except Exception:
+            logger.warning("Failed to clear search browser cache/cookies.", exc_info=True)
+
+    def is_request_header_too_long_page(self):
+        try:
+            page_text = f"{self.tab.title or ''}\n{self.tab.html or ''}".lower()
+            return 'header field too long' in page_text or (
+                'http error 400' in page_text and 'request header' in page_text
+            )
+        except Exception:
+            return False
+
+    def search(self, bing_url, site_query):
+        """
+        Opens the results URL directly and parses #b_results. Loading the home page and typing
+        the query (search_via_form) is only used when the direct URL is blocked.
+        """
+        results_url = bing_search_url(site_query) + "&setlang=en-US"
+        self.rate_limiter.wait(results_url)
+        self.tab.get(results_url, timeout=15)
+        if not self.is_request_header_too_long_page():
+            hit = self._parse_results(timeout=5)
+            if not hit['error']:
+                return hit
+        logger.info("Direct Bing results URL blocked or empty, falling back to the search form: %s", site_query)
+        return self.search_via_form(bing_url, site_query)
+
+    def search_via_form(self, bing_url, site_query):
+        """Loads the Bing home page and submits the query through the search box."""
+        tab = self.tab
+        for attempt in range(2):
+            if attempt:
+                logger.info("Retrying Bing search after clearing browser state: %s", site_query)
+                self.reset_state()
+
+            self.rate_limiter.wait(bing_url)
+            tab.get(bing_url, timeout=15)
+            if self.is_request_header_too_long_page():
+                if attempt == 0:
+                    continue
+                return {'error': '搜索错误(Bing请求头过长)'}
+
+            search_box = tab.ele("#sb_form_q", timeout=5)
+            if not search_box:
+                return {'error': '搜索错误(无搜索框)'}
+            search_box.clear(); search_box.input(site_query)
+
+            s_button = tab.ele('#search_icon', timeout=3) or tab.ele('xpath://button[@type="submit"]', timeout=3)
+            if s_button: s_button.click()
+            else: tab.run_js("document.querySelector('#sb_form').submit();")
+            tab.wait.load_start(timeout=10)
+
+            if self.is_request_header_too_long_page():
+                if attempt == 0:
+                    continue
+                return {'error': '搜索错误(Bing请求头过长)'}
+            break
+        return self._parse_results()
+
+    def _parse_results(self, timeout=10):
+        results_container = self.tab.ele('#b_results', timeout=timeout)
+        if not results_container:
+            return {'error': '未找到(无结果区)'}
+        first_link = results_container.ele("xpath:.//h2/a")
+        liblib_links = [a.attr("href") for a in results_container.eles("xpath:.//a[contains(@href, 'liblib.art')]")]
+        return {'error': None,
+                'first_url': first_link.attr("href") if first_link else None,
+                'first_text': first_link.text if first_link else '',
+                'liblib_links': [link for link in liblib_links if link]}
+
+    def resolve_url(self, url):
+        self.rate_limiter.wait(url)
+        self.tab.get(url, timeout=15)
+        self.tab.wait.load_start(timeout=10)
+        return self.tab.url
+
+
+class BingResultsParser(HTMLParser):
+    """
+    Extracts the first result link (h2 > a) and all liblib.art links inside #b_results.
+    从Bing结果页中提取 #b_results 内的第一个结果链接和所有LibLib链接。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found_container = False
+        self.first_url = None
+        self.first_text = ''
+        self.liblib_links = []
+        # #b_results 内尚未关闭的元素，栈底为结果区本身，空表示不在结果区内。
+        # 结束标签弹出到与之匹配的元素为止，隐式关闭的元素(未写 </li>、</p> 等)随外层一起弹出
+        self._open_tags = []
+        self._in_h2 = 0
+        self._capturing_first = False
+        self._first_text_parts = []
+
+    _VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._VOID_TAGS:
+            return
+        attrs = dict(attrs)
+        if not self._open_tags:
+            if attrs.get('id') == 'b_results':
+                self.found_container = True
+                self._open_tags.append(tag)
+            return
+        self._open_tags.append(tag)
+        if tag == 'h2':
+            self._in_h2 += 1
+        elif tag == 'a':
+            href = attrs.get('href') or ''
+            if 'liblib.art' in href:
+                self.liblib_links.append(href)
+            if self._in_h2 and self.first_url is None and href:
+                self.first_url = href
+                self._capturing_first = True
+
+    def handle_endtag(self, tag):
+        if tag not in self._open_tags:
+            return  # 多余的结束标签，或不在结果区内
+        while self._open_tags:
+            closed = self._open_tags.pop()
+            if closed == 'h2' and self._in_h2:
+                self._in_h2 -= 1
+            elif closed == 'a' and self._capturing_first:
+                self._capturing_first = False
+                self.first_text = ''.join(self._first_text_parts).strip()
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self._capturing_first:
+            self._first_text_parts.append(data)
+
+
+class HttpSearchBackend(SearchBackend):
+    """
+    Browserless backend: fetches Bing results pages over a pooled keep-alive HTTP session and
+    parses them with BingResultsParser. base_url can point at a local stub server for tests.
+    """
+    name = "http"
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    # Bing的跳转链接 (bing.com/ck/a?...) 页面里用脚本跳转到真实地址
+    _REDIRECT_PATTERN = re.compile(r'var\s+u\s*=\s*"([^"]+)"')
+
+    def __init__(self, rate_limiter, base_url=BING_BASE_URL, session=None, timeout=15):
+        if session is None and not module_available('requests'):
+            raise RuntimeError("requests is not installed")
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._owns_session = session is None
+        self.session = session or self.create_session()
+
+    @classmethod
+    def create_session(cls, pool_size=4):
+        """A requests session with keep-alive connection pooling and browser-like headers."""
+        requests = import_optional('requests')
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(cls.HEADERS)
+        return session
+
+    def _get(self, url):
+        self.rate_limiter.wait(url)
+        return self.session.get(url, timeout=self.timeout)
+
+    def search(self, bing_url, site_query):
+        try:
+            response = self._get(bing_search_url(site_query, self.base_url) + "&setlang=en-US")
+        except Exception as e:
+            logger.warning(f"HTTP search request failed: {e}")
+            return {'error': '搜索错误(网络)'}
+        if response.status_code != 200:
+            return {'error': f'搜索错误(HTTP {response.status_code})'}
+        parser = BingResultsParser()
+        parser.feed(response.text)
+        parser.close()
+        if not parser.found_container:
+            return {'error': '未找到(无结果区)'}
+        return {'error': None, 'first_url': parser.first_url, 'first_text': parser.first_text,
+                'liblib_links': parser.liblib_links}
+
+    def resolve_url(self, url):
+        response = self._get(url)
+        match = self._REDIRECT_PATTERN.search(response.text) if 'text/html' in response.headers.get('Content-Type', '') else None
+        return unescape(match.group(1)) if match else response.url
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+
+
+class ChromiumSession:
+    """One isolated Chromium instance (temporary profile) with a tab per search worker."""
+
+    def __init__(self, chrome_path, tab_count, rate_limiter):
+        self.page = None
+        self.backends = []
+        drission = import_optional('DrissionPage')
+        if drission is None:
+            raise RuntimeError("DrissionPage is not installed")
+        self._tmp_dir = tempfile.mkdtemp(prefix="model_finder_search_")
+        try:
+            co = drission.ChromiumOptions(read_file=False).set_browser_path(chrome_path)
+            co.set_tmp_path(self._tmp_dir).auto_port()
+            co.set_cache_path(os.path.join(self._tmp_dir, "cache"))
+            co.set_argument('--disable-infobars').set_argument('--no-sandbox').set_argument('--start-maximized')
+            co.set_argument('--no-first-run').set_argument('--no-default-browser-check')
+            # co.set_argument('--headless')
+            self.page = drission.ChromiumPage(co)
+            first = ChromiumSearchBackend(self.page, rate_limiter)
+            first.reset_state()
+            self.backends.append(first)
+            for _ in range(1, max(1, tab_count)):
+                self.backends.append(ChromiumSearchBackend(self.page.new_tab(), rate_limiter))
+            logger.info("Browser initialized with %s tab(s), isolated temporary profile: %s", len(self.backends), self._tmp_dir)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self.page:
+            try:
+                self.page.quit()
+            except Exception:
+                logger.warning("Failed to quit search browser cleanly.", exc_info=True)
+            self.page = None
+        if self._tmp_dir:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+
+class SearchScheduler:
+    """
+    Runs search tasks on a bounded set of backends (one worker thread per backend) and
+    yields (task, result) back to the calling thread, which is the single writer of the results.
+    """
+    _DONE = object()
+
+    def __init__(self, backends, search_fn, on_task_start=None):
+        """
+        backends: list of SearchBackend, one per worker.
+        search_fn: callable(backend, task) -> result, run on the worker threads.
+        on_task_start: optional callable(task), run on the worker thread when a task is picked up.
+        """
+        self.backends = list(backends)
+        self.search_fn = search_fn
+        self.on_task_start = on_task_start
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Workers finish their current task and take no new ones."""
+        self._stop.set()
+
+    def run(self, tasks):
+        task_queue = queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+        result_queue = queue.Queue()
+
+        def worker(backend):
+            try:
+                while not self._stop.is_set():
+                    try:
+                        task = task_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    try:
+                        if self.on_task_start: self.on_task_start(task)
+                        result = self.search_fn(backend, task)
+                    except Exception as e:
+                        logger.error(f"Search worker ({backend.name}) failed on task", exc_info=True)
+                        result = e
+                    result_queue.put((task, result))
+            finally:
+                result_queue.put(self._DONE)
+
+        threads = [threading.Thread(target=worker, args=(backend,), daemon=True) for backend in self.backends]
+        for thread in threads:
+            thread.start()
+        remaining = len(threads)
+        try:
+            while remaining:
+                item = result_queue.get()
+                if item is self._DONE:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            # The consumer raised or closed the generator: stop the workers and wait for their
+            # current task, so the caller can safely close the browser afterwards.
+            self.stop()
+            for thread in threads:
+                thread.join()
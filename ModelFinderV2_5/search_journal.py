@@ -0,0 +1,253 @@
+"""
+搜索结果检查点与搜索会话
+搜索过程中每行结果先追加到JSONL日志，按行数或时间间隔批量写回CSV，
+写CSV时先写临时文件再 os.replace，程序中断后可从日志恢复已完成的结果。
+搜索会话记录每行的搜索状态、尝试次数和最后的错误，用于继续上次未完成的搜索。
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .file_manager import get_results_folder
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(path: str, write_fn: Callable[[str], None]):
+    """调用 write_fn 把内容写到同目录的临时文件，再原子替换目标文件。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class CheckpointWriter:
+    """
+    CSV搜索结果的检查点写入器。
+    record() 把一行的列值追加到 <csv>.journal；累计 flush_rows 行或距上次写回超过
+    flush_seconds 秒时，通过 write_csv 把完整表格原子写回CSV并清空日志。
+    """
+    JOURNAL_SUFFIX = ".journal"
+    DEFAULT_FLUSH_ROWS = 25
+    DEFAULT_FLUSH_SECONDS = 10.0
+
+    def __init__(self, csv_file: str, write_csv: Callable[[str], None],
+                 flush_rows: int = DEFAULT_FLUSH_ROWS, flush_seconds: float = DEFAULT_FLUSH_SECONDS):
+        """
+        Args:
+            csv_file: 结果CSV路径
+            write_csv: 把当前完整表格写到指定路径的函数
+            flush_rows: 累计多少行后写回CSV
+            flush_seconds: 距上次写回多少秒后写回CSV
+        """
+        self.csv_file = csv_file
+        self.journal_path = self.journal_path_for(csv_file)
+        self.write_csv = write_csv
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._journal = None
+
+    @classmethod
+    def journal_path_for(cls, csv_file: str) -> str:
+        return csv_file + cls.JOURNAL_SUFFIX
+
+    @classmethod
+    def read_journal(cls, csv_file: str) -> List[Dict]:
+        """
+        读取日志中的记录，忽略中断时写了一半的最后一行
+
+        Returns:
+            [{"row": 行号, "name": 文件名, "values": {列名: 值}}, ...]
+        """
+        journal_path = cls.journal_path_for(csv_file)
+        if not os.path.exists(journal_path):
+            return []
+        entries = []
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"忽略损坏的检查点记录: {journal_path}")
+        except Exception as e:
+            logger.error(f"读取检查点日志失败: {journal_path}, 错误: {e}")
+        return entries
+
+    def _open_journal(self):
+        """以追加方式打开日志。上次中断时写了一半的最后一行先截掉，避免新记录接在它后面一起损坏。"""
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                content = f.read()
+                if content and not content.endswith(b'\n'):
+                    f.truncate(content.rfind(b'\n') + 1)
+                    logger.warning(f"忽略中断时未写完的检查点记录: {self.journal_path}")
+        return open(self.journal_path, 'a', encoding='utf-8')
+
+    def record(self, row: int, values: Dict[str, str], name: str = '') -> bool:
+        """追加一行结果；达到阈值时写回CSV，返回是否进行了写回。"""
+        if self._journal is None:
+            self._journal = self._open_journal()
+        self._journal.write(json.dumps({'row': int(row), 'name': name, 'values': values}, ensure_ascii=False) + '\n')
+        self._journal.flush()
+        self._pending += 1
+        if self._pending >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            return self.compact()
+        return False
+
+    def compact(self) -> bool:
+        """把完整表格原子写回CSV并清空日志。写回失败时保留日志，下次运行可恢复。"""
+        try:
+            atomic_write(self.csv_file, self.write_csv)
+        except Exception as e:
+            logger.error(f"写回CSV失败，结果保留在检查点日志中: {self.csv_file}, 错误: {e}")
+            return False
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        except OSError as e:
+            logger.warning(f"删除检查点日志失败: {self.journal_path}, 错误: {e}")
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        return True
+
+    def close(self) -> bool:
+        """写回剩余结果。"""
+        return self.compact()
+
+
+class SearchSession:
+    """
+    一次搜索的会话记录，保存在 <csv>.session.json。
+    每行(以文件名为键)记录状态 pending / in_flight / done / failed、尝试次数、最后的错误和下次可重试的时间。
+    继续搜索时只处理未完成的行；反复失败的行按指数退避推迟，超过最大尝试次数后不再重试。
+    """
+    SESSION_SUFFIX = ".session.json"
+    LAST_SESSION_FILENAME = "last_search_session.json"
+    PENDING, IN_FLIGHT, DONE, FAILED = 'pending', 'in_flight', 'done', 'failed'
+    BACKOFF_BASE_SECONDS = 60
+    BACKOFF_MAX_SECONDS = 6 * 3600
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, csv_file: str, rows: Dict[str, Dict] = None, created: float = None):
+        self.csv_file = os.path.abspath(csv_file)
+        self.session_path = self.csv_file + self.SESSION_SUFFIX
+        self.rows = rows or {}
+        self.created = created or time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, csv_file: str) -> 'SearchSession':
+        """开始新的会话，并记为"上次搜索"。"""
+        session = cls(csv_file)
+        try:
+            atomic_write(os.path.join(get_results_folder(), cls.LAST_SESSION_FILENAME),
+                         lambda path: cls._write_json(path, {'csv_file': session.csv_file, 'created': session.created}))
+        except Exception as e:
+            logger.warning(f"记录上次搜索会话失败: {e}")
+        return session
+
+    @classmethod
+    def load(cls, csv_file: str) -> Optional['SearchSession']:
+        """加载CSV对应的会话，不存在或损坏时返回None。"""
+        session_path = os.path.abspath(csv_file) + cls.SESSION_SUFFIX
+        if not os.path.exists(session_path):
+            return None
+        try:
+            with open(session_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(csv_file, data.get('rows') or {}, data.get('created'))
+        except Exception as e:
+            logger.error(f"加载搜索会话失败: {session_path}, 错误: {e}")
+            return None
+
+    @classmethod
+    def last_session_csv(cls) -> Optional[str]:
+        """返回上次搜索会话的CSV路径，没有或文件已不存在时返回None。"""
+        try:
+            with open(os.path.join(get_results_folder(), cls.LAST_SESSION_FILENAME), 'r', encoding='utf-8') as f:
+                csv_file = json.load(f).get('csv_file')
+        except (OSError, ValueError):
+            return None
+        return csv_file if csv_file and os.path.exists(csv_file) else None
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    def add_pending(self, name: str):
+        with self._lock:
+            row = self.rows.setdefault(name, {'state': self.PENDING, 'attempts': 0, 'last_error': '', 'retry_after': 0})
+            if row['state'] == self.IN_FLIGHT:
+                row['state'] = self.PENDING  # 上次运行中断时正在搜索的行
+
+    def is_runnable(self, name: str, now: float = None) -> bool:
+        """该行在本次继续搜索中是否需要处理。"""
+        with self._lock:
+            row = self.rows.get(name)
+            if row is None or row['state'] in (self.PENDING, self.IN_FLIGHT):
+                return True
+            if row['state'] == self.DONE or row['attempts'] >= self.MAX_ATTEMPTS:
+                return False
+            return (now or time.time()) >= row.get('retry_after', 0)
+
+    def mark_in_flight(self, name: str):
+        with self._lock:
+            row = self.rows.setdefault(name, {'state': self.PENDING, 'attempts': 0, 'last_error': '', 'retry_after': 0})
+            row['state'] = self.IN_FLIGHT
+
+    def mark_done(self, name: str):
+        with self._lock:
+            row = self.rows.setdefault(name, {'attempts': 0, 'last_error': '', 'retry_after': 0})
+            row['state'] = self.DONE
+            row['attempts'] = row.get('attempts', 0) + 1
+
+    def mark_failed(self, name: str, error: str):
+        with self._lock:
+            row = self.rows.setdefault(name, {'attempts': 0, 'last_error': '', 'retry_after': 0})
+            row['state'] = self.FAILED
+            row['attempts'] = row.get('attempts', 0) + 1
+            row['last_error'] = error
+            delay = min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2 ** (row['attempts'] - 1))
+            row['retry_after'] = time.time() + delay
+
+    def summary(self) -> Dict[str, int]:
+        """各状态的行数。"""
+        with self._lock:
+            counts = {self.PENDING: 0, self.IN_FLIGHT: 0, self.DONE: 0, self.FAILED: 0}
+            for row in self.rows.values():
+                counts[row['state']] = counts.get(row['state'], 0) + 1
+            return counts
+
+    def save(self) -> bool:
+        with self._lock:
+            data = {'csv_file': self.csv_file, 'created': self.created, 'updated': time.time(),
+                    'rows': {name: dict(row) for name, row in self.rows.items()}}
+        try:
+            atomic_write(self.session_path, lambda path: self._write_json(path, data))
+            return True
+        except Exception as e:
+            logger.error(f"保存搜索会话失败: {self.session_path}, 错误: {e}")
+            return False
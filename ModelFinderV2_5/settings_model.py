@@ -15,7 +15,14 @@ class SettingsModel:
         'chrome_path': '',
         'random_theme': True,
         'theme': 'cosmo', # Default theme
-        'retention_days': 30
+        'retention_days': 30,
+        'models_root': '', # ComfyUI/models directory used for missing-model checks
+        'batch_workers': 0, # Worker count for batch workflow analysis, 0 = one per CPU
+        'search_workers': 4, # Browser tabs / HTTP sessions searching concurrently
+        'search_backend': 'auto', # 'auto' = HTTP first with browser fallback, 'http' or 'chromium'
+        'hf_api_base': 'https://huggingface.co', # HF model API used for exact filename lookup (e.g. https://hf-mirror.com), empty = off
+        'report_page_size': 5000, # Rows per HTML report page; larger reports are split into pages with an index, 0 = single file
+        'registry_backend': 'sqlite' # Model registry storage: 'sqlite' (imports model_registry.json on first run) or 'json'
     }
 
     def __init__(self):
@@ -7,21 +7,41 @@ import os
 import sys
 import subprocess
 import traceback
+import importlib
+import importlib.util
+import codecs
+import glob
+import html
+import itertools
+import json
+from datetime import datetime
 from urllib.parse import urlparse, urljoin
 import csv
-# Ensure pandas is imported if check_dependencies doesn't handle it early enough
-try:
-    import pandas as pd
-except ImportError:
-    print("错误：缺少 pandas 库。请先运行依赖检查或手动安装 `pip install pandas`。")
-    # Optionally, you could call check_dependencies() here or exit
-    # check_dependencies()
-    # sys.exit(1)
+
+
+def import_optional(module_name):
+    """按需导入可选依赖，未安装时返回None (Import an optional dependency on first use; None if not installed)
+
+    DrissionPage、requests 等较重的库只在第一次搜索时才导入，缩短程序启动时间。
+    导入后的模块由 sys.modules 缓存，重复调用没有额外开销。
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def module_available(module_name):
+    """检查模块是否已安装但不导入它 (Check whether a module is installed without importing it)"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
 
 
 def check_dependencies():
     """检查并安装缺失依赖 (Check and install missing dependencies)"""
-    required_packages = {"pandas": "pandas", "DrissionPage": "DrissionPage", "ttkbootstrap": "ttkbootstrap"}
+    required_packages = {"DrissionPage": "DrissionPage", "ttkbootstrap": "ttkbootstrap", "requests": "requests"}
     missing_packages = []
 
     for package, pip_name in required_packages.items():
@@ -128,68 +148,25 @@ def get_mirror_link(original_url):
         print(f"构建镜像链接时出错 (Error building mirror link): {e}")
         return ''
 
-def create_html_view(csv_file):
-    """创建改进的HTML视图，包含表头筛选、批量复制和统一字体 (Create improved HTML view with header filtering, batch copy, and unified font)
-
-    参数 (Args):
-        csv_file: CSV文件路径，可能是单个工作流的结果或汇总文件 (CSV file path, could be result of a single workflow or a summary file)
+# --- HTML 报告 (HTML report) ---
 
-    返回 (Returns):
-        生成的HTML文件路径，失败则返回None (Path to the generated HTML file, or None on failure)
-    """
-    # Ensure pandas is available before proceeding
-    if 'pd' not in globals():
-         print("错误: pandas 库未加载。无法创建 HTML 视图。")
-         return None
+# 报告中列的默认顺序，其余列排在后面 (Preferred column order in the report; other columns follow)
+REPORT_COLUMN_ORDER = ['序号', '文件名', '节点ID', '节点类型', '下载链接', '镜像链接', 'hf镜像', '搜索链接', '状态', 'CSV文件', '工作流文件', '缺失数量']
+MIRROR_LINK_COLUMNS = ('镜像链接', 'hf镜像')
+FILE_NAME_COLUMNS = ('文件名', 'CSV文件', '工作流文件')
+REPORT_WRITE_BUFFER = 256 * 1024 # 输出文件的写缓冲大小 (Write buffer size of the report file)
+ENCODING_SNIFF_BYTES = 64 * 1024 # 判断编码时读取的字节数 (Bytes read to detect the encoding)
+REPORT_ASSET_CSS = "model_finder_report.css" # 分页报告共享的样式和脚本 (CSS/JS shared by paginated report pages)
+REPORT_ASSET_JS = "model_finder_report.js"
 
-    try:
-        # 添加调试信息 (Add debug info)
-        print(f"正在为 {csv_file} 创建HTML视图 (Creating HTML view for {csv_file})")
-
-        # 读取CSV文件并尝试不同的编码 (Read CSV file and try different encodings)
-        df = None
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'gbk', 'gb18030']
-        for enc in encodings_to_try:
-            try:
-                df = pd.read_csv(csv_file, encoding=enc)
-                print(f"使用 {enc} 成功读取CSV，列名 (Successfully read CSV using {enc}, columns): {df.columns.tolist()}")
-                break # Stop trying once successful
-            except UnicodeDecodeError:
-                print(f"尝试 {enc} 编码失败 (Failed trying {enc} encoding)")
-            except Exception as e:
-                print(f"读取CSV文件时发生其他错误 (Other error reading CSV file): {e}")
-                # Don't break here, maybe another encoding works
-
-        if df is None:
-            print(f"读取CSV文件失败，尝试了 {encodings_to_try} (Failed to read CSV file after trying {encodings_to_try})")
-            return None
-
-        # 确定核心列 (Determine core columns)
-        # Find the actual column name for mirror links, case-insensitive check
-        mirror_link_col = None
-        for col in df.columns:
-            if col.lower() == '镜像链接' or col.lower() == 'hf镜像':
-                 mirror_link_col = col
-                 break
-
-        if not mirror_link_col:
-            print("警告: CSV文件中未找到 '镜像链接' 或 'hf镜像' 列。批量复制功能将不可用。(Warning: '镜像链接' or 'hf镜像' column not found in CSV. Batch copy feature will be unavailable.)")
-            # Continue without batch copy feature if column is missing
-
-        # 生成HTML文件名 (Generate HTML filename)
-        html_file = os.path.splitext(csv_file)[0] + '.html'
-
-        # --- HTML Head and Styles ---
-        html_content = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>模型下载链接 (Model Download Links)</title>
-            <style>
+_REPORT_STYLE = """
                 body { font-family: "Microsoft YaHei", Arial, sans-serif; margin: 20px; }
-                table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }
-                th, td { border: 1px solid #ddd; padding: 8px; text-align: left; word-wrap: break-word; } /* Added word-wrap */
+                table { border-collapse: collapse; width: 100%; }
+                th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+                /* 只渲染可见行，行高固定，过长的内容用省略号 (Only visible rows are rendered; rows have a fixed height) */
+                .table-container { max-height: 75vh; overflow-y: auto; margin-bottom: 20px; border: 1px solid #ddd; }
+                td { white-space: nowrap; overflow: hidden; text-overflow: ellipsis; max-width: 420px; }
+                tr.spacer td { padding: 0; border: none; }
                 th {
                     background-color: #f2f2f2;
                     position: sticky;
@@ -200,7 +177,7 @@ def create_html_view(csv_file):
                 }
                 th:hover { background-color: #e0e0e0; }
                 th .filter-icon { margin-left: 5px; font-size: 12px; color: #666; }
-                tr:nth-child(even) { background-color: #f9f9f9; }
+                tr.alt { background-color: #f9f9f9; }
                 a { text-decoration: none; color: #0066cc; } /* Default link color */
                 a:hover { text-decoration: underline; }
                 .status-processed { color: green; font-weight: bold; }
@@ -215,6 +192,7 @@ def create_html_view(csv_file):
                 .liblib-link a { background-color: #ccffcc; color: #00aa00; } /* LibLib */
                 .no-link { color: #999; text-align: center; font-size: 14px; } /* Style for '×暂无' */
 
+                .page-nav { margin: 10px 0; }
                 .summary { margin-top: 20px; padding: 10px; background-color: #f8f8f8; border-radius: 5px; }
                 .section-title { font-size: 1.2em; margin-top: 30px; margin-bottom: 10px; font-weight: bold; }
                 .controls-box { margin-bottom: 20px; padding: 10px; background: #f0f0f0; border-radius: 5px; display: flex; align-items: center; gap: 15px; flex-wrap: wrap; }
@@ -254,18 +232,9 @@ def create_html_view(csv_file):
                 .filter-buttons { display: flex; justify-content: space-between; margin-top: 5px; padding-top: 5px; border-top: 1px solid #eee; }
                 .filter-apply, .filter-clear { padding: 3px 8px; cursor: pointer; background-color: #f0f0f0; border: 1px solid #ccc; border-radius: 3px; font-size: 12px; }
                 .filter-apply:hover, .filter-clear:hover { background-color: #e0e0e0; }
-            </style>
-        </head>
-        <body>
-            <h1>模型下载链接 (Model Download Links)</h1>
-        """
-
-        # --- File Info and Usage Guide ---
-        file_basename = os.path.basename(csv_file)
-        html_content += f"""
-            <p>源文件 (Source File): {file_basename}</p>
-            <p>生成时间 (Generated Time): {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+"""
 
+_REPORT_GUIDE = """
             <div class="usage-guide">
                 <p><strong>使用说明 (Instructions):</strong></p>
                 <ul>
@@ -278,140 +247,9 @@ def create_html_view(csv_file):
                     <li>使用 "批量复制镜像链接" 按钮复制当前可见的 HF 镜像链接到剪贴板，可粘贴到下载工具。(Use "Batch Copy Mirror Links" button to copy visible HF Mirror links to clipboard for download tools.)</li>
                 </ul>
             </div>
-        """
-
-        # --- Controls: Filter and Batch Copy Button ---
-        # Only show controls if it's a model list (has '文件名' column)
-        if '文件名' in df.columns:
-            html_content += """
-            <div class="controls-box">
-                <div>
-                    <label for="filterInput">筛选模型名称 (Filter Model Name): </label>
-                    <input type="text" id="filterInput" onkeyup="filterTable()" placeholder="输入关键词... (Enter keywords...)">
-                </div>
-            """
-            # Add Batch Copy button only if mirror link column exists
-            if mirror_link_col:
-                 html_content += """
-                 <div>
-                     <button id="copyButton" onclick="batchCopyMirrorLinks()">批量复制镜像链接 (Batch Copy Mirror Links)</button>
-                     <span id="copyMessage"></span>
-                 </div>
-                 """
-            html_content += "</div>" # Close controls-box
-
-        # --- Table Generation ---
-        html_content += '<table id="modelTable">\n<thead>\n<tr>\n' # Use thead for sticky header
-
-        # Generate Table Headers
-        display_columns = []
-        col_name_map = {} # To store original column names for data access
-        mirror_link_col_index = -1 # Track index for JS
-
-        # Define preferred column order (can be adjusted)
-        preferred_order = ['序号', '文件名', '节点ID', '节点类型', '下载链接', '镜像链接', 'hf镜像', '搜索链接', '状态', 'CSV文件', '工作流文件', '缺失数量']
-        available_cols_ordered = [col for col in preferred_order if col in df.columns or col.lower() in [c.lower() for c in df.columns]]
-        # Add any remaining columns not in preferred order
-        remaining_cols = [col for col in df.columns if col not in available_cols_ordered and col.lower() not in [c.lower() for c in available_cols_ordered]]
-        final_column_order = available_cols_ordered + remaining_cols
-
-        col_index_counter = 0
-        for col in final_column_order:
-             # Find the actual case-sensitive column name from df.columns
-             actual_col = next((c for c in df.columns if c.lower() == col.lower()), None)
-             if not actual_col: continue # Skip if somehow column doesn't exist
-
-             display_columns.append(actual_col)
-             col_name_map[col_index_counter] = actual_col # Map index to actual name
-
-             # Display Name Mapping
-             display_name = actual_col
-             if actual_col.lower() == '下载链接': display_name = 'HuggingFace'
-             elif actual_col.lower() == '镜像链接' or actual_col.lower() == 'hf镜像':
-                 display_name = 'HF镜像 (Mirror)'
-                 mirror_link_col_index = col_index_counter # Store the index
-             elif actual_col.lower() == '搜索链接': display_name = 'LibLib'
-
-             # Add header cell with sorting and filtering
-             html_content += f'<th onclick="sortTable({col_index_counter})">{display_name}<span class="filter-icon" onclick="event.stopPropagation(); showFilter(event, {col_index_counter})">▼</span></th>\n'
-             col_index_counter += 1
-
-        html_content += "</tr>\n</thead>\n<tbody>\n" # Close thead, open tbody
-
-        # Generate Table Rows
-        row_count = 0
-        for index, row in df.iterrows():
-            row_count += 1
-            html_content += "<tr>\n"
-
-            for i in range(len(display_columns)):
-                actual_col_name = display_columns[i] # Get the correct column name
-                value = row.get(actual_col_name, '')
-                if pd.isna(value):
-                    value = ''
-
-                # --- Cell Formatting ---
-                if actual_col_name == '状态':
-                    status_class = "status-notfound" # Default
-                    if isinstance(value, str):
-                        if '已处理' in value or 'Found' in value: status_class = "status-processed"
-                        elif '错误' in value or 'Error' in value: status_class = "status-error"
-                    html_content += f'<td class="{status_class}">{value}</td>\n'
-
-                elif actual_col_name in ['文件名', 'CSV文件', '工作流文件']:
-                    html_content += f'<td class="file-name">{value}</td>\n'
-
-                elif actual_col_name.lower() in ['下载链接', '镜像链接', 'hf镜像', '搜索链接']:
-                    link_text = "✓" # Default symbol
-                    link_class = "link-col"
-                    tooltip = ""
-                    target_url = str(value).strip() if value else ""
-
-                    if target_url:
-                        if actual_col_name.lower() == '下载链接':
-                             if 'huggingface' in target_url:
-                                 link_class += " hf-link"
-                                 link_text = "✓ HF"
-                                 tooltip = "跳转到HuggingFace模型页面 (Go to HuggingFace)"
-                             elif 'liblib' in target_url: # Handle cases where liblib link might be in '下载链接'
-                                 link_class += " liblib-link"
-                                 link_text = "✓ LibLib"
-                                 tooltip = "跳转到LibLib模型页面 (Go to LibLib)"
-                             else: # Generic link
-                                 tooltip = "跳转到下载页面 (Go to download page)"
-                                 link_text = "✓ Link"
-
-                        elif actual_col_name.lower() == '镜像链接' or actual_col_name.lower() == 'hf镜像':
-                             link_class += " mirror-link"
-                             link_text = "✓ 镜像 (Mirror)"
-                             tooltip = "跳转到HF镜像下载页面 (Go to HF Mirror)"
-
-                        elif actual_col_name.lower() == '搜索链接':
-                             link_class += " liblib-link"
-                             link_text = "✓ LibLib"
-                             tooltip = "跳转到LibLib模型页面 (Go to LibLib)"
-
-                        html_content += f'<td class="{link_class}"><a href="{target_url}" target="_blank" title="{tooltip}">{link_text}</a></td>\n'
-                    else:
-                        # No link
-                        html_content += '<td class="no-link">× 暂无 (None)</td>\n'
-                else:
-                    # Other columns
-                    html_content += f'<td>{value}</td>\n'
-
-            html_content += "</tr>\n"
-
-        # --- Table End and Summary ---
-        html_content += "</tbody>\n</table>\n" # Close tbody and table
-
-        html_content += f"""
-            <div class="summary">
-                <p>总记录数 (Total Records): {row_count}</p>
-            </div>
-        """
+"""
 
-        # --- Filter Dropdown Element ---
-        html_content += """
+_REPORT_FILTER_DROPDOWN = """
             <div id="filterDropdown" class="dropdown-content">
                 <input type="text" class="dropdown-search" placeholder="搜索筛选项... (Search filter options...)" id="filterSearchInput" onkeyup="filterDropdownItems()">
                 <div id="dropdown-items"></div>
@@ -420,27 +258,244 @@ def create_html_view(csv_file):
                     <button class="filter-clear" onclick="clearFilter()">清除 (Clear)</button>
                 </div>
             </div>
-        """
-
-        # --- JavaScript Section ---
-        # IMPORTANT: Use regular triple quotes """, not f""" for the script block
-        # to avoid Python interpreting JS curly braces.
-        html_content += f"""
-            <script>
-            // Pass Python variable to JS before the main script block
-            var mirrorLinkColumnIndex = {mirror_link_col_index};
-            </script>
-        """
-        # Now add the main script block as a regular string
-        html_content += """
-            <script>
-            // Global variables for filtering and table access
+"""
+
+_REPORT_SCRIPT = """
+            // 表格数据以JSON嵌入页面，只渲染可见的行 (Rows are embedded as JSON; only visible rows are rendered)
+            var reportData = JSON.parse(document.getElementById("reportData").textContent);
+            var columns = reportData.columns;
+            var rows = reportData.rows;
+            var mirrorLinkColumnIndex = reportData.mirrorColumn;
+            var OVERSCAN_ROWS = 10; // 可见区域上下额外渲染的行数 (Extra rows rendered above and below the viewport)
+
+            var tableContainer = document.getElementById("tableContainer");
+            var tableBody = document.getElementById("tableBody");
+            var headerRow = document.getElementById("headerRow");
+            var tableHeaders = [];
+
+            var order = rows.map(function(_, i) { return i; }); // 当前排序下的全部行 (All rows in sort order)
+            var view = order;                                   // 通过筛选的行 (Rows passing the filters)
+            var sortState = { column: -1, dir: "asc" };
             var currentFilterColumn = -1;
-            var currentFilterValues = {}; // Stores active filters: {colIndex: [value1, value2]}
-            var modelTable = document.getElementById("modelTable");
-            var tableHeaders = modelTable.querySelectorAll("thead th"); // Target thead headers
-            var tableBody = modelTable.querySelector("tbody"); // Target tbody for rows
-            // mirrorLinkColumnIndex is already defined in the previous script tag
+            var columnFilters = {};  // {colIndex: Uint8Array, 按值编号标记允许的值 (allowed flag per value id)}
+            var globalFilter = "";
+            var rowHeight = 0;
+            var renderedRange = [-1, -1];
+            var renderPending = false;
+
+            // --- 每列预先计算的数据 (Per-column precomputed data) ---
+            var cellTexts = columns.map(function(col, c) { return rows.map(function(row) { return cellText(c, row[c]); }); });
+            var valueIndexes = {};   // 按需建立 (Built on demand): {values, counts, codes}
+            var sortKeys = {};       // 按需建立 (Built on demand): {num, str, link}
+            var searchTexts = null;  // 全局筛选用的整行文本 (Row text for the global filter), built on first use
+
+            function linkLabel(c, value) {
+                var kind = columns[c].kind;
+                if (kind === "hf") {
+                    if (value.indexOf("huggingface") >= 0) return ["✓ HF", "hf-link", "跳转到HuggingFace模型页面 (Go to HuggingFace)"];
+                    if (value.indexOf("liblib") >= 0) return ["✓ LibLib", "liblib-link", "跳转到LibLib模型页面 (Go to LibLib)"];
+                    return ["✓ Link", "", "跳转到下载页面 (Go to download page)"];
+                }
+                if (kind === "mirror") return ["✓ 镜像 (Mirror)", "mirror-link", "跳转到HF镜像下载页面 (Go to HF Mirror)"];
+                return ["✓ LibLib", "liblib-link", "跳转到LibLib模型页面 (Go to LibLib)"];
+            }
+
+            function isLinkColumn(c) {
+                var kind = columns[c].kind;
+                return kind === "hf" || kind === "mirror" || kind === "liblib";
+            }
+
+            // 单元格显示的文本，筛选和排序都基于它 (Displayed cell text; filters and sorting use it)
+            function cellText(c, value) {
+                if (isLinkColumn(c)) return value.trim() ? linkLabel(c, value.trim())[0] : "× 暂无 (None)";
+                return value.trim();
+            }
+
+            function getValueIndex(c) {
+                if (!valueIndexes[c]) {
+                    var texts = cellTexts[c];
+                    var unique = Array.from(new Set(texts)).sort();
+                    var ids = new Map(unique.map(function(value, i) { return [value, i]; }));
+                    var codes = new Int32Array(texts.length);
+                    var counts = new Int32Array(unique.length);
+                    for (var r = 0; r < texts.length; r++) {
+                        var id = ids.get(texts[r]);
+                        codes[r] = id;
+                        counts[id]++;
+                    }
+                    valueIndexes[c] = { values: unique, counts: counts, codes: codes };
+                }
+                return valueIndexes[c];
+            }
+
+            function getSortKeys(c) {
+                if (!sortKeys[c]) {
+                    var texts = cellTexts[c];
+                    var num = new Float64Array(texts.length);
+                    var str = new Array(texts.length);
+                    var link = isLinkColumn(c) ? new Uint8Array(texts.length) : null;
+                    for (var r = 0; r < texts.length; r++) {
+                        str[r] = texts[r].toLowerCase();
+                        num[r] = link ? NaN : parseFloat(texts[r].replace(/,/g, "")); // Handle commas in numbers
+                        if (link) link[r] = rows[r][c].trim() ? 1 : 0;
+                    }
+                    sortKeys[c] = { num: num, str: str, link: link };
+                }
+                return sortKeys[c];
+            }
+
+            // --- Sorting Function ---
+            function sortTable(c) {
+                var dir = (sortState.column === c && sortState.dir === "asc") ? "desc" : "asc";
+                var keys = getSortKeys(c);
+                var sign = dir === "asc" ? 1 : -1;
+                order = order.slice().sort(function(a, b) {
+                    var result;
+                    if (keys.link && keys.link[a] !== keys.link[b]) {
+                        result = keys.link[b] - keys.link[a]; // 有链接的行在前 (Links first when ascending)
+                    } else {
+                        var aNum = !isNaN(keys.num[a]), bNum = !isNaN(keys.num[b]);
+                        if (aNum && bNum) result = keys.num[a] - keys.num[b];
+                        else if (aNum !== bNum) result = aNum ? -1 : 1; // 数字在文本之前 (Numbers before text)
+                        else result = keys.str[a] < keys.str[b] ? -1 : (keys.str[a] > keys.str[b] ? 1 : 0);
+                    }
+                    return result * sign || a - b;
+                });
+                sortState = { column: c, dir: dir };
+                refreshView();
+            }
+
+            // --- Filtering ---
+            function passesFilters(r) {
+                for (var c in columnFilters) {
+                    if (!columnFilters[c][valueIndexes[c].codes[r]]) return false;
+                }
+                return !globalFilter || searchTexts[r].indexOf(globalFilter) > -1;
+            }
+
+            function refreshView() {
+                if (globalFilter && !searchTexts) {
+                    searchTexts = rows.map(function(_, r) {
+                        return cellTexts.map(function(texts) { return texts[r]; }).join("\\u0001").toUpperCase();
+                    });
+                }
+                var hasFilters = globalFilter || Object.keys(columnFilters).length > 0;
+                view = hasFilters ? order.filter(passesFilters) : order;
+                document.getElementById("visibleCount").textContent = view.length;
+                updateHeaderIcons();
+                renderRows(true);
+            }
+
+            // --- Global Text Filter Function ---
+            function filterTable() {
+                var input = document.getElementById("filterInput");
+                globalFilter = input ? input.value.toUpperCase() : ""; // Handle case where input might not exist
+                refreshView();
+            }
+
+            // --- Virtualized rendering ---
+            function spacerRow(height) {
+                var tr = document.createElement("tr");
+                tr.className = "spacer";
+                var td = document.createElement("td");
+                td.colSpan = columns.length;
+                td.style.height = height + "px";
+                tr.appendChild(td);
+                return tr;
+            }
+
+            function buildCell(c, value, text) {
+                var td = document.createElement("td");
+                var kind = columns[c].kind;
+                if (isLinkColumn(c)) {
+                    var url = value.trim();
+                    if (!url) {
+                        td.className = "no-link";
+                        td.textContent = text;
+                        return td;
+                    }
+                    var label = linkLabel(c, url);
+                    td.className = "link-col " + label[1];
+                    var a = document.createElement("a");
+                    a.href = url;
+                    a.target = "_blank";
+                    a.title = label[2];
+                    a.textContent = label[0];
+                    td.appendChild(a);
+                    return td;
+                }
+                if (kind === "status") {
+                    td.className = (value.indexOf("已处理") >= 0 || value.indexOf("Found") >= 0) ? "status-processed"
+                        : ((value.indexOf("错误") >= 0 || value.indexOf("Error") >= 0) ? "status-error" : "status-notfound");
+                } else if (kind === "file") {
+                    td.className = "file-name";
+                }
+                td.textContent = value;
+                td.title = value;
+                return td;
+            }
+
+            function buildRow(r, position) {
+                var tr = document.createElement("tr");
+                if (position % 2) tr.className = "alt";
+                var row = rows[r];
+                for (var c = 0; c < columns.length; c++) tr.appendChild(buildCell(c, row[c], cellTexts[c][r]));
+                return tr;
+            }
+
+            function renderRows(force) {
+                var height = rowHeight || 36;
+                var visible = Math.ceil(tableContainer.clientHeight / height) + 1;
+                var start = Math.max(0, Math.floor(tableContainer.scrollTop / height) - OVERSCAN_ROWS);
+                var end = Math.min(view.length, start + visible + 2 * OVERSCAN_ROWS);
+                if (!force && start === renderedRange[0] && end === renderedRange[1]) return;
+                renderedRange = [start, end];
+
+                var fragment = document.createDocumentFragment();
+                fragment.appendChild(spacerRow(start * height));
+                for (var i = start; i < end; i++) fragment.appendChild(buildRow(view[i], i));
+                fragment.appendChild(spacerRow((view.length - end) * height));
+                tableBody.textContent = "";
+                tableBody.appendChild(fragment);
+
+                // 第一次渲染后测量实际行高 (Measure the real row height after the first render)
+                if (!rowHeight && end > start) {
+                    rowHeight = tableBody.rows[1].offsetHeight || height;
+                    renderRows(true);
+                }
+            }
+
+            tableContainer.addEventListener("scroll", function() {
+                if (renderPending) return;
+                renderPending = true;
+                window.requestAnimationFrame(function() {
+                    renderPending = false;
+                    renderRows(false);
+                });
+            });
+            window.addEventListener("resize", function() { renderRows(true); });
+
+            // --- Header ---
+            function updateHeaderIcons() {
+                for (var c = 0; c < tableHeaders.length; c++) {
+                    var icon = tableHeaders[c].querySelector(".filter-icon");
+                    if (c === sortState.column) icon.textContent = sortState.dir === "asc" ? "▲" : "▼";
+                    else icon.textContent = columnFilters[c] ? "🔍" : "▼";
+                }
+            }
+
+            columns.forEach(function(col, c) {
+                var th = document.createElement("th");
+                th.textContent = col.title;
+                th.onclick = function() { sortTable(c); };
+                var icon = document.createElement("span");
+                icon.className = "filter-icon";
+                icon.textContent = "▼";
+                icon.onclick = function(event) { event.stopPropagation(); showFilter(event, c); };
+                th.appendChild(icon);
+                headerRow.appendChild(th);
+                tableHeaders.push(th);
+            });
 
             // --- Batch Copy Function ---
             function batchCopyMirrorLinks() {
@@ -449,187 +504,39 @@ def create_html_view(csv_file):
                     return;
                 }
 
-                var links = [];
-                var rows = tableBody.getElementsByTagName("tr");
                 var copyButton = document.getElementById("copyButton");
                 var copyMessage = document.getElementById("copyMessage");
-
                 copyButton.disabled = true; // Disable button during copy
                 copyMessage.textContent = "正在复制... (Copying...)";
 
-                for (var i = 0; i < rows.length; i++) {
-                    // Check if row is visible (not display: none)
-                    if (rows[i].style.display !== "none") {
-                        var cells = rows[i].getElementsByTagName("td");
-                        if (cells.length > mirrorLinkColumnIndex) {
-                            var cell = cells[mirrorLinkColumnIndex];
-                            var linkElement = cell.querySelector("a"); // Find the link within the cell
-                            if (linkElement && linkElement.href) {
-                                links.push(linkElement.href);
-                            }
-                        }
-                    }
+                var links = [];
+                for (var i = 0; i < view.length; i++) { // 所有通过筛选的行，而不只是已渲染的行 (All filtered rows, not just rendered ones)
+                    var url = rows[view[i]][mirrorLinkColumnIndex].trim();
+                    if (url) links.push(url);
+                }
+
+                function resetButton(delay) {
+                    setTimeout(function() {
+                        copyMessage.textContent = "";
+                        copyButton.textContent = "批量复制镜像链接 (Batch Copy Mirror Links)";
+                        copyButton.disabled = false;
+                    }, delay);
                 }
 
                 if (links.length > 0) {
-                    var linksText = links.join("\\n"); // Join with newlines for Thunder
-                    navigator.clipboard.writeText(linksText).then(function() {
+                    navigator.clipboard.writeText(links.join("\\n")).then(function() { // Join with newlines for Thunder
                         copyMessage.textContent = `✓ 已复制 ${links.length} 条链接! (Copied ${links.length} links!)`;
                         copyButton.textContent = "复制成功 (Copied!)";
-                        setTimeout(() => { // Reset message and button after a delay
-                            copyMessage.textContent = "";
-                            copyButton.textContent = "批量复制镜像链接 (Batch Copy Mirror Links)";
-                            copyButton.disabled = false;
-                        }, 3000); // Reset after 3 seconds
+                        resetButton(3000);
                     }, function(err) {
                         copyMessage.textContent = "复制失败! (Copy failed!)";
                         console.error('Async: Could not copy text: ', err);
                         alert("复制失败，请检查浏览器权限或手动复制。(Copy failed. Check browser permissions or copy manually.)");
-                        copyButton.disabled = false; // Re-enable button on failure
-                        copyButton.textContent = "批量复制镜像链接 (Batch Copy Mirror Links)";
+                        resetButton(0);
                     });
                 } else {
                     copyMessage.textContent = "没有可见的镜像链接可复制。(No visible mirror links to copy.)";
-                     setTimeout(() => {
-                         copyMessage.textContent = "";
-                         copyButton.disabled = false;
-                         copyButton.textContent = "批量复制镜像链接 (Batch Copy Mirror Links)";
-                     }, 3000);
-                }
-            }
-
-            // --- Sorting Function ---
-            function sortTable(n) {
-                var switching, i, x, y, shouldSwitch, dir, switchcount = 0;
-                switching = true;
-                dir = "asc"; // Default sort direction
-
-                // Get current sort direction from header icon if available
-                var currentIcon = tableHeaders[n].querySelector(".filter-icon").textContent;
-                if (currentIcon === "▲") {
-                    dir = "desc"; // If already ascending, switch to descending
-                }
-
-                while (switching) {
-                    switching = false;
-                    var rows = tableBody.getElementsByTagName("tr"); // Use tbody rows
-
-                    for (i = 0; i < (rows.length - 1); i++) {
-                        shouldSwitch = false;
-                        x = rows[i].getElementsByTagName("TD")[n];
-                        y = rows[i + 1].getElementsByTagName("TD")[n];
-
-                        var xText = x.textContent || x.innerText;
-                        var yText = y.textContent || y.innerText;
-
-                        // Handle link columns ('✓' vs '×')
-                        var xIsLink = x.querySelector("a") !== null;
-                        var yIsLink = y.querySelector("a") !== null;
-
-                        if (x.classList.contains('link-col') || x.classList.contains('no-link')) {
-                             if (dir == "asc") { // Links first
-                                 shouldSwitch = !xIsLink && yIsLink;
-                             } else { // No links first
-                                 shouldSwitch = xIsLink && !yIsLink;
-                             }
-                             // If both are links or both not links, sort by text (e.g., "✓ HF" vs "✓ Mirror")
-                             if (xIsLink === yIsLink) {
-                                 if (dir == "asc") {
-                                     shouldSwitch = xText.toLowerCase() > yText.toLowerCase();
-                                 } else {
-                                     shouldSwitch = xText.toLowerCase() < yText.toLowerCase();
-                                 }
-                             }
-                        } else {
-                            // Attempt numeric sort first
-                            var xNum = parseFloat(xText.replace(/,/g, '')); // Handle commas in numbers
-                            var yNum = parseFloat(yText.replace(/,/g, ''));
-
-                            if (!isNaN(xNum) && !isNaN(yNum)) {
-                                if (dir == "asc") {
-                                    shouldSwitch = xNum > yNum;
-                                } else {
-                                    shouldSwitch = xNum < yNum;
-                                }
-                            } else {
-                                // Fallback to string comparison
-                                if (dir == "asc") {
-                                    shouldSwitch = xText.toLowerCase() > yText.toLowerCase();
-                                } else {
-                                    shouldSwitch = xText.toLowerCase() < yText.toLowerCase();
-                                }
-                            }
-                        }
-
-
-                        if (shouldSwitch) {
-                            rows[i].parentNode.insertBefore(rows[i + 1], rows[i]);
-                            switching = true;
-                            switchcount++;
-                            break; // Break after a switch and restart loop
-                        }
-                    }
-                }
-
-                // Update header icons
-                for (var k = 0; k < tableHeaders.length; k++) {
-                    var icon = tableHeaders[k].querySelector(".filter-icon");
-                    // Reset non-active sort/filter icons, keep active filter icons
-                     if (!icon.textContent || icon.textContent === "▲" || icon.textContent === "▼") {
-                         // Check if filter is active for this column (k) and if it's not filtering everything out
-                         var isFullyFiltered = currentFilterValues[k] && currentFilterValues[k].length === 0; // No values selected means filter is active but shows nothing
-                         var isPartiallyFiltered = currentFilterValues[k] && currentFilterValues[k].length > 0 && (tableBody.rows.length > 0 ? currentFilterValues[k].length < new Set(Array.from(tableBody.rows).map(r => r.cells[k].textContent.trim())).size : false);
-
-                         if (k !== n && (isFullyFiltered || isPartiallyFiltered)) {
-                             // If it's not the column being sorted AND it has an active filter, keep the filter icon
-                             icon.textContent = "🔍";
-                         } else if (k !==n) {
-                             // Otherwise, reset to default arrow if it's not the sorted column
-                             icon.textContent = "▼";
-                         }
-                     } else if (k !== n && icon.textContent === "🔍") {
-                         // Keep filter icon if it's already there and not the column being sorted
-                          icon.textContent = "🔍";
-                     } else if (k !== n) {
-                        // Default reset for non-sorted, non-filtered columns
-                        icon.textContent = "▼";
-                     }
-                }
-                 // Set the current sort icon for the column that was just sorted (n)
-                 tableHeaders[n].querySelector(".filter-icon").textContent = (dir === "asc") ? "▲" : "▼";
-            }
-
-
-            // --- Global Text Filter Function ---
-            function filterTable() {
-                var input, filter, tr, td, i, j, txtValue, found;
-                input = document.getElementById("filterInput");
-                filter = input ? input.value.toUpperCase() : ""; // Handle case where input might not exist
-                tr = tableBody.getElementsByTagName("tr");
-
-                for (i = 0; i < tr.length; i++) {
-                    // First check column filters
-                    if (!passesColumnFilters(tr[i])) {
-                        tr[i].style.display = "none";
-                        continue;
-                    }
-
-                    // Then check global text filter (if input exists)
-                    if (filter === "") {
-                        tr[i].style.display = ""; // Show if no global filter and passes column filters
-                        continue;
-                    }
-
-                    td = tr[i].getElementsByTagName("td");
-                    found = false;
-                    for (j = 0; j < td.length; j++) {
-                        txtValue = td[j].textContent || td[j].innerText;
-                        if (txtValue.toUpperCase().indexOf(filter) > -1) {
-                            found = true;
-                            break;
-                        }
-                    }
-                    tr[i].style.display = found ? "" : "none";
+                    resetButton(3000);
                 }
             }
 
@@ -639,251 +546,407 @@ def create_html_view(csv_file):
                 currentFilterColumn = colIndex; // Set the column being filtered
 
                 // Position dropdown below the icon
-                var icon = event.target; // Should be the span icon
-                var th = icon.closest('th'); // Get the parent th
-                var rect = th.getBoundingClientRect(); // Use th for positioning base
-                var iconRect = icon.getBoundingClientRect(); // Use icon for fine-tuning
-
+                var icon = event.target;
+                var rect = icon.closest("th").getBoundingClientRect();
+                var iconRect = icon.getBoundingClientRect();
                 dropdown.style.left = rect.left + window.scrollX + "px";
-                // Position below the icon itself, not the whole header cell bottom
                 dropdown.style.top = iconRect.bottom + window.scrollY + 5 + "px";
-                dropdown.style.minWidth = Math.max(180, rect.width) + "px"; // Base width on header cell
+                dropdown.style.minWidth = Math.max(180, rect.width) + "px";
 
                 populateDropdown(colIndex); // Fill with options
                 dropdown.classList.add("show");
-                document.getElementById('filterSearchInput').value = ''; // Clear search
+                document.getElementById("filterSearchInput").value = ""; // Clear search
                 filterDropdownItems(); // Show all items initially
 
                 // Close dropdown if clicked outside
-                 // Use setTimeout to defer adding the listener slightly
-                setTimeout(() => {
+                setTimeout(function() {
                     window.onclick = function(closeEvent) {
-                        // Close if click is outside dropdown AND outside the filter icon that opened it
                         if (!dropdown.contains(closeEvent.target) && !icon.contains(closeEvent.target)) {
                             dropdown.classList.remove("show");
-                            window.onclick = null; // Remove listener after closing
+                            window.onclick = null;
                         }
-                    }
+                    };
                 }, 0);
             }
 
             function populateDropdown(colIndex) {
-                var rows = tableBody.getElementsByTagName("tr");
-                var uniqueValues = new Set();
-
-                // Collect unique values from the column
-                for (var i = 0; i < rows.length; i++) {
-                    // Only consider rows currently potentially visible (respects global filter, but not column filters yet)
-                    // This prevents options disappearing entirely if globally filtered out.
-                    // We will rely on passesColumnFilters later.
-                    // if (rows[i].style.display !== "none") { // Optimization: only check visible rows? Might hide options. Let's check all.
-                        if (rows[i].cells.length > colIndex) {
-                            var cell = rows[i].cells[colIndex];
-                            var value = (cell.textContent || cell.innerText).trim();
-                            uniqueValues.add(value);
-                        }
-                    // }
-                }
-
-                var sortedValues = Array.from(uniqueValues).sort();
+                var index = getValueIndex(colIndex);
+                var allowed = columnFilters[colIndex] || null;
                 var dropdownItemsDiv = document.getElementById("dropdown-items");
-                dropdownItemsDiv.innerHTML = ""; // Clear previous items
+                var fragment = document.createDocumentFragment();
 
                 // Add "Select All"
                 var allItem = document.createElement("div");
                 allItem.className = "dropdown-item";
                 allItem.innerHTML = '<input type="checkbox" id="select-all" onchange="toggleAll(this.checked)"> <label for="select-all">全选 (Select All)</label>';
-                dropdownItemsDiv.appendChild(allItem);
-                dropdownItemsDiv.appendChild(document.createElement("hr")); // Separator
-
-                // Add items for each unique value
-                var activeFilters = currentFilterValues[colIndex] || null; // Get active filters for this column
+                fragment.appendChild(allItem);
+                fragment.appendChild(document.createElement("hr"));
 
-                sortedValues.forEach(function(value, index) {
+                // Add items for each unique value, with its row count
+                index.values.forEach(function(value, id) {
                     var item = document.createElement("div");
                     item.className = "dropdown-item";
-                    var checkboxId = "filter-item-" + index;
-                    // Check if this value should be checked (either no filter active, or this value is in the active filter list)
-                    var isChecked = !activeFilters || activeFilters.includes(value);
-
-                    item.innerHTML = `<input type="checkbox" id="${checkboxId}" value="${value}" ${isChecked ? "checked" : ""}> <label for="${checkboxId}">${value || '(Blank)'}</label>`; // Handle blank values
-                    dropdownItemsDiv.appendChild(item);
+                    var checkbox = document.createElement("input");
+                    checkbox.type = "checkbox";
+                    checkbox.id = "filter-item-" + id;
+                    checkbox.value = id;
+                    checkbox.checked = !allowed || allowed[id] === 1;
+                    var label = document.createElement("label");
+                    label.htmlFor = checkbox.id;
+                    label.textContent = (value || "(Blank)") + " (" + index.counts[id] + ")";
+                    item.appendChild(checkbox);
+                    item.appendChild(document.createTextNode(" "));
+                    item.appendChild(label);
+                    fragment.appendChild(item);
                 });
 
-                updateSelectAllCheckbox(); // Set initial state of "Select All"
+                dropdownItemsDiv.textContent = "";
+                dropdownItemsDiv.appendChild(fragment);
+                updateSelectAllCheckbox();
+            }
+
+            function valueCheckboxes() {
+                return document.querySelectorAll("#dropdown-items .dropdown-item:not(:first-child) input[type='checkbox']");
             }
 
             function filterDropdownItems() {
-                var input = document.getElementById("filterSearchInput");
-                var filter = input.value.toUpperCase();
+                var filter = document.getElementById("filterSearchInput").value.toUpperCase();
                 var items = document.querySelectorAll("#dropdown-items .dropdown-item:not(:first-child)"); // Exclude "Select All"
-
                 items.forEach(function(item) {
                     var label = item.querySelector("label");
-                    var text = label ? (label.textContent || label.innerText) : "";
-                    item.style.display = text.toUpperCase().indexOf(filter) > -1 ? "" : "none";
+                    item.style.display = label.textContent.toUpperCase().indexOf(filter) > -1 ? "" : "none";
                 });
-                 updateSelectAllCheckbox(); // Update select all based on visible items
+                updateSelectAllCheckbox();
             }
 
             function applyFilter() {
-                var selectedValues = [];
-                var checkboxes = document.querySelectorAll("#dropdown-items .dropdown-item:not(:first-child) input[type='checkbox']");
-                var allPossibleValuesInDropdown = []; // All values currently in the dropdown (before filtering)
-
-                 // Re-populate the unique values set to get ALL possible values for this column
-                 var allRows = tableBody.getElementsByTagName("tr");
-                 var allUniqueValuesSet = new Set();
-                 for (var i = 0; i < allRows.length; i++) {
-                     if (allRows[i].cells.length > currentFilterColumn) {
-                         allUniqueValuesSet.add((allRows[i].cells[currentFilterColumn].textContent || allRows[i].cells[currentFilterColumn].innerText).trim());
-                     }
-                 }
-                 allPossibleValuesInDropdown = Array.from(allUniqueValuesSet);
-
-
-                checkboxes.forEach(function(checkbox) {
-                    // allPossibleValuesInDropdown.push(checkbox.value); // Collect all values represented by checkboxes
+                var index = getValueIndex(currentFilterColumn);
+                var allowed = new Uint8Array(index.values.length);
+                var selected = 0;
+                valueCheckboxes().forEach(function(checkbox) {
                     if (checkbox.checked) {
-                        selectedValues.push(checkbox.value);
+                        allowed[Number(checkbox.value)] = 1;
+                        selected++;
                     }
                 });
-
-                var filterIcon = tableHeaders[currentFilterColumn].querySelector(".filter-icon");
-
-                // Update filter state
-                // Check if the number of selected values equals the total number of unique values for that column
-                if (selectedValues.length === allPossibleValuesInDropdown.length || selectedValues.length === 0) {
-                    // If all unique values are selected, or none are selected, treat as no filter active for this column
-                    delete currentFilterValues[currentFilterColumn];
-                    // Reset icon only if it wasn't a sort icon (▲ or ▼)
-                    if (filterIcon.textContent === "🔍") {
-                       // Check if it's also the sort column, if so, restore sort icon, otherwise default
-                       var currentSortIcon = tableHeaders[currentFilterColumn].matches('[aria-sort]') ? (tableHeaders[currentFilterColumn].getAttribute('aria-sort') === 'ascending' ? '▲' : '▼') : '▼'; // A bit complex, maybe simplify
-                       filterIcon.textContent = "▼"; // Simplified: just reset to default arrow when filter cleared
-                    }
-                } else {
-                    // Otherwise, apply the filter with the selected values
-                    currentFilterValues[currentFilterColumn] = selectedValues;
-                    filterIcon.textContent = "🔍"; // Set filter indicator
-                }
-
+                // 全选或全不选都视为该列没有筛选 (All or none selected means no filter on this column)
+                if (selected === 0 || selected === index.values.length) delete columnFilters[currentFilterColumn];
+                else columnFilters[currentFilterColumn] = allowed;
 
                 document.getElementById("filterDropdown").classList.remove("show");
-                filterTable(); // Re-apply filters to the main table
+                refreshView();
             }
 
             function clearFilter() {
-                 // Clear filter for the current column
-                 if (currentFilterColumn in currentFilterValues) {
-                     delete currentFilterValues[currentFilterColumn];
-                 }
-
-                 // Reset header icon (only if it's the filter icon)
-                 var filterIcon = tableHeaders[currentFilterColumn].querySelector(".filter-icon");
-                 if (filterIcon.textContent === "🔍") {
-                    filterIcon.textContent = "▼"; // Reset to default
-                 }
-
-
-                 // Check all checkboxes in the dropdown (even hidden ones by search)
-                 var checkboxes = document.querySelectorAll("#dropdown-items .dropdown-item input[type='checkbox']");
-                 checkboxes.forEach(function(checkbox) { checkbox.checked = true; });
-
-                 document.getElementById("filterDropdown").classList.remove("show");
-                 filterTable(); // Re-apply filters
+                delete columnFilters[currentFilterColumn];
+                valueCheckboxes().forEach(function(checkbox) { checkbox.checked = true; });
+                document.getElementById("filterDropdown").classList.remove("show");
+                refreshView();
             }
 
             function toggleAll(checked) {
-                var checkboxes = document.querySelectorAll("#dropdown-items .dropdown-item:not(:first-child) input[type='checkbox']");
-                checkboxes.forEach(function(checkbox) {
+                valueCheckboxes().forEach(function(checkbox) {
                     // Only toggle visible checkboxes (respecting dropdown search)
-                    if (checkbox.closest('.dropdown-item').style.display !== "none") {
-                        checkbox.checked = checked;
-                    }
+                    if (checkbox.closest(".dropdown-item").style.display !== "none") checkbox.checked = checked;
                 });
             }
 
             function updateSelectAllCheckbox() {
-                 var allCheckbox = document.getElementById("select-all");
-                 if (!allCheckbox) return; // Should exist, but safety check
-
-                 var checkboxes = document.querySelectorAll("#dropdown-items .dropdown-item:not(:first-child) input[type='checkbox']");
-                 var allVisibleChecked = true;
-                 var noneVisibleChecked = true;
-                 var anyVisible = false;
-
-                 checkboxes.forEach(function(checkbox) {
-                     // Only consider checkboxes that are currently visible in the dropdown
-                     if (checkbox.closest('.dropdown-item').style.display !== "none") {
-                         anyVisible = true;
-                         if (checkbox.checked) {
-                             noneVisibleChecked = false;
-                         } else {
-                             allVisibleChecked = false;
-                         }
-                     }
-                 });
-
-                 if (!anyVisible) { // Handle case where search filters out everything
-                     allCheckbox.checked = false;
-                     allCheckbox.indeterminate = false;
-                 } else {
-                     allCheckbox.checked = allVisibleChecked;
-                     // Indeterminate if some visible items are checked, but not all visible items are checked
-                     allCheckbox.indeterminate = !allVisibleChecked && !noneVisibleChecked;
-                 }
-            }
-
-            // Check if a row passes all active column filters
-            function passesColumnFilters(row) {
-                var cells = row.getElementsByTagName("td");
-                for (var colIdx in currentFilterValues) {
-                    // Ensure colIdx is a valid index for the row's cells
-                    if (cells.length > colIdx) {
-                        var cellValue = (cells[colIdx].textContent || cells[colIdx].innerText).trim();
-                        var allowedValues = currentFilterValues[colIdx]; // This is the array of selected values for this column's filter
-
-                        // If there's an active filter for this column (allowedValues exists)
-                        // AND the current cell's value is NOT in the list of allowed values...
-                        if (allowedValues && !allowedValues.includes(cellValue)) {
-                            return false; // ...then this row fails the filter
-                        }
+                var allCheckbox = document.getElementById("select-all");
+                if (!allCheckbox) return;
+                var anyVisible = false, allVisibleChecked = true, noneVisibleChecked = true;
+                valueCheckboxes().forEach(function(checkbox) {
+                    if (checkbox.closest(".dropdown-item").style.display !== "none") {
+                        anyVisible = true;
+                        if (checkbox.checked) noneVisibleChecked = false;
+                        else allVisibleChecked = false;
                     }
-                }
-                return true; // Passes all active filters (or no filters are active)
+                });
+                allCheckbox.checked = anyVisible && allVisibleChecked;
+                allCheckbox.indeterminate = anyVisible && !allVisibleChecked && !noneVisibleChecked;
             }
 
-            // Initial setup: Apply any default filters if needed (usually none)
-            // filterTable(); // Call once on load if you have default filters
+            refreshView();
+"""
+
+
+def detect_csv_encoding(csv_file):
+    """只检测一次CSV编码 (Detect the CSV encoding once)
+
+    有BOM时按BOM确定；否则检查开头的数据块能否按UTF-8解码，不能则按GB18030 (兼容GBK) 读取。
+    """
+    with open(csv_file, 'rb') as f:
+        sample = f.read(ENCODING_SNIFF_BYTES)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # final=False: 数据块末尾被截断的多字节字符不算错误 (a multi-byte character cut at the end of the sample is not an error)
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'gb18030'
+
+
+def _order_report_columns(header):
+    """按 REPORT_COLUMN_ORDER 排列列名 (不区分大小写)，返回 [(列在CSV行中的位置, 列名), ...]"""
+    positions = {}
+    for i, col in enumerate(header):
+        positions.setdefault(col.lower(), (i, col))
+    ordered = [positions[col.lower()] for col in REPORT_COLUMN_ORDER if col.lower() in positions]
+    used = {col.lower() for _, col in ordered}
+    return ordered + [(i, col) for i, col in enumerate(header) if col.lower() not in used]
+
+
+def _report_display_name(column):
+    key = column.lower()
+    if key == '下载链接': return 'HuggingFace'
+    if key in MIRROR_LINK_COLUMNS: return 'HF镜像 (Mirror)'
+    if key == '搜索链接': return 'LibLib'
+    return column
+
+
+def _report_column_kind(column):
+    """列在页面脚本中的渲染方式 (How the page script renders the column)"""
+    key = column.lower()
+    if column == '状态': return 'status'
+    if column in FILE_NAME_COLUMNS: return 'file'
+    if key == '下载链接': return 'hf'
+    if key in MIRROR_LINK_COLUMNS: return 'mirror'
+    if key == '搜索链接': return 'liblib'
+    return 'text'
+
+
+def _report_json(value):
+    """JSON文本，转义 < 以便安全地放进 <script> 中 (JSON text with < escaped so it can sit inside <script>)"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def _write_report_assets(directory):
+    """把共享的样式和脚本写到报告目录，内容未变时不重写 (Write the shared CSS/JS next to the report pages; unchanged files are kept)"""
+    for filename, content in ((REPORT_ASSET_CSS, _REPORT_STYLE), (REPORT_ASSET_JS, _REPORT_SCRIPT)):
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    continue
+        except OSError:
+            pass
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(path + '.tmp', path)
+
+
+def _report_head(title, inline_assets):
+    if inline_assets:
+        style = f"<style>{_REPORT_STYLE}</style>"
+    else:
+        style = f'<link rel="stylesheet" href="{REPORT_ASSET_CSS}">'
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{html.escape(title)}</title>
+    {style}
+</head>
+<body>
+    <h1>{html.escape(title)}</h1>
+"""
 
-            </script>
-        """
 
-        # --- HTML End ---
-        html_content += """
-        </body>
-        </html>
-        """
+def _write_report_page(path, csv_file, header, records, title, inline_assets=True, nav_html=''):
+    """把一组行写成一个报告页面，先写临时文件再替换，返回行数 (Write one report page and return its row count)
+
+    records 是已补齐到表头宽度的CSV行；inline_assets 为False时引用共享的 REPORT_ASSET_CSS / REPORT_ASSET_JS。
+    """
+    columns = _order_report_columns(header)
+    positions = [position for position, _ in columns]
+    mirror_link_col_index = next((i for i, (_, column) in enumerate(columns) if column.lower() in MIRROR_LINK_COLUMNS), -1)
+    tmp_file = path + '.tmp'
+    try:
+        with open(tmp_file, 'w', encoding='utf-8', buffering=REPORT_WRITE_BUFFER) as out:
+            out.write(_report_head(title, inline_assets))
+            out.write(f"""
+            <p>源文件 (Source File): {html.escape(os.path.basename(csv_file))}</p>
+            <p>生成时间 (Generated Time): {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+""")
+            out.write(nav_html)
+            out.write(_REPORT_GUIDE)
+
+            # --- Controls: Filter and Batch Copy Button ---
+            # Only show controls if it's a model list (has '文件名' column)
+            if '文件名' in header:
+                out.write("""
+            <div class="controls-box">
+                <div>
+                    <label for="filterInput">筛选模型名称 (Filter Model Name): </label>
+                    <input type="text" id="filterInput" onkeyup="filterTable()" placeholder="输入关键词... (Enter keywords...)">
+                </div>
+""")
+                # Add Batch Copy button only if mirror link column exists
+                if mirror_link_col_index >= 0:
+                    out.write("""
+                <div>
+                    <button id="copyButton" onclick="batchCopyMirrorLinks()">批量复制镜像链接 (Batch Copy Mirror Links)</button>
+                    <span id="copyMessage"></span>
+                </div>
+""")
+                out.write("</div>\n") # Close controls-box
+
+            # --- Table: header and rows are rendered by the page script ---
+            out.write('<div id="tableContainer" class="table-container">\n<table id="modelTable">\n'
+                      '<thead><tr id="headerRow"></tr></thead>\n<tbody id="tableBody"></tbody>\n</table>\n</div>\n')
+
+            # --- Data blob, rows streamed ---
+            column_meta = [{'title': _report_display_name(column), 'kind': _report_column_kind(column)} for _, column in columns]
+            out.write('<script type="application/json" id="reportData">')
+            out.write(f'{{"columns":{_report_json(column_meta)},"mirrorColumn":{mirror_link_col_index},"rows":[\n')
+            row_count = 0
+            for record in records:
+                out.write((',\n' if row_count else '') + _report_json([record[position] for position in positions]))
+                row_count += 1
+            out.write('\n]}</script>\n')
+
+            out.write(f"""
+            <div class="summary">
+                <p>总记录数 (Total Records): {row_count}，当前显示 (Showing): <span id="visibleCount">{row_count}</span></p>
+            </div>
+""")
+            out.write(nav_html)
+            out.write(_REPORT_FILTER_DROPDOWN)
+            if inline_assets:
+                out.write(f"<script>{_REPORT_SCRIPT}</script>\n")
+            else:
+                out.write(f'<script src="{REPORT_ASSET_JS}"></script>\n')
+            out.write("</body>\n</html>\n")
+        os.replace(tmp_file, path)
+        return row_count
+    finally:
+        if os.path.exists(tmp_file):
+            try: os.remove(tmp_file)
+            except OSError: pass
+
+
+def _report_page_nav(index_name, page_names, page_number):
+    """分页报告每页顶部和底部的导航链接 (Navigation links at the top and bottom of a report page)"""
+    links = [f'<a href="{html.escape(index_name)}">索引 (Index)</a>']
+    if page_number > 1:
+        links.append(f'<a href="{html.escape(page_names[page_number - 2])}">上一页 (Previous)</a>')
+    if page_number < len(page_names):
+        links.append(f'<a href="{html.escape(page_names[page_number])}">下一页 (Next)</a>')
+    return f'<p class="page-nav">第 {page_number} / {len(page_names)} 页 (Page {page_number} of {len(page_names)}) &nbsp; {" &nbsp; ".join(links)}</p>\n'
+
+
+def _write_report_index(path, csv_file, pages, total_rows):
+    """分页报告的索引页：每页的行数、首尾文件名和链接 (Index page listing every page with its row count)"""
+    items = "".join(
+        f'<tr><td><a href="{html.escape(name)}">第 {number} 页 (Page {number})</a></td><td>{count}</td>'
+        f'<td class="file-name">{html.escape(first)}</td><td class="file-name">{html.escape(last)}</td></tr>\n'
+        for number, (name, count, first, last) in enumerate(pages, 1))
+    with open(path + '.tmp', 'w', encoding='utf-8') as out:
+        out.write(_report_head("模型下载链接 (Model Download Links)", inline_assets=False))
+        out.write(f"""
+            <p>源文件 (Source File): {html.escape(os.path.basename(csv_file))}</p>
+            <p>生成时间 (Generated Time): {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+            <div class="summary">
+                <p>总记录数 (Total Records): {total_rows}，共 {len(pages)} 页 (Pages)</p>
+            </div>
+            <table class="page-index">
+            <thead><tr><th>页面 (Page)</th><th>记录数 (Records)</th><th>第一行 (First)</th><th>最后一行 (Last)</th></tr></thead>
+            <tbody>
+{items}            </tbody>
+            </table>
+</body>
+</html>
+""")
+    os.replace(path + '.tmp', path)
+
+
+def _iter_report_records(reader, width):
+    """跳过空行并把每行补齐到表头宽度 (Skip blank lines and pad rows to the header width)"""
+    for record in reader:
+        if not record: continue
+        if len(record) < width: record += [''] * (width - len(record))
+        yield record
+
+
+def create_html_view(csv_file, page_size=0):
+    """创建改进的HTML视图，包含表头筛选、批量复制和统一字体 (Create improved HTML view with header filtering, batch copy, and unified font)
+
+    CSV用 csv.reader 逐行读取，每行作为紧凑的JSON数组直接写入带缓冲的输出文件；
+    页面脚本只渲染可见的行，排序和筛选使用预先计算的排序键和每列的值索引。
+    (Rows are streamed as a compact JSON array; the page renders only the visible rows and sorts/filters
+    through precomputed sort keys and per-column value indexes.)
+
+    行数超过 page_size 时分页输出：<名称>_p001.html 等分页文件、共享的样式/脚本文件，
+    以及列出各页行数和链接的索引页 <名称>.html。
+    (With more than page_size rows the report is split into page files sharing one CSS/JS asset pair,
+    plus an index page listing every page.)
+
+    参数 (Args):
+        csv_file: CSV文件路径，可能是单个工作流的结果或汇总文件 (CSV file path, could be result of a single workflow or a summary file)
+        page_size: 每页行数，0 表示不分页 (Rows per page, 0 = single file)
+
+    返回 (Returns):
+        生成的HTML文件路径 (分页时为索引页)，失败则返回None (Path to the generated HTML file (the index page when paginated), or None on failure)
+    """
+    html_file = os.path.splitext(csv_file)[0] + '.html'
+    title = "模型下载链接 (Model Download Links)"
+    try:
+        print(f"正在为 {csv_file} 创建HTML视图 (Creating HTML view for {csv_file})")
+        encoding = detect_csv_encoding(csv_file)
+
+        with open(csv_file, 'r', encoding=encoding, newline='') as src:
+            reader = csv.reader(src)
+            header = next(reader, None)
+            if not header:
+                print(f"错误: CSV文件 '{csv_file}' 为空或格式不正确。(Error: CSV file '{csv_file}' is empty or malformed.)")
+                return None
+            print(f"使用 {encoding} 读取CSV，列名 (Reading CSV using {encoding}, columns): {header}")
+            if not any(column.lower() in MIRROR_LINK_COLUMNS for column in header):
+                print("警告: CSV文件中未找到 '镜像链接' 或 'hf镜像' 列。批量复制功能将不可用。(Warning: '镜像链接' or 'hf镜像' column not found in CSV. Batch copy feature will be unavailable.)")
+
+            # 先数一遍行数，决定是否分页 (Count rows first to decide whether to paginate)
+            total_rows = sum(1 for _ in _iter_report_records(reader, len(header))) if page_size and page_size > 0 else 0
+            page_count = -(-total_rows // page_size) if total_rows > page_size > 0 else 1
+            src.seek(0)
+            reader = csv.reader(src)
+            next(reader)
+            records = _iter_report_records(reader, len(header))
+
+            directory = os.path.dirname(os.path.abspath(html_file))
+            base = os.path.splitext(os.path.basename(html_file))[0]
+            page_names = [f"{base}_p{number:03d}.html" for number in range(1, page_count + 1)] if page_count > 1 else []
+            # 删除上次生成的多余分页 (Remove pages left over from a previous, longer report)
+            for stale in glob.glob(os.path.join(glob.escape(directory), glob.escape(base) + "_p[0-9][0-9][0-9].html")):
+                if os.path.basename(stale) not in page_names:
+                    os.remove(stale)
+
+            if not page_names:
+                _write_report_page(html_file, csv_file, header, records, title)
+            else:
+                _write_report_assets(directory)
+                name_position = header.index('文件名') if '文件名' in header else 0
+                pages = []
+                for number, page_name in enumerate(page_names, 1):
+                    page_records = list(itertools.islice(records, page_size))
+                    count = _write_report_page(os.path.join(directory, page_name), csv_file, header, page_records,
+                                               f"{title} - {number}/{page_count}", inline_assets=False,
+                                               nav_html=_report_page_nav(os.path.basename(html_file), page_names, number))
+                    pages.append((page_name, count, page_records[0][name_position], page_records[-1][name_position]))
+                _write_report_index(html_file, csv_file, pages, total_rows)
+                print(f"HTML视图已分为 {page_count} 页 (HTML view split into {page_count} pages)")
 
-        # Write HTML file
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
         print(f"HTML视图已生成: {html_file} (HTML view generated: {html_file})")
         return html_file
 
-    except pd.errors.EmptyDataError:
-        print(f"错误: CSV文件 '{csv_file}' 为空或格式不正确。(Error: CSV file '{csv_file}' is empty or malformed.)")
-        return None
-    except KeyError as e:
-        print(f"创建HTML视图时出错: 缺少列 {e} (Error creating HTML view: Missing column {e})")
-        traceback.print_exc()
-        return None
     except Exception as e:
         print(f"创建HTML视图时发生意外错误 (Unexpected error creating HTML view): {e}")
         traceback.print_exc()
         return None
 
+
 # Example usage (optional, for testing):
 # if __name__ == '__main__':
 #     # Create a dummy CSV for testing
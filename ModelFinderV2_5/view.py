@@ -26,6 +26,7 @@ class AppView:
         self.workflow_dir_var = tk.StringVar()
         self.file_pattern_var = tk.StringVar(value="*.json;*")
         self.chrome_path_var = tk.StringVar()
+        self.models_root_var = tk.StringVar()
         self.theme_var = tk.StringVar()
         self.retention_days_var = tk.IntVar(value=30) # Keep default for initial display
 
@@ -169,6 +170,7 @@ class AppView:
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=2, column=0, columnspan=3, sticky="w", pady=10)
         ttk.Button(button_frame, text="一键分析并搜索", style="success.TButton", command=lambda: self.controller.analyze_and_search() if self.controller else None).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="继续上次搜索", command=lambda: self.controller.resume_last_search() if self.controller else None).pack(side=tk.LEFT, padx=(0, 5))
         self.view_result_button = ttk.Button(button_frame, text="查看结果", command=lambda: self.controller.view_result() if self.controller else None, state=tk.DISABLED)
         self.view_result_button.pack(side=tk.LEFT)
 
@@ -265,6 +267,12 @@ class AppView:
         ttk.Entry(chrome_frame, textvariable=self.chrome_path_var, width=50).pack(side="left", fill="x", expand=True)
         ttk.Button(chrome_frame, text="浏览", command=lambda: self.controller.browse_chrome() if self.controller else None).pack(side="left", padx=5)
 
+        models_root_frame = ttk.Frame(app_frame)
+        models_root_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(models_root_frame, text="模型目录:").pack(side="left", padx=(0,5))
+        ttk.Entry(models_root_frame, textvariable=self.models_root_var, width=50).pack(side="left", fill="x", expand=True)
+        ttk.Button(models_root_frame, text="浏览", command=lambda: self.controller.browse_models_root() if self.controller else None).pack(side="left", padx=5)
+
         theme_frame = ttk.LabelFrame(main_frame, text="界面主题")
         theme_frame.pack(fill="x", pady=5, padx=5)
 
@@ -319,6 +327,9 @@ class AppView:
         self.irregular_notes_entry = ttk.Entry(form_frame, width=50)
         self.irregular_notes_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
 
+        ttk.Label(form_frame, text="原始名称以 glob: 或 re: 开头时作为匹配规则，例如 glob:flux1-dev*.safetensors、re:(.+)_fp8\\.safetensors (修正后名称可用 \\1 引用分组)",
+                  foreground="gray").grid(row=3, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="w")
+
         form_frame.columnconfigure(1, weight=1) # 使输入框列可拉伸
 
         # --- 操作按钮 ---
@@ -485,6 +496,7 @@ class AppView:
             # Apply values to view widgets
             if theme and self.theme_dropdown: self.set_selected_theme(theme)
             self.set_chrome_path(chrome) # Assuming set_chrome_path updates the var
+            self.set_models_root(self.controller.get_loaded_models_root())
             if self.retention_days_var : self.retention_days_var.set(days) # Directly set IntVar
         else:
              logger.warning("Controller not set in view during _update_initial_settings.")
@@ -539,6 +551,9 @@ class AppView:
     def get_chrome_path(self): return self.chrome_path_var.get().strip()
     def set_chrome_path(self, path): self.chrome_path_var.set(path)
 
+    def get_models_root(self): return self.models_root_var.get().strip()
+    def set_models_root(self, path): self.models_root_var.set(path)
+
     def get_selected_theme(self): return self.theme_var.get()
     def set_selected_theme(self, theme_name):
         logger.debug(f"View setting theme dropdown/var to: {theme_name}")
@@ -0,0 +1,373 @@
+"""
+Workflow parsing helpers.
+工作流解析：从工作流JSON中提取模型文件引用。
+这里的函数不依赖 AnalysisModel 实例，参数和返回值都可以被pickle，
+因此批量处理时可以直接在子进程中执行。
+"""
+
+import os
+import re
+import json
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# 这些控件值表示"未选择模型"，不作为文件引用
+IGNORED_WIDGET_VALUES = {"default", "none", "empty", "auto", "off", "on"}
+
+
+# 超过该大小的工作流文件使用流式解析，避免一次性载入整个JSON
+STREAMING_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+class JsonStream:
+    """
+    Incremental JSON scanner over a text file object. 增量式JSON扫描器。
+    Only the value currently being decoded is held in memory: containers can be walked
+    element by element (iter_array / iter_object) and unwanted values are skipped the same way.
+    Scalars and small elements are decoded with json's C decoder (raw_decode).
+    """
+    _WHITESPACE = ' \t\n\r'
+
+    def __init__(self, fp, chunk_size=64 * 1024):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_size=None):
+        """Reads more text, dropping the consumed prefix first. Returns False at end of file."""
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        data = self._fp.read(max(self._chunk_size, min_size or 0))
+        if not data:
+            self._eof = True
+            return False
+        if not self._buf and data[0] == '\ufeff':
+            data = data[1:]
+        self._buf += data
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in self._WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos}")
+        self._pos += 1
+
+    def decode_value(self):
+        """Decodes the next complete value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # 数字可能在缓冲区末尾被截断(如 "1." 或 "2e")，需要确认其后是分隔符
+                if self._eof or (end < len(self._buf) and self._buf[end] not in '.eE+-'):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # 按已缓冲长度成倍读取，大元素的重复解码保持线性开销
+            if not self._fill(len(self._buf) - self._pos):
+                value, self._pos = self._decoder.raw_decode(self._buf, self._pos)
+                return value
+
+    def iter_array(self):
+        """Yields the decoded elements of the array at the current position one by one."""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' at offset {self._pos - 1}")
+
+    def iter_object(self):
+        """
+        Yields the keys of the object at the current position. After each key the caller must
+        consume its value with decode_value(), iter_array(), iter_object() or skip_value().
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError(f"Expected object key at offset {self._pos}")
+            key = self.decode_value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self._pos - 1}")
+
+    def skip_value(self):
+        """Consumes the next value without keeping it; containers are skipped element by element."""
+        char = self.peek()
+        if char == '[':
+            for _ in self.iter_array():
+                pass
+        elif char == '{':
+            for _ in self.iter_object():
+                self.skip_value()
+        else:
+            self.decode_value()
+
+
+ExtractorConfig = namedtuple('ExtractorConfig', ['model_node_types', 'node_model_indices', 'model_extensions'])
+ExtractorConfig.__doc__ = "Model config passed to extractors (picklable, so it can be sent to worker processes)."
+
+
+def _is_model_node_type(node_type, config):
+    return isinstance(node_type, str) and (node_type in config.model_node_types or "Loader" in node_type)
+
+
+def _to_filename(value):
+    """Strips the subfolder part of a widget value ("sdxl\\model.safetensors" -> "model.safetensors")."""
+    value = value.strip()
+    if not value or value.lower() in IGNORED_WIDGET_VALUES:
+        return None
+    return os.path.basename(value.replace('\\', '/')) if '\\' in value or '/' in value else value
+
+
+class WorkflowExtractor:
+    """
+    Base class of the pluggable reference extractors. 引用提取器基类。
+    A workflow is fed to every extractor as its top-level (key, value) items. When streaming,
+    arrays listed by streams() arrive first as an empty list (for detect) and then one element
+    at a time wrapped in a single-element list.
+    Subclasses must be picklable so they can be sent to batch worker processes.
+    """
+    name = "base"
+
+    def wants(self, key, kind):
+        """Whether a top-level value must be decoded; kind is '{', '[' or '' for scalars. Unwanted values are skipped when streaming."""
+        return False
+
+    def streams(self, key):
+        """Whether a top-level array may be passed element by element."""
+        return False
+
+    def detect(self, key, value):
+        """Returns True when this top-level item marks a workflow in the extractor's format."""
+        return False
+
+    def iter_nodes(self, key, value):
+        """Yields the nodes contained in one top-level item, including nested definitions."""
+        return iter(())
+
+    def node_references(self, node, config):
+        """Yields the raw model values referenced by one node."""
+        return iter(())
+
+
+class UIWorkflowExtractor(WorkflowExtractor):
+    """
+    UI export format: nodes[].type / widgets_values, looked up by node_model_indices.
+    Also walks subgraph definitions (definitions.subgraphs[].nodes) and group nodes (extra.groupNodes.*.nodes).
+    """
+    name = "ui"
+
+    def wants(self, key, kind):
+        return (key == 'nodes' and kind == '[') or (key in ('definitions', 'extra') and kind == '{')
+
+    def streams(self, key):
+        return key == 'nodes'
+
+    def detect(self, key, value):
+        return key == 'nodes' and isinstance(value, list)
+
+    def iter_nodes(self, key, value):
+        if key == 'nodes' and isinstance(value, list):
+            yield from self._iter_node_list(value)
+        elif key == 'definitions' and isinstance(value, dict):
+            for subgraph in value.get('subgraphs') or []:
+                if isinstance(subgraph, dict):
+                    prefix = subgraph.get('name') or subgraph.get('id')
+                    yield from self._iter_node_list(subgraph.get('nodes'), prefix)
+                    yield from self.iter_nodes('definitions', subgraph.get('definitions'))
+        elif key == 'extra' and isinstance(value, dict):
+            group_nodes = value.get('groupNodes')
+            if isinstance(group_nodes, dict):
+                for group_name, group in group_nodes.items():
+                    if isinstance(group, dict):
+                        yield from self._iter_node_list(group.get('nodes'), group_name)
+
+    @staticmethod
+    def _iter_node_list(nodes, prefix=None):
+        """Yields the dict nodes of a list; nodes inside a subgraph / group get "<name>:<id>" ids."""
+        for node in nodes if isinstance(nodes, list) else ():
+            if isinstance(node, dict):
+                if prefix is not None:
+                    node = dict(node, id=f"{prefix}:{node.get('id', node.get('index'))}")
+                yield node
+
+    def node_references(self, node, config):
+        node_type = node.get('type', '')
+        widgets_values = node.get('widgets_values', [])
+        if not _is_model_node_type(node_type, config) or not isinstance(widgets_values, list) or not widgets_values:
+            return
+        for index in config.node_model_indices.get(node_type, config.node_model_indices["default"]):
+            if len(widgets_values) > index and isinstance(widgets_values[index], str):
+                yield widgets_values[index]
+
+
+class ApiPromptExtractor(WorkflowExtractor):
+    """
+    API format prompts: {id: {class_type, inputs}}, bare or wrapped as {"prompt": {...}} (the /prompt request body).
+    API inputs omit UI-only widgets (e.g. control_after_generate), so the positional node_model_indices
+    cannot be mapped onto them; instead string inputs named *_name (ckpt_name, lora_name, unet_name, ...)
+    or ending in a model extension are reported.
+    API格式的输入不包含仅在界面中存在的控件，不能按控件序号对应，只按输入名和扩展名判断。
+    """
+    name = "api"
+    # API格式的节点ID为数字，子图中的节点为 "父节点ID:节点ID"
+    _NODE_ID_RE = re.compile(r'\d+(:\d+)*')
+
+    @staticmethod
+    def _is_api_node(value):
+        return isinstance(value, dict) and isinstance(value.get('class_type'), str)
+
+    def wants(self, key, kind):
+        # 只解码 "prompt" 和形如节点ID的键，UI工作流中的 extra、config、definitions 等对象直接跳过
+        return kind == '{' and (key == 'prompt' or self._NODE_ID_RE.fullmatch(key) is not None)
+
+    def detect(self, key, value):
+        if key == 'prompt' and isinstance(value, dict):
+            return any(self._is_api_node(v) for v in value.values())
+        return self._is_api_node(value)
+
+    def iter_nodes(self, key, value):
+        if self._is_api_node(value):
+            yield {'id': key, 'type': value['class_type'], 'inputs': value.get('inputs') or {}}
+        elif key == 'prompt' and isinstance(value, dict):
+            for node_id, node in value.items():
+                yield from self.iter_nodes(node_id, node)
+
+    def node_references(self, node, config):
+        node_type = node['type']
+        if not _is_model_node_type(node_type, config) or not isinstance(node['inputs'], dict):
+            return
+        # 连线输入为 [节点ID, 输出序号]，不是字符串，自然被跳过
+        extensions = tuple(ext.lower() for ext in config.model_extensions)
+        seen = set()
+        for input_name, value in node['inputs'].items():
+            if not isinstance(value, str) or not value.strip() or value in seen:
+                continue
+            if str(input_name).endswith('_name') or value.strip().lower().endswith(extensions):
+                seen.add(value)
+                yield value
+
+
+DEFAULT_EXTRACTORS = (UIWorkflowExtractor(), ApiPromptExtractor())
+
+
+def _value_kind(value):
+    return '{' if isinstance(value, dict) else '[' if isinstance(value, list) else ''
+
+
+def _iter_stream_items(fp, extractors):
+    """Yields the top-level (key, value) items of a workflow file for the extractors, streaming arrays where allowed."""
+    stream = JsonStream(fp)
+    if stream.peek() != '{':
+        raise ValueError("Workflow JSON is not an object")
+    for key in stream.iter_object():
+        kind = stream.peek()
+        kind = kind if kind in '{[' else ''
+        interested = [e for e in extractors if e.wants(key, kind)]
+        if not interested:
+            stream.skip_value()
+        elif kind == '[' and all(e.streams(key) for e in interested):
+            yield key, []
+            for element in stream.iter_array():
+                yield key, [element]
+        else:
+            yield key, stream.decode_value()
+
+
+def _extract_from_items(items, config, extractors):
+    """Runs the extractors over top-level items. Returns the reference records, or None if no extractor recognised the format."""
+    references = []
+    recognized = False
+    for key, value in items:
+        for extractor in extractors:
+            recognized = extractor.detect(key, value) or recognized
+            for node in extractor.iter_nodes(key, value):
+                try:
+                    for raw_value in extractor.node_references(node, config):
+                        original_filename = _to_filename(raw_value)
+                        if original_filename:
+                            references.append({'node_id': node.get('id'), 'node_type': node.get('type', ''), 'original_filename': original_filename})
+                except Exception:
+                    logger.error(f"Error processing node ID {node.get('id', 'N/A')} ({extractor.name})", exc_info=True)
+    return references if recognized else None
+
+
+def extract_model_references(workflow_json, config, extractors=DEFAULT_EXTRACTORS):
+    """
+    Extracts model file references from a parsed workflow (UI export, API prompt, subgraphs, group nodes).
+    从已解析的工作流中提取模型文件引用。
+
+    Returns a list of {'node_id', 'node_type', 'original_filename'} dicts,
+    or None when the JSON is not in any format known to the extractors.
+    """
+    if not isinstance(workflow_json, dict):
+        return None
+    return _extract_from_items(workflow_json.items(), config, extractors)
+
+
+def load_workflow_references(workflow_file, config, extractors=DEFAULT_EXTRACTORS, streaming=None):
+    """
+    Parses a workflow file once and returns its model references (see extract_model_references).
+    streaming: True/False forces the streaming/in-memory parser; None picks streaming for files
+    larger than STREAMING_THRESHOLD_BYTES.
+    """
+    if streaming is None:
+        streaming = os.path.getsize(workflow_file) > STREAMING_THRESHOLD_BYTES
+    with open(workflow_file, 'r', encoding='utf-8', errors='ignore') as f:
+        if not streaming:
+            return extract_model_references(json.load(f), config, extractors)
+        try:
+            return _extract_from_items(_iter_stream_items(f, extractors), config, extractors)
+        except ValueError as e:
+            if isinstance(e, json.JSONDecodeError):
+                raise
+            logger.debug(f"Not a workflow object: {workflow_file} ({e})")
+            return None
+
+
+def scan_workflow_file(workflow_file, config, extractors=DEFAULT_EXTRACTORS):
+    """
+    Worker entry point for batch processing. 批量处理的工作函数。
+    Returns (workflow_file, references, error) and never raises, so one bad file does not break the pool.
+    error is set for unreadable / non-JSON files; references is None for JSON that is not a workflow.
+    """
+    try:
+        return workflow_file, load_workflow_references(workflow_file, config, extractors), None
+    except Exception as e:
+        return workflow_file, None, str(e)
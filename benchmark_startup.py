@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Model Finder startup import benchmark
+Imports the GUI entry module in a fresh interpreter with `python -X importtime`,
+reports the slowest modules and checks the cold-start budget.
+
+Usage:
+    python benchmark_startup.py [--module ModelFinderV2_5.model_finder] [--budget-ms 600] [--top 15] [--runs 3]
+
+Exit code is 1 if the import fails, exceeds the budget, or loads a module that must stay lazy.
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+# 这些库只应在第一次搜索、生成HTML或打开对应标签页时导入
+LAZY_MODULES = ("pandas", "DrissionPage", "requests",
+                "ModelFinderV2_5.model_dedupe", "ModelFinderV2_5.model_fingerprint", "ModelFinderV2_5.model_mover", "ModelFinderV2_5.model_registry", "ModelFinderV2_5.model_registry_db", "ModelFinderV2_5.model_type_detector")
+
+
+def run_importtime(module, python=sys.executable):
+    """
+    Imports module in a new interpreter and parses the -X importtime report.
+
+    Returns:
+        (returncode, {module name: (self_us, cumulative_us)}, stderr text without the report lines)
+    """
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=project_root, capture_output=True, text=True)
+    timings, other = {}, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue # 表头
+        name = parts[2].strip()
+        timings[name] = (int(parts[0]), int(parts[1]))
+    return proc.returncode, timings, "\n".join(other)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Model Finder cold-start import time")
+    parser.add_argument("--module", default="ModelFinderV2_5.model_finder", help="module imported at startup")
+    parser.add_argument("--budget-ms", type=float, default=600.0, help="cold-start budget in milliseconds")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    parser.add_argument("--runs", type=int, default=3, help="runs; the fastest one is reported")
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(max(1, args.runs)):
+        returncode, timings, errors = run_importtime(args.module)
+        if returncode != 0:
+            print(f"Importing {args.module} failed:\n{errors}")
+            return 1
+        total_us = timings.get(args.module, (0, 0))[1]
+        if best is None or total_us < best[0]:
+            best = (total_us, timings)
+    total_us, timings = best
+
+    print(f"Cumulative import time of {args.module}: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print("\nSlowest modules (self time):")
+    for name, (self_us, cumulative_us) in sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in timings]
+    if eager:
+        print(f"\nModules that should be lazy but were imported at startup: {', '.join(eager)}")
+    over_budget = total_us / 1000 > args.budget_ms
+    if over_budget:
+        print(f"\nStartup import time is over budget by {total_us / 1000 - args.budget_ms:.1f} ms")
+    return 1 if eager or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
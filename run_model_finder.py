@@ -135,6 +135,9 @@ def main():
         input("按Enter键退出...") # Keep console pause
 
 if __name__ == "__main__":
+    # Batch analysis uses a process pool; required when running as a frozen executable on Windows
+    import multiprocessing
+    multiprocessing.freeze_support()
     # Set version for logging if available before importing main app
     try:
         from ModelFinderV2_5 import __version__
@@ -0,0 +1,189 @@
+import json
+from types import SimpleNamespace
+
+from ModelFinderV2_5.analysis_model import AnalysisModel
+from ModelFinderV2_5.hf_resolver import HfResolver
+from ModelFinderV2_5.search_cache import SearchCache
+
+SHA = "31e35c80fc4829d14f90153f4c74cd59c90b779f6afe05a74cd6120b893f7e5b"
+
+
+def json_route(payload, status=200):
+    return (status, 'application/json', json.dumps(payload))
+
+
+def hf_routes():
+    def search(query):
+        if query['search'].lower().startswith('sdxl_vae') or query['search'].lower().startswith('sdxl-vae'):
+            return json_route([{'id': 'stabilityai/sdxl-vae'}])
+        return json_route([])
+    return {
+        '/api/models': search,
+        '/api/models/stabilityai/sdxl-vae': json_route({'id': 'stabilityai/sdxl-vae', 'siblings': [
+            {'rfilename': 'README.md', 'size': 10},
+            {'rfilename': 'sdxl_vae.safetensors', 'size': 334641164, 'lfs': {'sha256': SHA, 'size': 334641164}},
+        ]}),
+    }
+
+
+def make_resolver(server):
+    return HfResolver(server.url, workers=2, timeout=5)
+
+
+def test_resolve_hit(stub_server):
+    server = stub_server(hf_routes())
+    resolver = make_resolver(server)
+    try:
+        hit = resolver.resolve('models/vae/SDXL_VAE.safetensors')
+    finally:
+        resolver.close()
+    assert hit == {
+        'repo': 'stabilityai/sdxl-vae',
+        'path': 'sdxl_vae.safetensors',
+        'download_link': f"{server.url}/stabilityai/sdxl-vae/resolve/main/sdxl_vae.safetensors",
+        'size': 334641164,
+        'sha256': SHA,
+    }
+
+
+def test_resolve_miss(stub_server):
+    server = stub_server(hf_routes())
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('unknown_model_v2.safetensors') is None
+    finally:
+        resolver.close()
+    assert server.requests and all(path == '/api/models' for path, _ in server.requests)
+
+
+def test_resolve_without_extension_makes_no_request(stub_server):
+    server = stub_server(hf_routes())
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('sdxl_vae') is None
+    finally:
+        resolver.close()
+    assert server.requests == []
+
+
+def test_transient_errors_are_not_misses(stub_server):
+    routes = hf_routes()
+    routes['/api/models/stabilityai/sdxl-vae'] = json_route({'error': 'rate limited'}, status=429)
+    server = stub_server(routes)
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('sdxl_vae.safetensors') == {'error': 'HTTP 429'}
+        # 失败的仓库文件列表没有被缓存，恢复后可以找到
+        routes['/api/models/stabilityai/sdxl-vae'] = hf_routes()['/api/models/stabilityai/sdxl-vae']
+        assert resolver.resolve('sdxl_vae.safetensors')['sha256'] == SHA
+    finally:
+        resolver.close()
+
+    routes['/api/models'] = json_route({'error': 'unavailable'}, status=503)
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('other.safetensors') == {'error': 'HTTP 503'}
+    finally:
+        resolver.close()
+
+
+def test_transient_hf_error_is_not_cached_as_not_found(stub_server, tmp_path):
+    routes = hf_routes()
+    routes['/api/models'] = json_route({}, status=500)
+    server = stub_server(routes)
+    model = AnalysisModel()
+    model.hf_api_base = server.url
+    task = {'search_term_query': 'sdxl_vae.safetensors', 'name_for_decision': 'sdxl_vae.safetensors', 'node_type': 'VAELoader'}
+    written = []
+    remaining = model._run_hf_resolver([task], lambda t, result: written.append(result))
+    assert remaining == [task] and not written and task['hf_api_error'] == 'HTTP 500'
+
+    cache = SearchCache(db_path=str(tmp_path / 'cache.db'))
+    not_found = SimpleNamespace(status='未找到HF', download_link='', mirror_link='', search_link='')
+    model._store_search_result(cache, task, not_found)
+    assert cache.get('hf', 'sdxl_vae.safetensors') is None
+    del task['hf_api_error']
+    model._store_search_result(cache, task, not_found)
+    assert cache.get('hf', 'sdxl_vae.safetensors')['status'] == '未找到HF'
+
+
+def test_generic_filename_is_not_resolved(stub_server):
+    server = stub_server(hf_routes())
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('diffusion_pytorch_model.safetensors') is None
+        assert resolver.resolve('unet/Model.safetensors') is None
+    finally:
+        resolver.close()
+    assert server.requests == []
+
+
+def test_repo_must_share_a_token_with_the_filename(stub_server):
+    routes = hf_routes()
+    routes['/api/models'] = json_route([{'id': 'popular/unrelated-repo'}])
+    routes['/api/models/popular/unrelated-repo'] = json_route({'siblings': [{'rfilename': 'sdxl_vae.safetensors', 'size': 1}]})
+    server = stub_server(routes)
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('sdxl_vae.safetensors') is None
+    finally:
+        resolver.close()
+    assert all(path == '/api/models' for path, _ in server.requests)
+
+
+def test_requests_per_file_are_capped(stub_server):
+    repos = [{'id': f'org/lora-style-{i}'} for i in range(HfResolver.SEARCH_LIMIT)]
+    routes = {'/api/models': json_route(repos)}
+    for repo in repos:
+        routes[f"/api/models/{repo['id']}"] = json_route({'siblings': [{'rfilename': 'other.safetensors'}]})
+    server = stub_server(routes)
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('lora_style_v2.safetensors') is None
+    finally:
+        resolver.close()
+    assert len(server.requests) == HfResolver.MAX_REQUESTS
+
+
+def test_first_empty_search_stops_lookup(stub_server):
+    server = stub_server(hf_routes())
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('unknown_model_v2.safetensors') is None
+    finally:
+        resolver.close()
+    assert len(server.requests) == 1
+
+
+def test_cached_hf_result_keeps_size_and_sha256(tmp_path):
+    from ModelFinderV2_5.result_table import ResultTable, SearchRow
+
+    model = AnalysisModel()
+    cache = SearchCache(db_path=str(tmp_path / 'cache.db'))
+    task = {'search_term_query': 'sdxl_vae.safetensors', 'name_for_decision': 'sdxl_vae.safetensors', 'node_type': 'VAELoader'}
+    resolved = ResultTable(['文件名', '状态', '下载链接', '镜像链接', '搜索链接', '文件大小', 'SHA256'], [SearchRow({
+        '文件名': 'sdxl_vae.safetensors', '状态': '已处理', '下载链接': 'https://huggingface.co/x/resolve/main/sdxl_vae.safetensors',
+        '文件大小': '334641164', 'SHA256': SHA})])
+    model._store_search_result(cache, task, resolved[0])
+
+    table = ResultTable(['文件名', '状态', '下载链接', '镜像链接', '搜索链接'], [SearchRow({'文件名': 'sdxl_vae.safetensors'})])
+    model._apply_cached_result(table, 0, cache.get('hf', 'sdxl_vae.safetensors'))
+    assert table[0].status == '已处理'
+    assert (table[0].file_size, table[0].sha256) == ('334641164', SHA)
+    assert '文件大小' in table.columns and 'SHA256' in table.columns
+
+
+def test_search_cache_adds_file_columns_to_old_databases(tmp_path):
+    import sqlite3
+    db = tmp_path / 'old.db'
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE search_results (source TEXT NOT NULL, term TEXT NOT NULL, status TEXT NOT NULL, "
+                 "download_link TEXT NOT NULL DEFAULT '', mirror_link TEXT NOT NULL DEFAULT '', search_link TEXT NOT NULL DEFAULT '', "
+                 "negative INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL, PRIMARY KEY (source, term))")
+    conn.execute("INSERT INTO search_results VALUES ('hf', 'a.safetensors', '已处理', 'https://x', '', '', 0, 9e12)")
+    conn.commit()
+    conn.close()
+    cache = SearchCache(db_path=str(db))
+    assert cache.get('hf', 'a.safetensors')['file_size'] == ''
+    assert cache.put('hf', 'b.safetensors', '已处理', 'https://y', file_size=12, sha256=SHA)
+    assert cache.get('hf', 'b.safetensors')['file_size'] == '12'
@@ -0,0 +1,162 @@
+import json
+import re
+
+import pytest
+
+from ModelFinderV2_5 import utils
+from ModelFinderV2_5.utils import create_html_view, detect_csv_encoding
+
+
+def write_csv(path, rows, encoding='utf-8-sig'):
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        f.write('\r\n'.join(rows) + '\r\n')
+    return str(path)
+
+
+def report_data(html_path):
+    """页面中嵌入的 reportData JSON。"""
+    with open(html_path, encoding='utf-8') as f:
+        content = f.read()
+    match = re.search(r'<script type="application/json" id="reportData">(.*?)</script>', content, re.S)
+    assert match, "reportData blob not found"
+    return json.loads(match.group(1))
+
+
+@pytest.mark.parametrize('encoding, expected', [('utf-8-sig', 'utf-8-sig'), ('utf-8', 'utf-8'), ('gb18030', 'gb18030')])
+def test_csv_encoding_is_detected(tmp_path, encoding, expected):
+    path = write_csv(tmp_path / 'r.csv', ['文件名,状态', '模型.safetensors,已处理'], encoding=encoding)
+    assert detect_csv_encoding(path) == expected
+    assert report_data(create_html_view(path))['rows'] == [['模型.safetensors', '已处理']]
+
+
+def test_multibyte_character_cut_by_sniff_sample_is_utf8(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / 'r.csv', ['文件名', '模' * 10], encoding='utf-8')
+    for sample in range(1, 30):
+        monkeypatch.setattr(utils, 'ENCODING_SNIFF_BYTES', sample)
+        assert detect_csv_encoding(path) == 'utf-8'
+
+
+def test_rows_are_streamed_in_report_column_order(tmp_path):
+    path = write_csv(tmp_path / 'missing.csv', [
+        '状态,自定义,文件名,下载链接,序号',
+        '已处理,x,a.safetensors,https://huggingface.co/a,1',
+        '',
+        '未找到,,b.pt',  # 列数不足的行补空
+        '已处理,"</script><b>",c.ckpt,,3',
+    ])
+    html_file = create_html_view(path)
+    assert html_file == str(tmp_path / 'missing.html')
+
+    data = report_data(html_file)
+    assert [c['title'] for c in data['columns']] == ['序号', '文件名', 'HuggingFace', '状态', '自定义']
+    assert data['rows'] == [
+        ['1', 'a.safetensors', 'https://huggingface.co/a', '已处理', 'x'],
+        ['', 'b.pt', '', '未找到', ''],
+        ['3', 'c.ckpt', '', '已处理', '</script><b>'],
+    ]
+    content = open(html_file, encoding='utf-8').read()
+    assert '</script><b>' not in content  # 数据中的 < 被转义，不会提前结束脚本
+    assert '总记录数 (Total Records): 3' in content
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_empty_csv_gives_no_report(tmp_path):
+    path = tmp_path / 'empty.csv'
+    path.write_bytes(b'')
+    assert create_html_view(str(path)) is None
+    assert not (tmp_path / 'empty.html').exists()
+
+
+def test_column_metadata_drives_client_side_rendering(tmp_path):
+    path = write_csv(tmp_path / 'r.csv', [
+        '文件名,状态,下载链接,HF镜像,搜索链接,节点ID',
+        'a.safetensors,已处理,https://huggingface.co/a,https://hf-mirror.com/a,,4',
+    ])
+    data = report_data(create_html_view(path))
+    assert [(c['title'], c['kind']) for c in data['columns']] == [
+        ('文件名', 'file'), ('节点ID', 'text'), ('HuggingFace', 'hf'), ('HF镜像 (Mirror)', 'mirror'),
+        ('LibLib', 'liblib'), ('状态', 'status'),
+    ]
+    assert data['mirrorColumn'] == 3
+    content = open(tmp_path / 'r.html', encoding='utf-8').read()
+    assert 'id="copyButton"' in content and 'id="filterInput"' in content
+    assert '<script>' in content and utils.REPORT_ASSET_JS not in content  # 单个文件内联样式和脚本
+
+
+def test_report_without_mirror_column_has_no_copy_button(tmp_path):
+    path = write_csv(tmp_path / 'summary.csv', ['CSV文件,缺失数量', 'wf.csv,3'])
+    data = report_data(create_html_view(path))
+    assert data['mirrorColumn'] == -1
+    content = open(tmp_path / 'summary.html', encoding='utf-8').read()
+    assert 'id="copyButton"' not in content and 'id="filterInput"' not in content
+
+
+def test_large_report_embeds_rows_without_rendering_them(tmp_path):
+    rows = [f'model_{i:05d}.safetensors,已处理,https://huggingface.co/r/{i},https://hf-mirror.com/r/{i}' for i in range(20000)]
+    path = write_csv(tmp_path / 'big.csv', ['文件名,状态,下载链接,镜像链接'] + rows)
+    html_file = create_html_view(path)
+    data = report_data(html_file)
+    assert len(data['rows']) == 20000
+    assert data['rows'][12345] == ['model_12345.safetensors', 'https://huggingface.co/r/12345', 'https://hf-mirror.com/r/12345', '已处理']
+    content = open(html_file, encoding='utf-8').read()
+    assert '<tbody id="tableBody"></tbody>' in content  # 行由页面脚本按可见区域渲染
+    assert '<td' not in content
+
+
+def model_rows(count):
+    return ['文件名,状态,镜像链接'] + [f'm{i:02d}.safetensors,已处理,https://hf-mirror.com/{i}' for i in range(count)]
+
+
+def page_files(directory, base='missing'):
+    return sorted(p.name for p in directory.glob(f'{base}_p*.html'))
+
+
+def test_large_report_is_split_into_pages(tmp_path):
+    path = write_csv(tmp_path / 'missing.csv', model_rows(7))
+    index = create_html_view(path, page_size=3)
+    assert index == str(tmp_path / 'missing.html')
+
+    assert page_files(tmp_path) == ['missing_p001.html', 'missing_p002.html', 'missing_p003.html']
+    pages = [report_data(tmp_path / name)['rows'] for name in page_files(tmp_path)]
+    assert [len(rows) for rows in pages] == [3, 3, 1]
+    assert [row[0] for rows in pages for row in rows] == [f'm{i:02d}.safetensors' for i in range(7)]
+
+    # 分页共享样式和脚本文件
+    assert (tmp_path / utils.REPORT_ASSET_CSS).read_text(encoding='utf-8') == utils._REPORT_STYLE
+    assert (tmp_path / utils.REPORT_ASSET_JS).read_text(encoding='utf-8') == utils._REPORT_SCRIPT
+    second = (tmp_path / 'missing_p002.html').read_text(encoding='utf-8')
+    assert f'src="{utils.REPORT_ASSET_JS}"' in second and '<style>' not in second
+    assert 'href="missing_p001.html"' in second and 'href="missing_p003.html"' in second and 'href="missing.html"' in second
+
+    content = open(index, encoding='utf-8').read()
+    assert 'id="reportData"' not in content
+    for name in page_files(tmp_path):
+        assert f'href="{name}"' in content
+    assert '总记录数 (Total Records): 7，共 3 页' in content
+    assert '<td>1</td><td class="file-name">m06.safetensors</td><td class="file-name">m06.safetensors</td>' in content
+
+
+def test_stale_pages_are_removed(tmp_path):
+    path = write_csv(tmp_path / 'missing.csv', model_rows(10))
+    create_html_view(path, page_size=2)
+    assert len(page_files(tmp_path)) == 5
+    (tmp_path / 'missing_other_p001.html').write_text('keep', encoding='utf-8')  # 其他报告的分页不受影响
+
+    write_csv(tmp_path / 'missing.csv', model_rows(3))
+    create_html_view(path, page_size=2)
+    assert page_files(tmp_path) == ['missing_p001.html', 'missing_p002.html']
+    assert (tmp_path / 'missing_other_p001.html').exists()
+
+    # 不再需要分页时删除全部分页，生成单个文件
+    create_html_view(path, page_size=5)
+    assert page_files(tmp_path) == []
+    assert len(report_data(tmp_path / 'missing.html')['rows']) == 3
+
+
+@pytest.mark.parametrize('page_size', [0, 7, 100])
+def test_report_within_page_size_is_a_single_file(tmp_path, page_size):
+    path = write_csv(tmp_path / 'missing.csv', model_rows(7))
+    create_html_view(path, page_size=page_size)
+    assert page_files(tmp_path) == []
+    assert not (tmp_path / utils.REPORT_ASSET_JS).exists()
+    assert len(report_data(tmp_path / 'missing.html')['rows']) == 7
@@ -0,0 +1,77 @@
+from ModelFinderV2_5.search_engine import HttpSearchBackend, RateLimiter
+
+HF_URL = "https://huggingface.co/stabilityai/sdxl-vae/blob/main/sdxl_vae.safetensors"
+LIBLIB_URL = "https://www.liblib.art/modelinfo/0123456789abcdef"
+
+
+def bing_page(results):
+    items = ''.join(f'<li class="b_algo"><h2><a href="{href}">{text}</a></h2><p>snippet<br></p></li>' for href, text in results)
+    return f'<html><body><div id="b_header"><a href="/other">x</a></div><ol id="b_results">{items}</ol></body></html>'
+
+
+def make_backend(server):
+    return HttpSearchBackend(RateLimiter(min_interval=0, jitter=0), base_url=server.url, timeout=5)
+
+
+def test_search_extracts_first_hf_link(stub_server):
+    server = stub_server({'/search': (200, 'text/html', bing_page([(HF_URL, 'sdxl_vae.safetensors'), ('https://example.com/', 'other')]))})
+    backend = make_backend(server)
+    try:
+        hit = backend.search(None, 'site:huggingface.co sdxl_vae.safetensors')
+    finally:
+        backend.close()
+    assert hit['error'] is None
+    assert hit['first_url'] == HF_URL
+    assert hit['first_text'] == 'sdxl_vae.safetensors'
+    assert server.requests[0][1]['q'] == 'site:huggingface.co sdxl_vae.safetensors'
+
+
+def test_search_follows_ck_redirect_to_liblib(stub_server):
+    routes = {
+        '/ck/a': (200, 'text/html; charset=utf-8', f'<html><script>var u = "{LIBLIB_URL}";location.replace(u);</script></html>'),
+    }
+    server = stub_server(routes)
+    redirect = f"{server.url}/ck/a?!&amp;&amp;p=abc&amp;u=a1aHR0cHM"
+    routes['/search'] = (200, 'text/html', bing_page([(redirect, '模型'), (LIBLIB_URL + '?from=bing', 'LibLib')]))
+    backend = make_backend(server)
+    try:
+        hit = backend.search(None, 'site:liblib.art 模型')
+        resolved = backend.resolve_url(hit['first_url'])
+    finally:
+        backend.close()
+    assert hit['error'] is None
+    assert hit['first_url'].startswith(f"{server.url}/ck/a?")
+    assert hit['liblib_links'] == [LIBLIB_URL + '?from=bing']
+    assert resolved == LIBLIB_URL
+
+
+def test_search_without_results_container(stub_server):
+    server = stub_server({'/search': (200, 'text/html', '<html><body>captcha</body></html>')})
+    backend = make_backend(server)
+    try:
+        assert backend.search(None, 'anything')['error'] == '未找到(无结果区)'
+    finally:
+        backend.close()
+
+
+def test_search_page_with_implicitly_closed_elements(stub_server):
+    # 未关闭的 <li>/<p>、多余的结束标签，结果区之后的侧栏链接不应计入
+    page = (
+        '<html><body><ol id="b_results">'
+        '<li class="b_ad"><div class="b_caption"><p>sponsored</div></span>'
+        f'<li class="b_algo"><h2><a href="{HF_URL}">sdxl_vae.safetensors</a></h2><p>first <b>snippet</b>'
+        f'<li class="b_algo"><h2><a href="{LIBLIB_URL}">LibLib</a></h2><p>second'
+        '</ol>'
+        '<aside id="b_context"><h2><a href="https://www.liblib.art/sidebar">ad</a></h2></aside>'
+        '</body></html>'
+    )
+    server = stub_server({'/search': (200, 'text/html', page)})
+    backend = make_backend(server)
+    try:
+        hit = backend.search(None, 'site:huggingface.co sdxl_vae.safetensors')
+    finally:
+        backend.close()
+    assert hit['error'] is None
+    assert hit['first_url'] == HF_URL
+    assert hit['first_text'] == 'sdxl_vae.safetensors'
+    assert hit['liblib_links'] == [LIBLIB_URL]
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from ModelFinderV2_5.irregular_names_model import IrregularNamesModel
+
+
+@pytest.fixture
+def make_model(tmp_path, monkeypatch):
+    path = tmp_path / 'irregular_names_map.json'
+    monkeypatch.setattr(IrregularNamesModel, '_get_mappings_path', lambda self: str(path))
+
+    def make(pairs):
+        mappings = [{'id': str(i), 'original_name': original, 'corrected_name': corrected, 'notes': ''}
+                     for i, (original, corrected) in enumerate(pairs)]
+        path.write_text(json.dumps(mappings, ensure_ascii=False), encoding='utf-8')
+        return IrregularNamesModel()
+    return make
+
+
+def lookup(model, name):
+    return model.get_corrected_name(name, with_confidence=True)
+
+
+def test_exact_then_normalized_then_casefold(make_model):
+    model = make_model([
+        ('Model A.safetensors', 'from_title_case.safetensors'),
+        ('model a.safetensors', 'from_lower_case.safetensors'),
+    ])
+    assert lookup(model, 'Model A.safetensors') == ('from_title_case.safetensors', 1.0)
+    assert lookup(model, 'model a.safetensors') == ('from_lower_case.safetensors', 1.0)
+    # 空格差异：按标准化键查找，大小写仍然区分
+    assert lookup(model, '  model   a.safetensors ') == ('from_lower_case.safetensors', 0.99)
+    assert lookup(model, 'Model\tA.safetensors') == ('from_title_case.safetensors', 0.99)
+    # 只有大小写不同：同一键有多条映射时取列表中靠前的一条
+    assert lookup(model, 'MODEL A.SAFETENSORS') == ('from_title_case.safetensors', 0.98)
+    assert model.get_corrected_name('MODEL A.SAFETENSORS') == 'from_title_case.safetensors'
+
+
+def test_plain_mappings_take_precedence_over_rules(make_model):
+    model = make_model([
+        ('glob:*.safetensors', 'from_glob.safetensors'),
+        ('Flux1-Dev.safetensors', 'from_mapping.safetensors'),
+    ])
+    assert lookup(model, 'flux1-dev.safetensors') == ('from_mapping.safetensors', 0.98)
+    assert lookup(model, 'other.safetensors') == ('from_glob.safetensors', 0.95)
+
+
+@pytest.mark.parametrize('glob_first', [True, False])
+def test_rules_match_in_list_order(make_model, glob_first):
+    rules = [('glob:flux1-dev*.safetensors', 'flux1-dev.safetensors'),
+             (r're:(.+)_fp8\.safetensors', r'\1.safetensors')]
+    model = make_model(rules if glob_first else rules[::-1])
+    expected = 'flux1-dev.safetensors' if glob_first else 'flux1-dev-v2.safetensors'
+    assert lookup(model, 'flux1-dev-v2_fp8.safetensors') == (expected, 0.95)
+
+
+def test_rule_matching_details(make_model):
+    model = make_model([
+        (r're:(.+)_fp8\.safetensors', r'\1.safetensors'),
+        ('glob:SDXL_VAE*.safetensors', 'sdxl_vae.safetensors'),
+        (r're:ckpt_(\d+)\.pt', r'C:\models\1.pt'),
+        ('re:[unclosed', 'ignored.safetensors'),
+    ])
+    assert lookup(model, 'unet_fp8.safetensors') == ('unet.safetensors', 0.95)
+    assert lookup(model, 'UNET_FP8.SAFETENSORS')[1] == 0.0  # re: 规则区分大小写
+    assert lookup(model, 'sdxl_vae_fixed.SAFETENSORS') == ('sdxl_vae.safetensors', 0.95)  # glob: 不区分
+    assert lookup(model, 'x_unet_fp8.safetensors.bak') == ('x_unet_fp8.safetensors.bak', 0.0)  # 必须整体匹配
+    assert lookup(model, 'ckpt_7.pt') == (r'C:\models\1.pt', 0.95)  # 不是分组引用时按原样使用
+    assert len(model._rules) == 3
+    assert not model.add_mapping('re:(bad', 'x.safetensors')
+
+
+def test_unmapped_names_and_fuzzy_fallback(make_model):
+    model = make_model([('juggernautXL_v9_rundiffusion.safetensors', 'juggernautXL_v9.safetensors')])
+    assert model.get_corrected_name('unknown.pt') == 'unknown.pt'
+    assert lookup(model, 'unknown.pt') == ('unknown.pt', 0.0)
+    assert lookup(model, '') == ('', 0.0)
+
+    # 词序和分隔符不影响模糊匹配；拼写差异得到低于规则匹配的相似度
+    assert lookup(model, 'rundiffusion-juggernautXL v9.safetensors') == ('juggernautXL_v9.safetensors', 1.0)
+    assert lookup(model, 'juggernautXL_v9_rundifusion.safetensors') == ('juggernautXL_v9.safetensors', 0.947)
+    assert lookup(model, 'juggernaut_XL_v9_rundiffusion.safetensors')[1] == 0.0  # 低于 FUZZY_MIN_SCORE
+    # 不带 with_confidence 时不做模糊匹配
+    assert model.get_corrected_name('juggernautXL_v9_rundifusion.safetensors') == 'juggernautXL_v9_rundifusion.safetensors'
+    assert lookup(model, 'juggernautXL_v8_rundiffusion.safetensors')[1] == 0.0  # 版本号不同
+
+
+def test_index_follows_edits(make_model):
+    model = make_model([('a.safetensors', 'b.safetensors')])
+    version = model.version
+    assert model.add_mapping('glob:c*.pt', 'c.pt')
+    mapping_id = model.mappings[0]['id']
+    assert model.update_mapping(mapping_id, 'A2.safetensors', 'b2.safetensors')
+    assert model.version == version + 2
+
+    assert lookup(model, 'a.safetensors')[1] == 0.0
+    assert lookup(model, 'a2.safetensors') == ('b2.safetensors', 0.98)
+    assert lookup(model, 'c_v1.pt') == ('c.pt', 0.95)
+    assert model.delete_mapping(mapping_id)
+    assert lookup(model, 'A2.safetensors')[1] == 0.0
+    assert IrregularNamesModel().get_corrected_name('c_v1.pt') == 'c.pt'  # 修改已保存
@@ -0,0 +1,164 @@
+import os
+
+import pytest
+
+from ModelFinderV2_5 import model_dedupe
+from ModelFinderV2_5.model_dedupe import ModelDeduper
+from ModelFinderV2_5.model_index import ModelIndex
+
+CHUNK = 1024  # 测试中的部分哈希长度，文件大于 2*CHUNK 时才需要完整哈希
+
+
+@pytest.fixture(autouse=True)
+def small_partial_hash(monkeypatch):
+    monkeypatch.setattr(model_dedupe, 'PARTIAL_HASH_BYTES', CHUNK)
+
+
+@pytest.fixture
+def models_root(tmp_path):
+    root = tmp_path / 'models'
+    root.mkdir()
+    return root
+
+
+def write(root, rel_path, data):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def make_index(root, tmp_path):
+    index = ModelIndex(str(root), str(tmp_path / 'index.db'))
+    index.refresh()
+    index.save()
+    return index
+
+
+def deduper(index):
+    return ModelDeduper(index, ['.safetensors', '.pt'], min_size=1)
+
+
+def test_grouping_by_size_partial_and_full_hash(models_root, tmp_path):
+    big = os.urandom(10 * CHUNK)
+    middle_differs = big[:5 * CHUNK] + bytes([big[5 * CHUNK] ^ 1]) + big[5 * CHUNK + 1:]
+    write(models_root, 'checkpoints/a.safetensors', big)
+    write(models_root, 'loras/a_copy.safetensors', big)
+    write(models_root, 'other/same_ends.safetensors', middle_differs)    # 首尾相同，只有完整哈希能区分
+    write(models_root, 'other/same_size.safetensors', os.urandom(10 * CHUNK))  # 大小相同，部分哈希即可区分
+    write(models_root, 'vae/unique.pt', os.urandom(3 * CHUNK))
+    write(models_root, 'vae/readme.txt', big)                           # 扩展名不在列表中
+
+    report = deduper(make_index(models_root, tmp_path)).find_duplicates()
+
+    assert [g['files'] for g in report['groups']] == [['checkpoints/a.safetensors', 'loras/a_copy.safetensors']]
+    assert report['reclaimable_bytes'] == len(big)
+    # 4 个同大小文件计算部分哈希 (各 2*CHUNK)，3 个首尾相同的文件计算完整哈希
+    assert report['hashed_bytes'] == 4 * 2 * CHUNK + 3 * len(big)
+
+
+def test_small_files_hash_fully_in_partial_pass(models_root, tmp_path):
+    data = os.urandom(2 * CHUNK)
+    write(models_root, 'a/x.pt', data)
+    write(models_root, 'b/y.pt', data)
+    report = deduper(make_index(models_root, tmp_path)).find_duplicates()
+    assert report['groups'][0]['files'] == ['a/x.pt', 'b/y.pt']
+    assert report['hashed_bytes'] == 2 * len(data)
+
+
+def test_cached_hashes_are_reused(models_root, tmp_path):
+    data = os.urandom(5 * CHUNK)
+    write(models_root, 'a/x.pt', data)
+    write(models_root, 'b/y.pt', data)
+    make_index(models_root, tmp_path)
+    deduper(make_index(models_root, tmp_path)).find_duplicates()
+
+    report = deduper(make_index(models_root, tmp_path)).find_duplicates()
+    assert report['hashed_bytes'] == 0 and report['cache_hits'] == 2
+    assert len(report['groups']) == 1
+
+
+def test_existing_hardlinks_are_not_reclaimable(models_root, tmp_path):
+    data = os.urandom(5 * CHUNK)
+    original = write(models_root, 'a/x.pt', data)
+    (models_root / 'b').mkdir()
+    os.link(original, models_root / 'b' / 'linked.pt')
+    write(models_root, 'c/copy.pt', data)
+
+    report = deduper(make_index(models_root, tmp_path)).find_duplicates()
+    group = report['groups'][0]
+    assert group['files'] == ['a/x.pt', 'b/linked.pt', 'c/copy.pt']
+    assert group['reclaimable'] == len(data)
+    assert report['hashed_bytes'] == 2 * 2 * CHUNK + 2 * len(data)  # 同一inode只读取一次
+
+    (models_root / 'c' / 'copy.pt').unlink()
+    os.link(original, models_root / 'c' / 'copy.pt')
+    assert deduper(make_index(models_root, tmp_path)).find_duplicates()['groups'] == []
+
+
+@pytest.mark.parametrize('mode', ['hardlink', 'symlink'])
+def test_consolidate_replaces_duplicates_with_links(models_root, tmp_path, mode):
+    data = os.urandom(5 * CHUNK)
+    keep = write(models_root, 'checkpoints/keep.pt', data)
+    dup = write(models_root, 'loras/dup.pt', data)
+    index = make_index(models_root, tmp_path)
+    group = deduper(index).find_duplicates()['groups'][0]
+
+    results = deduper(index).consolidate(group, keep='checkpoints/keep.pt', mode=mode)
+
+    assert results == [{'path': 'loras/dup.pt', 'success': True, 'message': results[0]['message']}]
+    assert os.path.samefile(keep, dup)
+    assert os.path.islink(dup) == (mode == 'symlink')
+    if mode == 'symlink':
+        assert os.readlink(dup) == os.path.join('..', 'checkpoints', 'keep.pt')
+    assert open(dup, 'rb').read() == data
+    assert not [name for name in os.listdir(models_root / 'loras') if name.endswith('.tmp')]
+    assert deduper(index).find_duplicates()['groups'] == []
+
+
+def test_consolidate_skips_file_modified_after_detection(models_root, tmp_path):
+    data = os.urandom(5 * CHUNK)
+    write(models_root, 'a/keep.pt', data)
+    changed = write(models_root, 'b/changed.pt', data)
+    untouched = write(models_root, 'c/untouched.pt', data)
+    index = make_index(models_root, tmp_path)
+    group = deduper(index).find_duplicates()['groups'][0]
+    os.utime(changed, (1, 1))
+
+    results = {r['path']: r for r in deduper(index).consolidate(group, keep='a/keep.pt')}
+
+    assert not results['b/changed.pt']['success']
+    assert os.stat(changed).st_nlink == 1
+    assert results['c/untouched.pt']['success'] and os.stat(untouched).st_nlink == 2
+
+
+def test_consolidate_aborts_group_when_kept_file_changed(models_root, tmp_path):
+    data = os.urandom(5 * CHUNK)
+    keep = write(models_root, 'a/keep.pt', data)
+    other = write(models_root, 'b/other.pt', data)
+    index = make_index(models_root, tmp_path)
+    group = deduper(index).find_duplicates()['groups'][0]
+
+    # 内容被改写，但大小和修改时间与检测时相同：只有重新计算哈希才能发现
+    st = os.stat(keep)
+    with open(keep, 'r+b') as f:
+        f.write(b'X')
+    os.utime(keep, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    results = deduper(index).consolidate(group, keep='a/keep.pt', mode='hardlink')
+    assert [r['success'] for r in results] == [False]
+    assert open(other, 'rb').read() == data and os.stat(other).st_nlink == 1
+
+
+def test_find_duplicates_ignores_stale_index_entries(models_root, tmp_path):
+    data = os.urandom(5 * CHUNK)
+    write(models_root, 'a/x.pt', data)
+    replaced = write(models_root, 'b/y.pt', data)
+    index = make_index(models_root, tmp_path)
+    assert len(deduper(index).find_duplicates()['groups']) == 1
+
+    # 原地替换为同样大小的其他内容，不刷新索引
+    with open(replaced, 'wb') as f:
+        f.write(os.urandom(len(data)))
+    os.utime(replaced, (5, 5))
+    assert deduper(index).find_duplicates()['groups'] == []
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from ModelFinderV2_5 import model_index
+from ModelFinderV2_5.model_index import ModelIndex
+
+
+@pytest.fixture
+def models_root(tmp_path):
+    root = tmp_path / 'models'
+    for rel_path in ('checkpoints/sdxl/base.safetensors', 'checkpoints/flux.safetensors', 'loras/detail.pt', 'vae/ae.sft'):
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * 10)
+    return root
+
+
+@pytest.fixture
+def rescans(monkeypatch):
+    """记录被重新列出的目录。"""
+    seen = []
+    rescan = ModelIndex._rescan_directory
+
+    def spy(self, rel_dir, abs_dir, mtime):
+        seen.append(rel_dir)
+        return rescan(self, rel_dir, abs_dir, mtime)
+    monkeypatch.setattr(ModelIndex, '_rescan_directory', spy)
+    return seen
+
+
+def touch_dir(path, stamp):
+    """修改目录后设置一个确定的修改时间，不依赖文件系统的时间精度。"""
+    os.utime(path, (stamp, stamp))
+
+
+def open_index(root, tmp_path):
+    index = ModelIndex(str(root), str(tmp_path / 'index.db'))
+    index.refresh()
+    return index
+
+
+def files(index):
+    return sorted(rel_path.replace(os.sep, '/') for rel_path, _, _ in index.iter_files())
+
+
+def test_unchanged_tree_is_not_rescanned(models_root, tmp_path, rescans):
+    index = open_index(models_root, tmp_path)
+    assert len(rescans) == 5  # 根目录和4个子目录
+
+    rescans.clear()
+    assert index.refresh() == 4
+    assert rescans == []
+
+    reopened = open_index(models_root, tmp_path)  # 从索引文件加载后同样不需要重新列出
+    assert rescans == []
+    assert files(reopened) == files(index)
+    assert reopened.lookup('BASE.safetensors') == [os.path.join('checkpoints', 'sdxl', 'base.safetensors')]
+
+
+def test_changes_in_subdirectory_are_picked_up(models_root, tmp_path, rescans):
+    index = open_index(models_root, tmp_path)
+    sdxl = models_root / 'checkpoints' / 'sdxl'
+
+    (sdxl / 'refiner.safetensors').write_bytes(b'y')
+    (sdxl / 'base.safetensors').rename(sdxl / 'base_v2.safetensors')
+    (models_root / 'loras' / 'detail.pt').unlink()
+    touch_dir(sdxl, 1000)
+    touch_dir(models_root / 'loras', 1000)
+    rescans.clear()
+
+    reopened = open_index(models_root, tmp_path)
+    assert sorted(rescans) == ['checkpoints/sdxl'.replace('/', os.sep), 'loras']
+    assert files(reopened) == ['checkpoints/flux.safetensors', 'checkpoints/sdxl/base_v2.safetensors',
+                               'checkpoints/sdxl/refiner.safetensors', 'vae/ae.sft']
+    assert reopened.lookup('base.safetensors') == []
+    assert not reopened.contains('detail.pt')
+    assert reopened.contains('base_v2')
+
+
+def test_new_and_removed_subdirectories(models_root, tmp_path, rescans):
+    index = open_index(models_root, tmp_path)
+    (models_root / 'upscale_models' / 'x4').mkdir(parents=True)
+    (models_root / 'upscale_models' / 'x4' / 'esrgan.pth').write_bytes(b'z')
+    for path in (models_root / 'vae').iterdir():
+        path.unlink()
+    (models_root / 'vae').rmdir()
+    touch_dir(models_root, 2000)
+    rescans.clear()
+
+    index.refresh()
+    assert 'vae/ae.sft' not in files(index)
+    assert 'upscale_models/x4/esrgan.pth' in files(index)
+    assert sorted(rescans) == ['', 'upscale_models', os.path.join('upscale_models', 'x4')]
+    assert files(open_index(models_root, tmp_path)) == files(index)
+
+
+def test_each_root_has_its_own_index_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_index, '__file__', str(tmp_path / 'pkg' / 'model_index.py'))
+    (tmp_path / 'pkg').mkdir()
+    roots = []
+    for name in ('a', 'b'):
+        root = tmp_path / name / 'models'
+        (root / 'loras').mkdir(parents=True)
+        (root / 'loras' / f'{name}.safetensors').write_bytes(b'x')
+        roots.append(root)
+
+    first, second = ModelIndex(str(roots[0])), ModelIndex(str(roots[1]))
+    assert first._index_path != second._index_path
+    assert ModelIndex(str(roots[0]) + os.sep)._index_path == first._index_path
+    first.refresh()
+    second.refresh()
+
+    for root, name in zip(roots, ('a', 'b')):
+        reopened = ModelIndex(str(root))
+        assert reopened.load()
+        assert files(reopened) == [f'loras/{name}.safetensors']
+    assert len(os.listdir(tmp_path / 'pkg')) >= 2
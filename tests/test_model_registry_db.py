@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from ModelFinderV2_5.model_registry import ModelRegistry
+from ModelFinderV2_5.model_registry_db import SQLiteModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = SQLiteModelRegistry()
+    assert registry.set_registry_file(str(tmp_path / 'registry.db'))
+    yield registry
+    registry.close()
+
+
+def add(registry, name, **fields):
+    return registry.add_model(dict({'name': name, 'path': f'/models/{name}'}, **fields))
+
+
+def names(models):
+    return [m['name'] for m in models]
+
+
+def test_legacy_json_import_keeps_ids_and_oplog_changes(tmp_path):
+    json_path = str(tmp_path / 'model_registry.json')
+    legacy = ModelRegistry()
+    legacy.set_registry_file(json_path)
+    first = legacy.add_model({'name': 'a.safetensors', 'path': '/m/a.safetensors', 'tags': ['sdxl']})
+    second = legacy.add_model({'name': 'b.safetensors', 'path': '/m/b.safetensors'})
+    third = legacy.add_model({'name': 'c.safetensors', 'path': '/m/c.safetensors'})
+    legacy.delete_model(third)
+    legacy.add_tag_to_model(second, 'lora')
+    # 这些修改只在操作日志中，快照里仍是空记录
+    assert os.path.getsize(json_path + ModelRegistry.OPLOG_SUFFIX) > 0
+
+    db = SQLiteModelRegistry()
+    assert db.set_registry_file(str(tmp_path / 'registry.db'), legacy_json_path=json_path)
+    try:
+        assert {m['id']: m['name'] for m in db.get_all_models()} == {first: 'a.safetensors', second: 'b.safetensors'}
+        assert db.get_model(first)['tags'] == ['sdxl']
+        assert db.get_model(second)['tags'] == ['lora']
+        assert int(add(db, 'd.safetensors')) == int(third) + 1
+    finally:
+        db.close()
+
+    # 已导入过的数据库再次打开时不会重复导入
+    reopened = SQLiteModelRegistry()
+    reopened.set_registry_file(str(tmp_path / 'registry.db'), legacy_json_path=json_path)
+    try:
+        assert len(reopened.get_all_models()) == 3
+    finally:
+        reopened.close()
+
+
+def test_next_id_never_reuses_deleted_id(registry, tmp_path):
+    first = add(registry, 'a')
+    second = add(registry, 'b')
+    assert registry.delete_model(second)
+    third = add(registry, 'c')
+    assert int(third) == int(second) + 1
+    assert registry.delete_model(third)
+
+    registry.set_registry_file(str(tmp_path / 'registry.db'))  # 重新打开后仍然有效
+    assert int(add(registry, 'd')) == int(third) + 1
+    assert registry.get_model(first)['name'] == 'a'
+
+
+@pytest.mark.parametrize('fts', [True, False])
+def test_keyword_search_matches_substrings(registry, fts):
+    if fts:
+        assert registry._fts, "SQLite build without FTS5 trigram tokenizer"
+    else:
+        registry._fts = False  # 模拟不支持FTS5的SQLite，全部使用LIKE
+    add(registry, 'juggernautXL_v9.safetensors', description='photoreal SDXL checkpoint')
+    add(registry, 'flux1-dev.safetensors', description='FLUX base')
+    add(registry, 'detail_tweaker.pt', description='100% lora')
+
+    assert names(registry.search_models('NAUT')) == ['juggernautXL_v9.safetensors']
+    assert names(registry.search_models('sdxl')) == ['juggernautXL_v9.safetensors']  # 匹配描述，不区分大小写
+    assert names(registry.search_models('"base')) == []
+    # 短于3个字符时使用LIKE，并转义通配符
+    assert names(registry.search_models('x1')) == ['flux1-dev.safetensors']
+    assert names(registry.search_models('%')) == ['detail_tweaker.pt']
+    assert names(registry.search_models('_')) == ['detail_tweaker.pt', 'juggernautXL_v9.safetensors']
+
+
+def test_search_index_follows_updates_and_deletes(registry):
+    model_id = add(registry, 'old_name.safetensors')
+    registry.update_model(model_id, {'name': 'renamed.safetensors', 'path': '/models/renamed.safetensors'})
+    assert registry.search_models('old_name') == []
+    assert names(registry.search_models('renamed')) == ['renamed.safetensors']
+    registry.delete_model(model_id)
+    assert registry.search_models('renamed') == []
+
+
+def test_tag_search_requires_all_tags(registry):
+    add(registry, 'a', tags=['sdxl', 'lora'], type='loras')
+    add(registry, 'b', tags=['sdxl'], type='checkpoints')
+    add(registry, 'c', tags=['lora', 'sd15', 'sdxl'], type='loras')
+
+    assert names(registry.search_models(tags=['sdxl'])) == ['a', 'b', 'c']
+    assert names(registry.search_models(tags=['sdxl', 'lora'])) == ['a', 'c']
+    assert names(registry.search_models(tags=['lora', 'lora'])) == ['a', 'c']
+    assert names(registry.search_models(tags=['sdxl', 'missing'])) == []
+    assert names(registry.search_models(tags=['sdxl'], model_type='checkpoints')) == ['b']
+    assert registry.get_all_tags() == ['lora', 'sd15', 'sdxl']
@@ -0,0 +1,73 @@
+import pytest
+
+from ModelFinderV2_5.model_registry import ModelRegistry
+from ModelFinderV2_5.model_registry_db import SQLiteModelRegistry
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def registry(request, tmp_path):
+    if request.param == 'json':
+        registry = ModelRegistry()
+        registry.set_registry_file(str(tmp_path / 'model_registry.json'))
+        yield registry
+    else:
+        registry = SQLiteModelRegistry()
+        registry.set_registry_file(str(tmp_path / 'registry.db'))
+        yield registry
+        registry.close()
+
+
+def reopen(registry):
+    """从磁盘重新打开同一个记录，确认回滚后的状态也已持久化。"""
+    if isinstance(registry, ModelRegistry):
+        reopened = ModelRegistry()
+    else:
+        reopened = SQLiteModelRegistry()
+    reopened.set_registry_file(registry.registry_file)
+    return reopened
+
+
+def model(name, **fields):
+    return dict({'name': name, 'path': f'/models/{name}'}, **fields)
+
+
+def test_exception_in_batch_rolls_back_everything(registry):
+    kept = registry.add_model(model('kept', tags=['a']))
+
+    with pytest.raises(RuntimeError):
+        with registry.batch():
+            registry.add_model(model('discarded'))
+            registry.update_model(kept, model('renamed'))
+            registry.add_tag_to_model(kept, 'b')
+            with registry.batch():  # 嵌套的 batch 也一起回滚
+                registry.bulk_tag([kept], ['c'])
+            raise RuntimeError('boom')
+
+    for current in (registry, reopen(registry)):
+        assert [(m['id'], m['name'], m['tags']) for m in current.get_all_models()] == [(kept, 'kept', ['a'])]
+    assert int(registry.add_model(model('next'))) == int(kept) + 1
+
+
+def test_batch_commits_on_success(registry):
+    with registry.batch():
+        first = registry.add_model(model('first'))
+        registry.add_tag_to_model(first, 'x')
+        registry.add_model(model('second'))
+
+    assert [(m['name'], m.get('tags', [])) for m in reopen(registry).get_all_models()] == [('first', ['x']), ('second', [])]
+
+
+def test_failed_insert_in_bulk_add_only_undoes_itself():
+    registry = SQLiteModelRegistry()
+    assert registry.set_registry_file(':memory:')
+    try:
+        existing = registry.add_model(model('existing'))
+        # set 无法序列化为JSON：写入记录时出错，此时已分配了ID
+        ids = registry.bulk_add([model('a'), model('bad', extra={1, 2}), model('b'), {'name': 'no_path'}])
+
+        assert ids[1] is None and ids[3] is None
+        assert [int(i) for i in ids if i] == [int(existing) + 1, int(existing) + 2]  # 失败的插入没有占用ID
+        assert [m['name'] for m in registry.get_all_models()] == ['a', 'b', 'existing']
+        assert not registry._conn.in_transaction
+    finally:
+        registry.close()
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+
+from ModelFinderV2_5.model_registry import ModelRegistry
+
+
+def open_registry(path, compact_bytes=None):
+    registry = ModelRegistry()
+    if compact_bytes is not None:
+        registry.COMPACT_LOG_BYTES = compact_bytes
+    registry.set_registry_file(str(path))
+    return registry
+
+
+def model(name):
+    return {'name': name, 'path': f'/models/{name}'}
+
+
+def state(registry):
+    return {model_id: (m['name'], m.get('tags', [])) for model_id, m in registry.models.items()}
+
+
+def snapshot_ids(path):
+    with open(path, encoding='utf-8') as f:
+        return sorted(json.load(f)['models'])
+
+
+def test_load_replays_oplog_on_top_of_snapshot(tmp_path):
+    path = tmp_path / 'model_registry.json'
+    registry = open_registry(path)
+    first = registry.add_model(model('a'))
+    registry.save()
+    second = registry.add_model(model('b'))
+    registry.add_tag_to_model(first, 'sdxl')
+    registry.update_model(second, model('b2'))
+    third = registry.add_model(model('c'))
+    registry.delete_model(third)
+
+    assert snapshot_ids(path) == [first]
+    reloaded = open_registry(path)
+    assert state(reloaded) == {first: ('a', ['sdxl']), second: ('b2', [])}
+    assert reloaded.next_id == int(third) + 1
+    assert reloaded.load() and state(reloaded) == state(registry)  # 重放是幂等的
+
+
+def test_torn_last_line_is_dropped_and_truncated(tmp_path):
+    path = tmp_path / 'model_registry.json'
+    registry = open_registry(path)
+    first = registry.add_model(model('a'))
+    oplog = str(path) + ModelRegistry.OPLOG_SUFFIX
+    with open(oplog, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "id": "9", "data": {"name": "torn"')
+
+    reloaded = open_registry(path)
+    assert state(reloaded) == {first: ('a', [])}
+    second = reloaded.add_model(model('b'))  # 新操作不会接在残缺的行后面
+    assert state(open_registry(path)) == {first: ('a', []), second: ('b', [])}
+
+
+def test_compaction_hands_off_to_new_oplog(tmp_path):
+    path = tmp_path / 'model_registry.json'
+    oplog = str(path) + ModelRegistry.OPLOG_SUFFIX
+    compacting = str(path) + ModelRegistry.COMPACTING_SUFFIX
+    registry = open_registry(path, compact_bytes=600)
+
+    started, release = threading.Event(), threading.Event()
+    write_snapshot = registry._write_snapshot
+
+    def slow_write_snapshot(data):
+        if threading.current_thread() is registry._compaction_thread:
+            started.set()
+            release.wait(5)
+        write_snapshot(data)
+    registry._write_snapshot = slow_write_snapshot
+
+    before = []
+    while not started.is_set():
+        before.append(registry.add_model(model(f'before_{len(before)}')))
+        assert len(before) < 50
+    assert os.path.exists(compacting) and not os.path.exists(oplog)
+
+    # 压缩进行中继续修改：写入新的日志，不阻塞
+    during = registry.add_model(model('during'))
+    registry.add_tag_to_model(before[0], 'tagged')
+    assert os.path.exists(oplog)
+    expected = state(registry)
+    # 此时重新加载：旧快照 + 正在压缩的日志 + 新日志
+    assert state(open_registry(path)) == expected
+
+    release.set()
+    registry._compaction_thread.join(5)
+    assert not os.path.exists(compacting)
+    assert snapshot_ids(path) == sorted(before)
+    with open(oplog, encoding='utf-8') as f:
+        assert [json.loads(line)['op'] for line in f] == ['add', 'tag']
+    assert state(open_registry(path)) == expected
+    assert during in expected
+
+
+def test_interrupted_compaction_is_replayed_and_merged(tmp_path):
+    path = tmp_path / 'model_registry.json'
+    oplog = str(path) + ModelRegistry.OPLOG_SUFFIX
+    compacting = str(path) + ModelRegistry.COMPACTING_SUFFIX
+    registry = open_registry(path, compact_bytes=400)
+
+    def failing_write_snapshot(data):
+        raise OSError('disk full')
+    registry._write_snapshot = failing_write_snapshot
+
+    while registry._compaction_thread is None:
+        registry.add_model(model(f'm{len(registry.models)}'))
+    registry._compaction_thread.join(5)
+    assert os.path.exists(compacting)  # 压缩失败，旧日志保留
+    del registry._write_snapshot
+
+    later = registry.add_model(model('later'))
+    assert state(open_registry(path)) == state(registry)
+
+    # 下次压缩把新日志接到未完成的旧日志后面
+    while os.path.exists(oplog):
+        registry.add_model(model(f'm{len(registry.models)}'))
+    registry._compaction_thread.join(5)
+    assert not os.path.exists(compacting)
+    assert later in snapshot_ids(path)
+    assert state(open_registry(path)) == state(registry)
@@ -0,0 +1,61 @@
+import csv
+
+from ModelFinderV2_5.result_table import SEARCH_COLUMNS, ResultTable, SearchRow
+
+
+def write_raw(path, text, encoding='utf-8-sig'):
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        f.write(text)
+
+
+def test_round_trip_keeps_columns_values_and_bom(tmp_path):
+    path = tmp_path / 'missing.csv'
+    write_raw(path,
+              '序号,文件名,备注,状态\r\n'
+              '1,"a,b.safetensors","多行\n备注 ""quoted""",\r\n'
+              ',,,\r\n'
+              '\r\n'
+              '2,模型.ckpt,,已处理\r\n')
+
+    table = ResultTable.read_csv(str(path))
+    assert table.columns == ['序号', '文件名', '备注', '状态', '下载链接', '镜像链接', '搜索链接', '节点类型']
+    assert len(table) == 2  # 空行和只有逗号的行被跳过
+    assert table[0].filename == 'a,b.safetensors'
+    assert table[0]['备注'] == '多行\n备注 "quoted"'
+    assert table[0].extra == {'备注': '多行\n备注 "quoted"'}
+    assert table[1].status == '已处理' and table[1].download_link == ''
+
+    table.update(0, {'状态': '已处理', '下载链接': 'https://huggingface.co/x', 'SHA256': 'ab' * 32})
+    out = tmp_path / 'out.csv'
+    table.write_csv(str(out))
+    assert out.read_bytes().startswith(b'\xef\xbb\xbf')
+
+    reread = ResultTable.read_csv(str(out))
+    assert reread.columns == table.columns
+    assert reread.columns[-1] == 'SHA256'
+    assert [[row.get(c) for c in reread.columns] for row in reread] == [[row.get(c) for c in table.columns] for row in table]
+    with open(out, encoding='utf-8-sig', newline='') as f:
+        assert next(csv.reader(f)) == table.columns
+
+
+def test_plain_utf8_without_bom_is_read(tmp_path):
+    path = tmp_path / 'plain.csv'
+    write_raw(path, '文件名,状态\nflux1-dev.sft,未找到\n', encoding='utf-8')
+    table = ResultTable.read_csv(str(path))
+    assert table.columns[:2] == ['文件名', '状态']
+    assert table[0].filename == 'flux1-dev.sft' and table[0].status == '未找到'
+
+
+def test_short_records_and_required_columns(tmp_path):
+    path = tmp_path / 'short.csv'
+    write_raw(path, '文件名,状态,下载链接\nonly_name.pt\n')
+    table = ResultTable.read_csv(str(path), required_columns=())
+    assert table.columns == ['文件名', '状态', '下载链接']
+    assert (table[0].filename, table[0].status, table[0].download_link) == ('only_name.pt', '', '')
+    assert set(SEARCH_COLUMNS) <= set(ResultTable.read_csv(str(path)).columns)
+
+
+def test_search_row_values_are_strings():
+    row = SearchRow({'文件名': 'a.pt', '文件大小': 1234, '状态': None, 'custom': 5})
+    assert row.file_size == '1234' and row.status == '' and row['custom'] == '5'
+    assert row.get('missing', 'default') == 'default'
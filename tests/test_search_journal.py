@@ -0,0 +1,194 @@
+import os
+
+import pytest
+
+from ModelFinderV2_5 import search_journal
+from ModelFinderV2_5.analysis_model import AnalysisModel
+from ModelFinderV2_5.result_table import ResultTable, SearchRow
+from ModelFinderV2_5.search_journal import CheckpointWriter, SearchSession
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_journal, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'missing_models.csv'
+    table = ResultTable(['序号', '文件名', '状态'])
+    for i in range(60):
+        table.rows.append(SearchRow({'序号': str(i + 1), '文件名': f'model_{i}.safetensors', '状态': ''}))
+    table.write_csv(str(path))
+    return str(path)
+
+
+class Recorder:
+    """写回CSV时记录当时的表格内容。"""
+
+    def __init__(self, table):
+        self.table = table
+        self.flushes = 0
+
+    def __call__(self, path):
+        self.flushes += 1
+        self.table.write_csv(path)
+
+
+def found(i):
+    return {'状态': '已处理', '下载链接': f'https://example.com/{i}'}
+
+
+def test_flushes_every_25_rows(csv_file, clock):
+    table = ResultTable.read_csv(csv_file)
+    writer = Recorder(table)
+    checkpoint = CheckpointWriter(csv_file, writer)
+
+    flushed = []
+    for i in range(60):
+        table.update(i, found(i))
+        flushed.append(checkpoint.record(i, found(i), table[i].filename))
+    assert [i for i, f in enumerate(flushed) if f] == [24, 49]
+    assert len(CheckpointWriter.read_journal(csv_file)) == 10
+    assert [r.status for r in ResultTable.read_csv(csv_file)].count('已处理') == 50
+
+    assert checkpoint.close()
+    assert not os.path.exists(CheckpointWriter.journal_path_for(csv_file))
+    assert [r.status for r in ResultTable.read_csv(csv_file)].count('已处理') == 60
+    assert writer.flushes == 3
+
+
+def test_flushes_after_10_seconds(csv_file, clock):
+    table = ResultTable.read_csv(csv_file)
+    writer = Recorder(table)
+    checkpoint = CheckpointWriter(csv_file, writer)
+
+    clock.now += 3
+    assert not checkpoint.record(0, found(0), 'model_0.safetensors')
+    clock.now += 6.9
+    assert not checkpoint.record(1, found(1), 'model_1.safetensors')
+    clock.now += 0.1
+    assert checkpoint.record(2, found(2), 'model_2.safetensors')
+    clock.now += 9
+    assert not checkpoint.record(3, found(3), 'model_3.safetensors')  # 从上次写回重新计时
+    assert writer.flushes == 1
+
+
+def test_failed_write_keeps_journal(csv_file, clock):
+    def failing_write(path):
+        raise OSError('disk full')
+    checkpoint = CheckpointWriter(csv_file, failing_write, flush_rows=1)
+    before = open(csv_file, encoding='utf-8-sig').read()
+
+    assert not checkpoint.record(0, found(0), 'model_0.safetensors')
+    assert not checkpoint.close()
+    assert open(csv_file, encoding='utf-8-sig').read() == before
+    assert [e['row'] for e in CheckpointWriter.read_journal(csv_file)] == [0]
+    assert not [name for name in os.listdir(os.path.dirname(csv_file)) if name.endswith('.tmp')]
+
+
+def test_journal_replay_ignores_torn_last_line(csv_file, clock):
+    table = ResultTable.read_csv(csv_file)
+    checkpoint = CheckpointWriter(csv_file, table.write_csv)
+    checkpoint.record(0, found(0), 'model_0.safetensors')
+    checkpoint.record(1, found(1), 'model_1.safetensors')
+    checkpoint.record(5, found(5), 'renamed.safetensors')  # 与CSV中的文件名不一致，不恢复
+    checkpoint._journal.close()  # 模拟中断：CSV未写回，最后一行只写了一半
+    with open(checkpoint.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"row": 2, "name": "model_2.safetensors", "values": {"状态": "已')
+
+    assert [e['row'] for e in CheckpointWriter.read_journal(csv_file)] == [0, 1, 5]
+    resumed = ResultTable.read_csv(csv_file)
+    assert AnalysisModel()._replay_search_journal(resumed, csv_file) == 2
+    assert [r.status for r in resumed.rows[:6]] == ['已处理', '已处理', '', '', '', '']
+    assert resumed[1].download_link == 'https://example.com/1'
+
+    # 继续写入时先截掉残缺的行，新记录不会与它连在一起
+    checkpoint = CheckpointWriter(csv_file, resumed.write_csv)
+    checkpoint.record(3, found(3), 'model_3.safetensors')
+    assert [e['row'] for e in CheckpointWriter.read_journal(csv_file)] == [0, 1, 5, 3]
+
+
+@pytest.fixture
+def results_folder(tmp_path, monkeypatch):
+    folder = tmp_path / 'results'
+    folder.mkdir()
+    monkeypatch.setattr(search_journal, 'get_results_folder', lambda: str(folder))
+    return folder
+
+
+def test_failed_rows_back_off_exponentially(csv_file, clock):
+    session = SearchSession(csv_file)
+    delays = []
+    for attempt in range(1, 5):
+        session.mark_failed('a.safetensors', f'timeout {attempt}')
+        delays.append(session.rows['a.safetensors']['retry_after'] - clock.now)
+        assert not session.is_runnable('a.safetensors', now=clock.now + delays[-1] - 1)
+        assert session.is_runnable('a.safetensors', now=clock.now + delays[-1])
+    assert delays == [60, 120, 240, 480]
+    assert session.rows['a.safetensors']['last_error'] == 'timeout 4'
+
+    session.mark_failed('a.safetensors', 'timeout 5')
+    assert session.rows['a.safetensors']['attempts'] == SearchSession.MAX_ATTEMPTS
+    assert not session.is_runnable('a.safetensors', now=clock.now + 10 * SearchSession.BACKOFF_MAX_SECONDS)
+
+
+def test_backoff_is_capped(csv_file, clock, monkeypatch):
+    monkeypatch.setattr(SearchSession, 'MAX_ATTEMPTS', 20)
+    session = SearchSession(csv_file)
+    for _ in range(12):
+        session.mark_failed('a.safetensors', 'error')
+    assert session.rows['a.safetensors']['retry_after'] - clock.now == SearchSession.BACKOFF_MAX_SECONDS
+    assert session.is_runnable('a.safetensors', now=clock.now + SearchSession.BACKOFF_MAX_SECONDS)
+
+
+def test_resume_skips_done_rows_and_retries_interrupted(csv_file, clock):
+    session = SearchSession(csv_file)
+    for name in ('done', 'interrupted', 'failed', 'waiting'):
+        session.add_pending(name)
+    session.mark_in_flight('done')
+    session.mark_done('done')
+    session.mark_in_flight('interrupted')  # 中断时正在搜索
+    session.mark_failed('failed', 'HTTP 503')
+    assert session.summary() == {'pending': 1, 'in_flight': 1, 'done': 1, 'failed': 1}
+    assert session.save()
+
+    resumed = SearchSession.load(csv_file)
+    for name in resumed.rows:
+        resumed.add_pending(name)
+    assert resumed.summary() == {'pending': 2, 'in_flight': 0, 'done': 1, 'failed': 1}
+    assert not resumed.is_runnable('done')
+    assert resumed.is_runnable('interrupted') and resumed.is_runnable('waiting')
+    assert resumed.is_runnable('new row')
+    assert not resumed.is_runnable('failed', now=clock.now + 59)
+    assert resumed.is_runnable('failed', now=clock.now + 60)
+    assert resumed.rows['failed']['last_error'] == 'HTTP 503'
+    assert resumed.created == session.created
+
+
+def test_missing_or_corrupt_session_is_not_loaded(csv_file):
+    assert SearchSession.load(csv_file) is None
+    with open(csv_file + SearchSession.SESSION_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write('{"rows": {"a": ')
+    assert SearchSession.load(csv_file) is None
+
+
+def test_last_session_points_at_started_csv(csv_file, results_folder):
+    assert SearchSession.last_session_csv() is None
+    SearchSession.start(csv_file)
+    assert SearchSession.last_session_csv() == os.path.abspath(csv_file)
+    os.remove(csv_file)
+    assert SearchSession.last_session_csv() is None
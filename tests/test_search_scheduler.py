@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from ModelFinderV2_5 import search_engine
+from ModelFinderV2_5.search_engine import RateLimiter, SearchScheduler
+
+
+class FakeClock:
+    """单调时钟，sleep 只推进时间并记录时长。"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+class FakeTab:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_rate_limiter_reserves_consecutive_slots_per_host(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_engine, 'time', clock)
+    limiter = RateLimiter(min_interval=1.0, jitter=0)
+
+    limiter.wait('https://www.bing.com/search?q=a')
+    limiter.wait('www.bing.com')  # 同一主机，不论传入URL还是主机名
+    limiter.wait('https://www.bing.com/search?q=c')
+    limiter.wait('https://huggingface.co/api/models')  # 其他主机不受影响
+    assert clock.sleeps == [1.0, 2.0]
+
+    clock.now += 5  # 空闲后不需要等待
+    limiter.wait('www.bing.com')
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_rate_limiter_jitter_stays_in_range(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_engine, 'time', clock)
+    limiter = RateLimiter(min_interval=1.0, jitter=0.5)
+    for _ in range(20):
+        limiter.wait('www.bing.com')
+    gaps = [b - a for a, b in zip([0] + clock.sleeps, clock.sleeps)]
+    assert all(1.0 <= gap <= 1.5 for gap in gaps)
+
+
+def test_rate_limiter_spaces_concurrent_workers():
+    limiter = RateLimiter(min_interval=0.03, jitter=0)
+    times, lock = [], threading.Lock()
+
+    def worker():
+        for _ in range(3):
+            limiter.wait('www.bing.com')
+            with lock:
+                times.append(time.monotonic())
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times.sort()
+    assert len(times) == 12
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.025
+
+
+def test_each_task_result_is_delivered_once():
+    tabs = [FakeTab(f'tab{i}') for i in range(3)]
+    started = []
+
+    def search(tab, task):
+        time.sleep(0.001)
+        if task == 7:
+            raise RuntimeError('page crashed')
+        return (tab.name, task * 10)
+
+    scheduler = SearchScheduler(tabs, search, on_task_start=started.append)
+    results = list(scheduler.run(range(20)))
+
+    assert sorted(task for task, _ in results) == list(range(20))
+    assert sorted(started) == list(range(20))
+    errors = [(task, result) for task, result in results if isinstance(result, Exception)]
+    assert [(task, str(error)) for task, error in errors] == [(7, 'page crashed')]
+    assert all(result[1] == task * 10 for task, result in results if task != 7)
+    assert len({result[0] for task, result in results if task != 7}) > 1  # 多个标签页都参与了
+
+
+def test_workers_stop_when_consumer_raises():
+    tabs = [FakeTab(f'tab{i}') for i in range(3)]
+    started, in_flight, lock = [], [0], threading.Lock()
+
+    def search(tab, task):
+        with lock:
+            started.append(task)
+            in_flight[0] += 1
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return task
+
+    scheduler = SearchScheduler(tabs, search)
+    with pytest.raises(ValueError):
+        for task, result in scheduler.run(range(100)):
+            raise ValueError('writer failed')
+
+    # 异常传出时工作线程已经结束，不再有进行中的搜索，也不会再取新任务
+    assert in_flight[0] == 0
+    count = len(started)
+    time.sleep(0.1)
+    assert len(started) == count < 100
+
+
+def test_stop_before_run_searches_nothing():
+    scheduler = SearchScheduler([FakeTab('tab0')], lambda tab, task: task)
+    scheduler.stop()
+    assert list(scheduler.run(range(5))) == []
@@ -0,0 +1,142 @@
+import io
+import json
+
+import pytest
+
+from ModelFinderV2_5.workflow_parser import (ApiPromptExtractor, ExtractorConfig, JsonStream, UIWorkflowExtractor,
+                                             _extract_from_items, _iter_stream_items, extract_model_references,
+                                             load_workflow_references)
+
+CONFIG = ExtractorConfig(
+    frozenset({'CheckpointLoaderSimple', 'LoraLoader', 'UNETLoader'}),
+    {'default': [0], 'LoraLoader': [0], 'DualCLIPLoader': [0, 1]},
+    ('.safetensors', '.ckpt', '.pt', '.sft'),
+)
+
+UI_WORKFLOW = {
+    'id': 'c0ffee',
+    'last_node_id': 12,
+    'nodes': [
+        {'id': 1, 'type': 'CheckpointLoaderSimple', 'widgets_values': ['sdxl\\juggernaut_v9.safetensors']},
+        {'id': 2, 'type': 'KSampler', 'widgets_values': [123456789012345, 'fixed', 20, 7.5e0, 'euler', 'normal', 1.0]},
+        {'id': 3, 'type': 'LoraLoader', 'widgets_values': ['None', 1.0, 1.0]},
+        {'id': 4, 'type': 'DualCLIPLoader', 'widgets_values': ['clip_l.safetensors', 't5xxl_fp16.safetensors', 'flux']},
+        {'id': 5, 'type': 'CLIPTextEncode', 'widgets_values': ['ünïcødé "quoted" \\n text 模型 😀']},
+    ],
+    'links': [[1, 1, 0, 2, 0, 'MODEL'], [2, 4, 0, 5, 0, 'CLIP']],
+    'groups': [],
+    'config': {},
+    'definitions': {'subgraphs': [{
+        'id': 'sg-1', 'name': 'Upscale',
+        'nodes': [{'id': 7, 'type': 'UpscaleModelLoader', 'widgets_values': ['4x_ultrasharp.pt']}],
+        'definitions': {'subgraphs': [{
+            'id': 'sg-2', 'nodes': [{'id': 8, 'type': 'UNETLoader', 'widgets_values': ['flux1-dev.sft', 'default']}],
+        }]},
+    }]},
+    'extra': {
+        'ds': {'scale': 0.75, 'offset': [-12.5, 3e-3]},
+        'groupNodes': {'Loaders': {'nodes': [
+            {'index': 0, 'type': 'CheckpointLoaderSimple', 'widgets_values': ['group_ckpt.safetensors']},
+        ]}},
+    },
+    'version': 0.4,
+}
+
+API_PROMPT = {
+    '4': {'class_type': 'CheckpointLoaderSimple', 'inputs': {'ckpt_name': 'api_model.safetensors'}},
+    '10': {'class_type': 'LoraLoader', 'inputs': {'lora_name': 'style.safetensors', 'strength_model': 0.8, 'model': ['4', 0]}},
+    '12:3': {'class_type': 'UNETLoader', 'inputs': {'unet_name': 'sub_unet.sft', 'weight_dtype': 'default'}},
+    '5': {'class_type': 'KSampler', 'inputs': {'seed': 1, 'model': ['10', 0]}},
+}
+
+
+class ShortReads(io.StringIO):
+    """每次最多返回 n 个字符的文件对象，模拟任意位置的缓冲区边界。"""
+
+    def __init__(self, text, n):
+        super().__init__(text)
+        self._n = n
+
+    def read(self, size=-1):
+        return super().read(self._n if size is None or size < 0 else min(size, self._n))
+
+
+def references(refs):
+    return sorted((str(r['node_id']), r['node_type'], r['original_filename']) for r in refs)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 4096])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_json_stream_decodes_like_json_load(chunk_size, indent):
+    text = '\ufeff' + json.dumps(UI_WORKFLOW, indent=indent, ensure_ascii=False)
+    expected = json.loads(text[1:])
+    assert JsonStream(ShortReads(text, chunk_size), chunk_size=chunk_size).decode_value() == expected
+
+    # 逐个元素遍历得到同样的结果，跳过的值不影响后续解析
+    stream = JsonStream(ShortReads(text, chunk_size), chunk_size=chunk_size)
+    rebuilt = {}
+    for key in stream.iter_object():
+        if key == 'nodes':
+            rebuilt[key] = list(stream.iter_array())
+        elif key == 'links':
+            stream.skip_value()
+        else:
+            rebuilt[key] = stream.decode_value()
+    assert stream.peek() == ''
+    assert rebuilt == {k: v for k, v in expected.items() if k != 'links'}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 13])
+def test_numbers_split_across_chunks(chunk_size):
+    text = '[1.5e-3, -0, 12345678901234567890, 2E+10, 0.25, true, null]'
+    stream = JsonStream(ShortReads(text, chunk_size), chunk_size=chunk_size)
+    assert list(stream.iter_array()) == json.loads(text)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+@pytest.mark.parametrize('workflow', [UI_WORKFLOW, API_PROMPT, {'prompt': API_PROMPT, 'client_id': 'x'}],
+                         ids=['ui', 'api', 'api-wrapped'])
+def test_streamed_extraction_matches_in_memory(workflow, chunk_size):
+    text = json.dumps(workflow, indent=1, ensure_ascii=False)
+    extractors = (UIWorkflowExtractor(), ApiPromptExtractor())
+    streamed = _extract_from_items(_iter_stream_items(ShortReads(text, chunk_size), extractors), CONFIG, extractors)
+    assert references(streamed) == references(extract_model_references(json.loads(text), CONFIG))
+
+
+def test_subgraphs_and_group_nodes_are_extracted(tmp_path):
+    path = tmp_path / 'workflow.json'
+    path.write_text(json.dumps(UI_WORKFLOW, ensure_ascii=False), encoding='utf-8')
+    expected = [
+        ('1', 'CheckpointLoaderSimple', 'juggernaut_v9.safetensors'),
+        ('4', 'DualCLIPLoader', 'clip_l.safetensors'),
+        ('4', 'DualCLIPLoader', 't5xxl_fp16.safetensors'),
+        ('Loaders:0', 'CheckpointLoaderSimple', 'group_ckpt.safetensors'),
+        ('Upscale:7', 'UpscaleModelLoader', '4x_ultrasharp.pt'),
+        ('sg-2:8', 'UNETLoader', 'flux1-dev.sft'),
+    ]
+    assert references(load_workflow_references(str(path), CONFIG, streaming=False)) == expected
+    assert references(load_workflow_references(str(path), CONFIG, streaming=True)) == expected
+
+
+def test_api_prompt_references_by_input_name():
+    assert references(extract_model_references({'prompt': API_PROMPT}, CONFIG)) == [
+        ('10', 'LoraLoader', 'style.safetensors'),
+        ('12:3', 'UNETLoader', 'sub_unet.sft'),
+        ('4', 'CheckpointLoaderSimple', 'api_model.safetensors'),
+    ]
+
+
+def test_api_extractor_only_wants_prompt_shaped_keys():
+    extractor = ApiPromptExtractor()
+    assert extractor.wants('prompt', '{')
+    assert extractor.wants('4', '{') and extractor.wants('12:3', '{')
+    for key in ('extra', 'config', 'definitions', 'extra_data', '4a', ''):
+        assert not extractor.wants(key, '{')
+    assert not extractor.wants('4', '[')
+
+
+def test_non_workflow_json_is_not_recognised(tmp_path):
+    path = tmp_path / 'other.json'
+    path.write_text(json.dumps({'config': {'a': 1}, 'items': [1, 2, 3]}), encoding='utf-8')
+    assert load_workflow_references(str(path), CONFIG, streaming=True) is None
+    assert load_workflow_references(str(path), CONFIG, streaming=False) is None